@@ -1,32 +1,52 @@
-import asyncio
 import logging
-import threading
 import uuid
 import hmac
 import time
+import threading
 from pathlib import Path
 import sys
+import click
 from flask_cors import CORS
-from flask import Flask, request, jsonify, session, redirect, url_for
+from flask import Flask, Response, request, jsonify, session, redirect, url_for, send_file
 import os
 import re # Keep re for URL validation
+import json
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from datetime import datetime, timedelta # Import datetime for Template model
 from authlib.integrations.flask_client import OAuth
-from flask_sse import sse
 
 from flask_admin import Admin
 from flask_admin.contrib.sqla import ModelView
+from sqlalchemy.orm import load_only, undefer, undefer_group
 
 # Add the project root to the Python path to import main
 project_root = Path(__file__).parent
 sys.path.append(str(project_root))
 
-# Import the refactored main functions
-from main import run_analysis_for_url, get_video_info_from_url
+# The pipeline itself (yt-dlp, Gemini) is only imported when the first analysis runs.
+from pipeline import run_analysis_for_url, extract_video_id, ANALYSIS_MODEL_NAME, BASE_OUTPUT_DIR
+from job_executor import JobExecutor, QueueFullError
+from job_estimates import estimate_job, VIDEO_FACTS, INITIAL_SECONDS_PER_UNIT
+from job_leases import (
+    DEFAULT_LEASE_SECONDS, make_worker_id, claim_next_job, renew_leases, release_lease, requeue_expired_jobs
+)
+from job_events import JobEventBroker
+from progress_sink import ProgressSink
+from result_cache import ResultCache, make_cache_key
+from single_flight import SingleFlight
+from cancellation import CancellationRegistry
+from janitor import Janitor
+import quota
+import history
+import metrics
+from artifact_store import ARTIFACT_STORE, TEXT_FIELDS, ARTIFACT_KEY_SUFFIX
+from transcript_cache import TRANSCRIPT_CACHE
+from async_runtime import RUNTIME
+from db_config import configure_database
+from http_cache import make_etag, conditional_json, compress_response, IMMUTABLE_CACHE_CONTROL
 
 app = Flask(__name__)
 
@@ -42,7 +62,15 @@ if os.environ.get("ENV_MODE") != "development":
     app.config['SESSION_COOKIE_SAMESITE'] = 'None'
     app.config['SESSION_COOKIE_SECURE'] = True
 
-# --- SSE Configuration (REMOVED) ---
+# --- Job Progress Stream Configuration ---
+# Progress is fanned out from memory to /api/jobs/<job_id>/events subscribers.
+job_events = JobEventBroker()
+# Each stream request waits at most SSE_WAIT_SECONDS for news and then ends, and
+# EventSource reconnects SSE_RETRY_MS later, so a watcher holds a server thread
+# for a fraction of the time instead of for as long as it watches.
+SSE_WAIT_SECONDS = float(os.environ.get('SSE_WAIT_SECONDS', 0.5))
+SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', 2000))
+FINAL_JOB_STATUSES = ('success', 'error', 'cancelled')
 
 # --- OAuth (Google SSO) Configuration ---
 oauth = OAuth(app)
@@ -61,6 +89,10 @@ google = oauth.register(
 # to send requests and receive session cookies from the backend (running on localhost:5000).
 CORS(app, supports_credentials=True, origins=["http://localhost:3000", "https://noledge.happywecan.com"])
 
+# --- Response Compression ---
+# Large JSON bodies (job results, history pages) are gzip/brotli-compressed for clients that accept it.
+app.after_request(compress_response)
+
 # --- Startup Check for Environment Variables ---
 GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
 GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
@@ -68,13 +100,40 @@ if not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
     raise ValueError("Missing GOOGLE_CLIENT_ID or GOOGLE_CLIENT_SECRET environment variables. Please set them in your .env file.")
 
 # --- Database Configuration ---
-data_dir = project_root / 'data'
+data_dir = Path(os.environ.get('DATA_DIR', project_root / 'data'))
 data_dir.mkdir(exist_ok=True) # Ensure the data directory exists
 db_path = data_dir / 'project.db'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + str(db_path)
+# One connection per request thread and per analysis thread, plus the progress flush thread.
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-from models import db, Template, Job, User, Feedback
-db.init_app(app)
+from models import db, Template, Job, User, Feedback, ResultCacheEntry
+configure_database(
+    app, db, db_path,
+    pool_size=int(os.environ.get('GUNICORN_THREADS', 16)) + int(os.environ.get('JOB_WORKERS', 2)) + 1
+)
+
+# Finished analyses, shared by every job with the same video, language, template, prompt and model.
+result_cache = ResultCache()
+# Analyses in flight in any process, so identical submissions can wait for them.
+single_flight = SingleFlight()
+
+def abandoned_job_ids(job_ids):
+    """
+    Returns the jobs in job_ids that have been cancelled and have no coalesced job
+    still waiting on them, i.e. whose analysis nobody needs any more.
+    """
+    cancelled_ids = [row.id for row in db.session.query(Job.id).filter(Job.id.in_(job_ids), Job.status == 'cancelled')]
+    return [cancelled_id for cancelled_id in cancelled_ids if not single_flight.followers(cancelled_id)]
+
+def find_abandoned_jobs(job_ids):
+    with app.app_context():
+        return abandoned_job_ids(job_ids)
+
+# Analyses running in this process, so a cancelled job can stop its downloads and
+# Gemini calls. Cancellations made through other processes are picked up from the
+# Job table every CANCELLATION_POLL_INTERVAL seconds.
+cancellations = CancellationRegistry(
+    find_abandoned_jobs, poll_interval=float(os.environ.get('CANCELLATION_POLL_INTERVAL', 5.0))
+)
 
 migrate = Migrate(app, db)
 
@@ -85,29 +144,162 @@ limiter = Limiter(
     default_limits=["200 per day", "50 per hour"]
 )
 
+# --- Job Executor Configuration ---
+# Each gunicorn worker runs at most JOB_WORKERS analyses at once and keeps up to
+# JOB_QUEUE_SIZE more waiting; anything beyond that is rejected with a 503.
+# Waiting jobs are shared out fairly between users (or IPs for anonymous jobs):
+# subtitle-only jobs go first, and each principal gets FAIR_SHARE_QUANTUM
+# estimated audio-minutes per turn (see job_estimates.py).
+job_executor = JobExecutor(
+    max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+    max_queue_size=int(os.environ.get('JOB_QUEUE_SIZE', 10)),
+    quantum=float(os.environ.get('FAIR_SHARE_QUANTUM', 10)),
+    seconds_per_unit=INITIAL_SECONDS_PER_UNIT
+)
+# The jobs' blocking stages all run on the shared event loop's executor.
+RUNTIME.size_for_jobs(job_executor.max_workers)
+JOB_RETRY_AFTER_SECONDS = int(os.environ.get('JOB_RETRY_AFTER_SECONDS', 30))
+# 'inline' runs jobs on job_executor inside the web process; 'worker' only records
+# them in the Job table for `python worker.py` processes to claim.
+JOB_DISPATCH_MODE = os.environ.get('JOB_DISPATCH_MODE', 'inline')
+
+# --- Inline Job Leases ---
+# In inline mode every job is leased to the web worker that queued it, and a
+# background thread renews the leases while the process lives. When a worker is
+# recycled or crashes mid-job its leases expire, and the recovery pass of any
+# surviving or restarted web worker claims the job and resumes it from its last
+# checkpoint. worker.py processes do the same with their own leases.
+PROCESS_ID = make_worker_id()
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', DEFAULT_LEASE_SECONDS))
+RECOVERY_INTERVAL_SECONDS = float(os.environ.get('RECOVERY_INTERVAL_SECONDS', 30))
+_lease_keeper = None
+_lease_keeper_lock = threading.Lock()
+
+# Progress messages are coalesced per job and written in batches at most every
+# PROGRESS_FLUSH_INTERVAL seconds; subscribers still see every message via job_events.
+progress_sink = ProgressSink(app, min_interval=float(os.environ.get('PROGRESS_FLUSH_INTERVAL', 2.0)))
+
+def running_job_ids():
+    with app.app_context():
+        return {row.id for row in db.session.query(Job.id).filter(Job.status.in_(('starting', 'running')))}
+
+# --- Output Janitor ---
+# Keeps output/jobs under JANITOR_BUDGET_MB by deleting leftover audio and the least
+# recently read job directories; their texts remain available from the artifact store.
+JANITOR_MAX_AGE_DAYS = float(os.environ.get('JANITOR_MAX_AGE_DAYS', 14))
+janitor = Janitor(
+    BASE_OUTPUT_DIR / 'jobs',
+    budget_bytes=int(float(os.environ.get('JANITOR_BUDGET_MB', 5120)) * 1024 * 1024),
+    max_age_seconds=JANITOR_MAX_AGE_DAYS * 86400 if JANITOR_MAX_AGE_DAYS > 0 else None,
+    active_job_ids=running_job_ids,
+    interval_seconds=float(os.environ.get('JANITOR_INTERVAL_SECONDS', 900)),
+    on_reclaimed=lambda reason, size: metrics.JANITOR_RECLAIMED_BYTES.labels(reason).inc(size)
+)
+
+def inline_lease():
+    """Column values that lease a new job to this process, in inline mode."""
+    if JOB_DISPATCH_MODE != 'inline':
+        return {}
+    now = datetime.utcnow()
+    return {"claimed_by": PROCESS_ID, "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+            "heartbeat_at": now, "attempts": 1}
+
+def schedule_for(job):
+    """The fair-share arguments for job_executor.submit: who the job is charged to and how big it is."""
+    estimate = estimate_job(job.video_id)
+    return {"principal": quota.principal_for(job.user_id, job.ip_address),
+            "priority": estimate.priority, "cost": estimate.cost}
+
+def recover_interrupted_jobs() -> int:
+    """
+    Resumes jobs whose web worker died: their leases are expired, so they are put
+    back in the queue (or failed after too many attempts), claimed by this process
+    and run from their last checkpoint. Returns the number of jobs resumed.
+    """
+    resumed = 0
+    with app.app_context():
+        requeue_expired_jobs()
+        while not job_executor.is_full():
+            job_id = claim_next_job(PROCESS_ID, JOB_LEASE_SECONDS)
+            if not job_id:
+                break
+            job = Job.query.get(job_id)
+            try:
+                job_executor.submit(job_id, run_stored_job, job_id, **schedule_for(job))
+            except QueueFullError:
+                release_lease(job_id, PROCESS_ID)
+                break
+            app.logger.warning(f"Resuming interrupted job {job_id} (attempt {job.attempts}).")
+            resumed += 1
+    return resumed
+
+def lease_keeper_loop():
+    """Runs a recovery pass at startup and then periodically, renewing this process's leases in between."""
+    last_recovery = None
+    while True:
+        try:
+            if last_recovery is None or time.monotonic() - last_recovery >= RECOVERY_INTERVAL_SECONDS:
+                last_recovery = time.monotonic()
+                recover_interrupted_jobs()
+            with app.app_context():
+                renew_leases(PROCESS_ID, JOB_LEASE_SECONDS)
+        except Exception:
+            app.logger.exception("Lease keeper iteration failed")
+        time.sleep(JOB_LEASE_SECONDS / 3)
+
+def start_lease_keeper():
+    """
+    Starts the lease keeper of this process, in inline mode. gunicorn.conf.py calls this
+    in every web worker once it has booted, so a forking gunicorn master never runs it
+    and a restarted worker recovers jobs without waiting for a request.
+    """
+    global _lease_keeper
+    if JOB_DISPATCH_MODE != 'inline' or (_lease_keeper is not None and _lease_keeper.is_alive()):
+        return
+    with _lease_keeper_lock:
+        if _lease_keeper is None or not _lease_keeper.is_alive():
+            _lease_keeper = threading.Thread(target=lease_keeper_loop, name="lease-keeper", daemon=True)
+            _lease_keeper.start()
+
+@app.before_request
+def ensure_lease_keeper():
+    """Starts the lease keeper with the first request when not run by gunicorn, e.g. under `flask run`."""
+    start_lease_keeper()
+
+def queue_full_response():
+    """Builds the 503 response returned when the job queue has no free slot."""
+    response = jsonify({"error": "The server is busy processing other videos. Please try again shortly."})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(JOB_RETRY_AFTER_SECONDS)
+    return response
+
 # --- Admin Panel Configuration ---
+def is_admin_session():
+    """Returns True if the logged-in user is the configured admin."""
+    # Check if a user is logged in via session
+    user_id = session.get('user_id')
+    if not user_id:
+        return False
+
+    # Get the required admin Google ID from environment variables
+    admin_google_id = os.environ.get('ADMIN_GOOGLE_ID')
+    if not admin_google_id:
+        app.logger.warning("ADMIN_GOOGLE_ID is not set. Admin panel is inaccessible.")
+        return False
+
+    # Fetch the user from the database
+    user = User.query.get(user_id)
+    if not user:
+        return False
+
+    # Check if the logged-in user's Google ID matches the admin's Google ID
+    app.logger.debug(f"[Admin Check] DB Google ID: '{user.google_id}'")
+    app.logger.debug(f"[Admin Check] ENV Google ID: '{admin_google_id}'")
+    return user.google_id == admin_google_id
+
 class AdminModelView(ModelView):
     def is_accessible(self):
-        # Check if a user is logged in via session
-        user_id = session.get('user_id')
-        if not user_id:
-            return False
-
-        # Get the required admin Google ID from environment variables
-        admin_google_id = os.environ.get('ADMIN_GOOGLE_ID')
-        if not admin_google_id:
-            app.logger.warning("ADMIN_GOOGLE_ID is not set. Admin panel is inaccessible.")
-            return False
-
-        # Fetch the user from the database
-        user = User.query.get(user_id)
-        if not user:
-            return False
-
-        # Check if the logged-in user's Google ID matches the admin's Google ID
-        app.logger.debug(f"[Admin Check] DB Google ID: '{user.google_id}'")
-        app.logger.debug(f"[Admin Check] ENV Google ID: '{admin_google_id}'")
-        return user.google_id == admin_google_id
+        return is_admin_session()
 
     def inaccessible_callback(self, name, **kwargs):
         # If user is not an admin, redirect them to the Google login page.
@@ -119,65 +311,254 @@ class UserAdminView(AdminModelView):
     # Exclude certain columns from the edit form to avoid a bug in form generation
     form_excluded_columns = ['google_id', 'profile_pic', 'created_at', 'jobs', 'templates']
 
+def format_stage_metrics(view, context, model, name):
+    """Shows where a job's time went, e.g. 'metadata 1.2s · subtitles 0.8s · analysis 14.0s'."""
+    stages = (model.stage_metrics or {}).get("stages") or {}
+    return " · ".join(f"{stage} {stages[stage]:.1f}s" for stage in metrics.STAGES if stage in stages)
+
+class JobAdminView(AdminModelView):
+    # Only these columns are selected for the list; results and options are loaded on the details page.
+    column_list = ['id', 'user_id', 'ip_address', 'status', 'progress_percentage', 'video_title',
+                   'video_url', 'cache_hit', 'processing_time_seconds', 'stage_metrics', 'created_at']
+    column_labels = {'stage_metrics': 'Stage breakdown'}
+    column_formatters = {'stage_metrics': format_stage_metrics}
+    column_default_sort = ('created_at', True)
+    column_filters = ['status', 'cache_hit', 'user_id']
+    can_view_details = True
+    page_size = 50
+    can_set_page_size = False
+
+    def get_query(self):
+        return super().get_query().options(load_only(*(getattr(Job, name) for name in self.column_list)))
+
 admin = Admin(app, name='Video Knowledge Admin', template_mode='bootstrap4', url='/admin')
 admin.add_view(UserAdminView(User, db.session))
-admin.add_view(AdminModelView(Job, db.session))
+admin.add_view(JobAdminView(Job, db.session))
 admin.add_view(AdminModelView(Feedback, db.session))
 
+def video_title_state(video_title, status):
+    """Tells clients whether the title is still being looked up by the pipeline."""
+    if video_title:
+        return 'resolved'
+    return 'unavailable' if status in FINAL_JOB_STATUSES else 'resolving'
+
+def job_status_payload(job):
+    """Builds the client-facing status of a job, as served by polling and the event stream."""
+    if job.status == 'success':
+        result_data = job.result or {}
+        formatted_result = {
+            "title": result_data.get("title"),
+            "url": result_data.get("url"),
+            "summary": ARTIFACT_STORE.resolve_text(result_data, "summary"),
+            "full_transcript": ARTIFACT_STORE.resolve_text(result_data, "full_transcript")
+        }
+        return {"status": "success", "data": formatted_result}
+    return {
+        "status": job.status,
+        "message": job.error_message,
+        "progress_percentage": job.progress_percentage,
+        "progress_message": job.progress_message,
+        "video_title": job.video_title,
+        "video_title_state": video_title_state(job.video_title, job.status),
+        # Only known to the worker process that queued the job; None elsewhere.
+        "queue_position": job_executor.queue_position(job.id) if job.status == 'starting' else None,
+        "estimated_start_seconds": estimated_start_seconds(job.id) if job.status == 'starting' else None
+    }
+
+def estimated_start_seconds(job_id):
+    """Rounded seconds until a queued job is expected to start, or None if it isn't queued here."""
+    seconds = job_executor.estimated_start(job_id)
+    return round(seconds) if seconds is not None else None
+
 # --- Helper function for the analysis thread ---
 def run_analysis_in_background(job_id, analysis_func, url, title, language, template_content, user_additional_prompt):
     """
-    Wrapper to run an analysis function, update the JOBS dict, and handle errors.
+    Wrapper to run an analysis function, update the Job row, and handle errors.
     """
+    janitor.start()
     with app.app_context():
+        cache_key = None
+        resolved_title = None
+
         def progress_callback(percentage, message):
-            """Logs progress and updates the database for this job."""
+            """Logs progress, pushes it to subscribers and queues it for the database."""
             app.logger.info(f"[Progress-{job_id}] {percentage}%: {message}")
-            job = Job.query.get(job_id)
-            if job:
-                job.progress_percentage = percentage
-                job.progress_message = message
+            payload = {
+                "status": "running",
+                "message": None,
+                "progress_percentage": percentage,
+                "progress_message": message,
+                "video_title": resolved_title,
+                "video_title_state": video_title_state(resolved_title, "running"),
+                "queue_position": None,
+                "estimated_start_seconds": None
+            }
+            # Runs on the event loop, so no database reads here: the sink also writes the
+            # progress to the jobs coalesced onto this one, whose streams read it from there.
+            progress_sink.update(job_id, percentage, message)
+            job_events.publish(job_id, payload)
+
+        def video_info_callback(video_info):
+            """Fills in the title that start_url_summary left empty to avoid blocking on yt-dlp."""
+            nonlocal resolved_title
+            resolved_title = video_info.get("title")
+            if "has_subtitles" in video_info:
+                # Lets the next job for this video be scheduled by its real size.
+                VIDEO_FACTS.record(video_info["video_id"], video_info.get("duration"), video_info["has_subtitles"])
+            # Called from a pipeline worker thread, so with a session of its own.
+            with app.app_context():
+                member_ids = [job_id] + single_flight.followers(job_id)
+                Job.query.filter(Job.id.in_(member_ids), Job.video_title.is_(None)).update(
+                    {"video_title": resolved_title}, synchronize_session=False
+                )
+                db.session.commit()
+
+        def checkpoint_callback(checkpoint):
+            """Keeps a copy of the pipeline's checkpoint on the Job row."""
+            with app.app_context():
+                Job.query.filter(Job.id == job_id).update({"checkpoint": checkpoint}, synchronize_session=False)
                 db.session.commit()
 
+        def finish_job(job, percentage, message):
+            """
+            Commits a terminal state together with its final progress, copies it to
+            any coalesced jobs, then notifies subscribers.
+            """
+            if job.processing_time_seconds is not None:
+                metrics.JOB_SECONDS.labels(job.status).observe(job.processing_time_seconds)
+            # Nothing is flushed until the cancelled jobs are known, so a leader that was
+            # cancelled while it ran doesn't overwrite its own cancellation.
+            with db.session.no_autoflush:
+                follower_ids = single_flight.finish(cache_key, job_id) if cache_key else []
+                # Jobs cancelled in the meantime keep their state; only the others get the outcome.
+                cancelled_ids = {row.id for row in db.session.query(Job.id).filter(
+                    Job.id.in_([job_id] + follower_ids), Job.status == 'cancelled')}
+                followers = [follower for follower in (Job.query.filter(Job.id.in_(follower_ids)).all() if follower_ids else [])
+                             if follower.id not in cancelled_ids]
+                finished_jobs = ([] if job_id in cancelled_ids else [job]) + followers
+                for finished_job in finished_jobs:
+                    progress_sink.finish(finished_job.id)
+                    finished_job.progress_percentage = percentage
+                    finished_job.progress_message = message
+                    if finished_job is job:
+                        continue
+                    finished_job.status = job.status
+                    finished_job.video_title = finished_job.video_title or job.video_title
+                    finished_job.error_message = job.error_message
+                    finished_job.result = dict(job.result, url=finished_job.video_url) if job.result else None
+                    finished_job.processing_time_seconds = round((datetime.utcnow() - finished_job.created_at).total_seconds(), 2)
+                    if job.status == 'cancelled':
+                        # Joined the analysis just as it was being stopped.
+                        finished_job.status = 'error'
+                        finished_job.error_message = "The analysis this job was waiting for was cancelled. Please try again."
+                for finished_job in finished_jobs:
+                    if finished_job.status == 'error':
+                        # Failed analyses don't count against the daily limit.
+                        quota.refund_job(finished_job)
+                if job_id in cancelled_ids:
+                    # Discard the outcome set on the cancelled leader without flushing it.
+                    db.session.expire(job)
+            db.session.commit()
+            for finished_job in finished_jobs:
+                job_events.publish(finished_job.id, job_status_payload(finished_job), final=True)
+            for cancelled_job in (Job.query.filter(Job.id.in_(cancelled_ids)).all() if cancelled_ids else []):
+                # Their cancellation may have been published by another process.
+                job_events.publish(cancelled_job.id, job_status_payload(cancelled_job), final=True)
+
         try:
             start_time = time.time() # Record start time
             job = Job.query.get(job_id)
             if not job:
                 app.logger.error(f"Job {job_id} not found in database during background execution.")
                 return
-            job.status = 'running'
+            cache_key = job.cache_key
+            leader_id = single_flight.join(cache_key, job_id) if cache_key else job_id
+            if leader_id != job_id:
+                # Another job, in this or another process, is already analyzing the same
+                # video; its finish_job() completes this job as well, so don't wait for it here.
+                app.logger.info(f"Job {job_id} coalesced onto in-flight job {leader_id}.")
+                if job.status != 'cancelled':
+                    job.status = 'running'
+                db.session.commit()
+                return
+
+            if job.status == 'cancelled' and abandoned_job_ids([job_id]):
+                # Cancelled while waiting in the queue of another process.
+                if cache_key:
+                    single_flight.finish(cache_key, job_id)
+                db.session.commit()
+                app.logger.info(f"Job {job_id} was cancelled before it started.")
+                return
+
+            # A cancelled leader keeps running for the coalesced jobs, but stays cancelled itself.
+            member_ids = [job_id] + single_flight.followers(job_id)
+            Job.query.filter(Job.id.in_(member_ids), Job.status != 'cancelled').update(
+                {"status": "running"}, synchronize_session=False
+            )
             db.session.commit()
+
+            # An identical job may have finished while this one was waiting in the queue.
+            cached_result = result_cache.lookup(job.cache_key) if job.cache_key else None
+            if cached_result is not None:
+                cached_result["url"] = url
+                job.status = 'success'
+                job.result = cached_result
+                job.video_title = job.video_title or cached_result.get("title")
+                job.cache_hit = True
+                job.processing_time_seconds = round(time.time() - start_time, 2)
+                finish_job(job, 100, "Loaded from cache.")
+                app.logger.info(f"Job {job_id} served from the result cache.")
+                return
+
+            cancel_token = cancellations.register(job_id)
             progress_callback(5, "Job started, analysis is running...")
 
             # Pass the callback to the analysis function
-            result = asyncio.run(analysis_func(
+            # Runs on the process-wide event loop, shared with the other jobs' Gemini clients.
+            result = RUNTIME.run(analysis_func(
                 url=url,
                 title=title,
                 language=language,
                 job_id=job_id,
                 template_content=template_content,
                 user_additional_prompt=user_additional_prompt,
-                progress_callback=progress_callback
+                progress_callback=progress_callback,
+                video_info_callback=video_info_callback,
+                cancel_token=cancel_token,
+                checkpoint=job.checkpoint,
+                checkpoint_callback=checkpoint_callback
             ))
 
             if result.get("status") == "success":
                 job.status = 'success'
                 job.result = result.get("result")
-                progress_callback(100, "Job completed successfully.")
+                if job.cache_key:
+                    # Not flushed yet, so finish_job can still see whether the job was cancelled meanwhile.
+                    with db.session.no_autoflush:
+                        result_cache.store(
+                            job.cache_key, extract_video_id(url), language, template_content,
+                            user_additional_prompt, ANALYSIS_MODEL_NAME, job.result
+                        )
+                final_message = "Job completed successfully."
+            elif result.get("status") == "cancelled":
+                job.status = 'cancelled'
+                final_message = "Job cancelled."
             else:
                 job.status = 'error'
                 job.error_message = result.get("message", "An unknown error occurred.")
-                progress_callback(100, f"Job failed: {job.error_message}")
+                final_message = f"Job failed: {job.error_message}"
 
             # Calculate and store processing time
             end_time = time.time()
             job.processing_time_seconds = round(end_time - start_time, 2)
+            job.stage_metrics = result.get("metrics")
 
-            db.session.commit()
+            finish_job(job, 100, final_message)
             app.logger.info(f"Thread finished for job_id: {job_id}, status: {job.status}")
 
         except Exception as e:
             app.logger.exception(f"An unhandled exception occurred in thread for job {job_id}: {e}")
+            db.session.rollback()
             job = Job.query.get(job_id) # Re-fetch job to be safe
             if job:
                 job.status = 'error'
@@ -189,8 +570,28 @@ def run_analysis_in_background(job_id, analysis_func, url, title, language, temp
                 if 'start_time' in locals():
                     job.processing_time_seconds = round(end_time - start_time, 2)
                 
-                db.session.commit()
-                progress_callback(100, f"A critical error occurred: {e}")
+                finish_job(job, 100, f"A critical error occurred: {e}")
+        finally:
+            cancellations.unregister(job_id)
+
+def run_stored_job(job_id):
+    """
+    Runs a job using the arguments stored on its Job row.
+    Used by processes that did not receive the original request (see worker.py).
+    """
+    with app.app_context():
+        job = Job.query.options(undefer(Job.options)).get(job_id)
+        if not job:
+            app.logger.error(f"Job {job_id} not found in database.")
+            return
+        url = job.video_url
+        options = job.options or {}
+
+    run_analysis_in_background(
+        job_id, run_analysis_for_url,
+        url, options.get('title'), options.get('language', 'en'),
+        options.get('template_content'), options.get('user_additional_prompt')
+    )
 
 
 @app.route('/')
@@ -221,36 +622,72 @@ def start_url_summary():
     # --- Quota Check ---
     # Moved after URL validation to avoid charging for invalid inputs
     user_id = session.get('user_id')
-    today = datetime.utcnow().date()
-    
+    principal = quota.principal_for(user_id, request.remote_addr)
+
     if user_id:
         user = User.query.get(user_id)
         if not user:
             return jsonify({"error": "User not found."}), 404
         user_limit = user.usage_limit
-        usage_count = Job.query.filter(Job.user_id == user_id, Job.status != 'error', db.func.date(Job.created_at) == today).count()
-        if usage_count >= user_limit:
-            return jsonify({"error": f"Daily usage limit of {user_limit} reached for logged-in users."}), 429
+        limit_error = f"Daily usage limit of {user_limit} reached for logged-in users."
     else:
         # Anonymous user: 1 time per day per IP
-        ip_address = request.remote_addr
-        usage_count = Job.query.filter(Job.ip_address == ip_address, Job.status != 'error', db.func.date(Job.created_at) == today).count()
-        if usage_count >= 1:
-            return jsonify({"error": "Daily usage limit of 1 reached for anonymous users."}), 429
+        user_limit = quota.ANONYMOUS_DAILY_LIMIT
+        limit_error = f"Daily usage limit of {user_limit} reached for anonymous users."
+    if quota.get_usage(principal) >= user_limit:
+        return jsonify({"error": limit_error}), 429
 
     # --- Get Template ---
     template_content = None
     if template_id:
-        template = Template.query.get(template_id)
+        template = Template.query.options(undefer(Template.content)).get(template_id)
         if template:
             template_content = template.content
         else:
             return jsonify({"error": "Template not found"}), 404
 
-    # --- Create Job in DB ---
-    video_info = get_video_info_from_url(url)
-    video_title = video_info.get("title") if video_info else "Unknown Video"
+    # --- Result Cache ---
+    video_id = extract_video_id(url)
+    cache_key = make_cache_key(video_id, language, template_content, user_additional_prompt, ANALYSIS_MODEL_NAME) if video_id else None
+    cached_result = result_cache.lookup(cache_key) if cache_key else None
+    if cached_result is not None:
+        cached_result["url"] = url
+        if not quota.try_consume(principal, user_limit):
+            db.session.rollback()
+            return jsonify({"error": limit_error}), 429
+        job_id = str(uuid.uuid4())
+        db.session.add(Job(
+            id=job_id,
+            status='success',
+            user_id=user_id,
+            ip_address=request.remote_addr if not user_id else None,
+            video_url=url,
+            video_id=video_id,
+            video_title=cached_result.get("title"),
+            result=cached_result,
+            cache_key=cache_key,
+            cache_hit=True,
+            progress_percentage=100,
+            progress_message="Loaded from cache.",
+            processing_time_seconds=0.0
+        ))
+        db.session.commit()
+        app.logger.info(f"Job {job_id} for URL {url} served from the result cache.")
+        return jsonify({"job_id": job_id, "queue_position": None, "cache_hit": True}), 202
 
+    # --- Admission Control ---
+    # Submissions that can join an in-flight identical job don't need a slot of their own.
+    joins_flight = cache_key is not None and single_flight.is_in_flight(cache_key)
+    if JOB_DISPATCH_MODE == 'inline' and not joins_flight and job_executor.is_full():
+        return queue_full_response()
+
+    # --- Create Job in DB ---
+    # The title is left empty and filled in by the pipeline once it has fetched the
+    # video's metadata, so submitting never waits on YouTube.
+    # The quota is charged in the same transaction that creates the job.
+    if not quota.try_consume(principal, user_limit):
+        db.session.rollback()
+        return jsonify({"error": limit_error}), 429
     job_id = str(uuid.uuid4())
     new_job = Job(
         id=job_id,
@@ -258,24 +695,68 @@ def start_url_summary():
         user_id=user_id,
         ip_address=request.remote_addr if not user_id else None,
         video_url=url,
-        video_title=video_title
+        video_id=video_id,
+        video_title=title,
+        cache_key=cache_key,
+        options={
+            "title": title,
+            "language": language,
+            "template_content": template_content,
+            "user_additional_prompt": user_additional_prompt
+        },
+        **inline_lease()
     )
     db.session.add(new_job)
     db.session.commit()
-    
-    app.logger.info(f"Starting background job {job_id} for URL: {url}")
-    # Pass arguments directly to the background function
-    thread = threading.Thread(
-        target=run_analysis_in_background,
-        args=(
+
+    # --- Single-Flight ---
+    leader_id = single_flight.join(cache_key, job_id) if cache_key else job_id
+    db.session.commit()
+    if leader_id != job_id:
+        # An identical analysis is already queued or running, in this or another process;
+        # follow it instead of starting another. Its progress reaches this job through
+        # the database, and finish_job() completes it.
+        leader_job = Job.query.get(leader_id)
+        if leader_job and leader_job.status == 'running':
+            new_job.status = 'running'
+            db.session.commit()
+        app.logger.info(f"Job {job_id} for URL {url} coalesced onto in-flight job {leader_id}.")
+        return jsonify({"job_id": job_id, "queue_position": None, "coalesced_with": leader_id}), 202
+
+    if JOB_DISPATCH_MODE == 'worker':
+        app.logger.info(f"Job {job_id} recorded for an analysis worker to claim.")
+        return jsonify({"job_id": job_id, "queue_position": None}), 202
+
+    schedule = schedule_for(new_job)
+    app.logger.info(f"Queueing background job {job_id} for URL: {url} (priority {schedule['priority']}, cost {schedule['cost']:.1f})")
+    try:
+        queue_position = job_executor.submit(
+            job_id, run_analysis_in_background,
             job_id, run_analysis_for_url,
-            url, title, language, template_content, user_additional_prompt
+            url, title, language, template_content, user_additional_prompt,
+            **schedule
         )
-    )
-    thread.start()
-    
+    except QueueFullError:
+        # Another request took the last slot; drop the job so it doesn't count against the quota.
+        follower_ids = single_flight.finish(cache_key, job_id) if cache_key else []
+        quota.refund_job(new_job)
+        db.session.delete(new_job)
+        for follower in (Job.query.filter(Job.id.in_(follower_ids)).all() if follower_ids else []):
+            follower.status = 'error'
+            follower.error_message = "The server was too busy to start this analysis."
+            quota.refund_job(follower)
+        db.session.commit()
+        for follower_id in follower_ids:
+            job_events.publish(follower_id, job_status_payload(Job.query.get(follower_id)), final=True)
+        return queue_full_response()
+    job_events.publish(job_id, job_status_payload(new_job))
+
     # Immediately return the job_id
-    return jsonify({"job_id": job_id}), 202
+    return jsonify({
+        "job_id": job_id,
+        "queue_position": queue_position,
+        "estimated_start_seconds": estimated_start_seconds(job_id)
+    }), 202
 
 # The /api/start-topic-search endpoint has been removed as its implementation was incomplete in the source.
 
@@ -284,27 +765,165 @@ def get_job_result(job_id):
     """
     Pollable endpoint for the frontend to get the status and result of a job.
     """
-    job = Job.query.get(job_id)
+    job = Job.query.options(undefer_group('outcome')).get(job_id)
     
     if not job:
         return jsonify({"status": "not_found"}), 404
-    
-    if job.status == 'success':
-        result_data = job.result or {}
-        formatted_result = {
-            "title": result_data.get("title"),
-            "url": result_data.get("url"),
-            "summary": result_data.get("summary"),
-            "full_transcript": result_data.get("full_transcript")
-        }
-        return jsonify({"status": "success", "data": formatted_result})
+
+    if job.status in FINAL_JOB_STATUSES:
+        # A finished job doesn't change any more, so repeat reads are answered from
+        # its timestamp without resolving or serializing the result.
+        etag = make_etag(job.id, job.status, job.updated_at)
+        return conditional_json(etag, lambda: job_status_payload(job), IMMUTABLE_CACHE_CONTROL)
+    payload = job_status_payload(job)
+    return conditional_json(make_etag(json.dumps(payload, sort_keys=True)), lambda: payload)
+
+def can_manage_job(job):
+    """Jobs belong to the user who started them, or to the IP address for anonymous jobs."""
+    if job.user_id:
+        return job.user_id == session.get('user_id') or is_admin_session()
+    return job.ip_address == request.remote_addr or is_admin_session()
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """
+    Cancels a queued or running job and refunds its quota. Unless coalesced jobs are
+    still waiting on the same analysis, the analysis is stopped too: a queued job
+    leaves the queue, a running one has its downloads, transcription and Gemini
+    calls aborted. Jobs running in another process stop within CANCELLATION_POLL_INTERVAL.
+    """
+    job = Job.query.get(job_id)
+    if not job:
+        return jsonify({"status": "not_found"}), 404
+    if not can_manage_job(job):
+        return jsonify({"error": "You can only cancel your own jobs."}), 403
+
+    # Conditional, so a job that finishes at the same moment isn't overwritten.
+    processing_time = round((datetime.utcnow() - job.created_at).total_seconds(), 2)
+    cancelled = Job.query.filter(Job.id == job_id, Job.status.notin_(FINAL_JOB_STATUSES)).update({
+        "status": "cancelled",
+        "progress_message": "Cancelled by user.",
+        "processing_time_seconds": processing_time
+    }, synchronize_session=False)
+    if not cancelled:
+        db.session.rollback()
+        return jsonify({"error": "This job has already finished."}), 409
+    quota.refund_job(job)
+    progress_sink.finish(job_id)
+    db.session.commit()
+    db.session.refresh(job)
+    job_events.publish(job_id, job_status_payload(job), final=True)
+    app.logger.info(f"Job {job_id} cancelled.")
+
+    if job.coalesced_with:
+        # A follower just stops waiting; the leader may now have nobody left to work for.
+        job_id = job.coalesced_with
+    if abandoned_job_ids([job_id]):
+        if job_executor.cancel(job_id):
+            single_flight.finish(job.cache_key, job_id)
+            db.session.commit()
+            app.logger.info(f"Removed cancelled job {job_id} from the queue.")
+        else:
+            cancellations.cancel(job_id)
+    return jsonify(job_status_payload(job))
+
+def send_job_text(job_id, field, path_key, download_name):
+    """
+    Streams one text of a finished job, with Range and conditional request support.
+    Reads the file the pipeline wrote under output/jobs, falling back to the
+    artifact store once that has been cleaned up, and to the inline text for
+    jobs stored before the artifact store existed.
+    """
+    job = Job.query.options(undefer(Job.result)).get(job_id)
+    if not job:
+        return jsonify({"status": "not_found"}), 404
+    if job.status != 'success' or not job.result:
+        return jsonify({"error": "This job has no result"}), 404
+
+    result = job.result
+    as_attachment = request.args.get('download') == '1'
+    path = result.get(path_key)
+    if path and Path(path).resolve().is_relative_to(BASE_OUTPUT_DIR.resolve()) and os.path.isfile(path):
+        response = send_file(path, mimetype='text/plain', as_attachment=as_attachment,
+                             download_name=download_name, conditional=True, etag=True)
+        janitor.mark_accessed(job_id)
+    else:
+        ref = result.get(field + ARTIFACT_KEY_SUFFIX)
+        if ref and ARTIFACT_STORE.exists(ref["sha256"]):
+            body, size, etag = ARTIFACT_STORE.iter_bytes(ref["sha256"]), ref["size"], ref["sha256"]
+        elif result.get(field) is not None:
+            body = result[field].encode('utf-8')
+            size, etag = len(body), make_etag(job_id, field, job.updated_at)
+        else:
+            return jsonify({"error": "This job's files are no longer available"}), 404
+        response = Response(body, mimetype='text/plain', direct_passthrough=True)
+        response.headers['Content-Disposition'] = f"{'attachment' if as_attachment else 'inline'}; filename=\"{download_name}\""
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.content_length = size
+        response.set_etag(etag)
+        response.make_conditional(request, accept_ranges=True, complete_length=size)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+@app.route('/api/jobs/<job_id>/transcript')
+def download_job_transcript(job_id):
+    return send_job_text(job_id, 'full_transcript', 'transcript_path', f"{job_id}_transcript.txt")
+
+@app.route('/api/jobs/<job_id>/summary')
+def download_job_summary(job_id):
+    return send_job_text(job_id, 'summary', 'final_content_path', f"{job_id}_summary.txt")
+
+def format_sse(payload, event='progress', event_id=None):
+    """Serializes one Server-Sent Event."""
+    message = f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    if event_id is not None:
+        message = f"id: {event_id}\n" + message
+    return message
+
+@app.route('/api/jobs/<job_id>/events')
+def stream_job_events(job_id):
+    """
+    Server-Sent Events of a job's progress, served as short polls so that watchers
+    don't each hold a server thread. Each response sends the job's state if it
+    changed since the event the client saw last (EventSource sends its id back as
+    Last-Event-ID), waits at most SSE_WAIT_SECONDS for a change of a job running in
+    this process, and then ends; EventSource reconnects after SSE_RETRY_MS.
+    Event ids are digests of the payload, so they stay valid whichever process
+    the reconnect reaches.
+    """
+    job = Job.query.options(undefer_group('outcome')).get(job_id)
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor')
+    if not job:
+        if cursor:
+            # Deleted while watched, e.g. through the admin: EventSource gives up on a 404
+            # without telling the page, so end the watch with a final event instead.
+            return Response(format_sse({"status": "not_found"}, 'result'), mimetype='text/event-stream')
+        return jsonify({"status": "not_found"}), 404
+
+    latest = job_events.latest(job_id)
+    if latest is None:
+        # Runs in another process (or hasn't published here yet), so its row is the source.
+        version, payload, final = None, job_status_payload(job), job.status in FINAL_JOB_STATUSES
     else:
-        return jsonify({
-            "status": job.status,
-            "message": job.error_message,
-            "progress_percentage": job.progress_percentage,
-            "progress_message": job.progress_message
-        })
+        version, payload, final = latest
+    db.session.remove()  # Nothing below needs the database; give the connection back before waiting.
+
+    def event(payload, final):
+        return format_sse(payload, 'result' if final else 'progress', make_etag(json.dumps(payload, sort_keys=True)))
+
+    def generate():
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        if cursor != make_etag(json.dumps(payload, sort_keys=True)):
+            yield event(payload, final)
+        elif version is not None and not final:
+            update = job_events.wait_for_update(job_id, version, timeout=SSE_WAIT_SECONDS)
+            if update is not None:
+                yield event(update[1], update[2])
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no' # Stop reverse proxies from buffering the stream
+    })
 
 # --- Template Management API ---
 @app.route('/api/templates', methods=['POST'])
@@ -338,7 +957,7 @@ def get_templates():
     if not user_id:
         return jsonify([]), 200 # Return empty list if not logged in
 
-    templates = Template.query.filter_by(user_id=user_id).order_by(Template.updated_at.desc()).all()
+    templates = Template.query.options(undefer(Template.content)).filter_by(user_id=user_id).order_by(Template.updated_at.desc()).all()
     return jsonify([{
         "id": t.id,
         "name": t.name,
@@ -448,9 +1067,7 @@ def get_session():
         session.clear() # Clear the invalid session
         return jsonify({"logged_in": False}), 404
 
-    today = datetime.utcnow().date()
-    usage_count = Job.query.filter(Job.user_id == user_id, db.func.date(Job.created_at) == today).count()
-    quota = user.usage_limit
+    usage_count = quota.get_usage(quota.principal_for(user_id, None))
     return jsonify({
         "logged_in": True,
         "user": {
@@ -460,7 +1077,7 @@ def get_session():
         },
         "usage": {
             "used": usage_count,
-            "quota": quota
+            "quota": user.usage_limit
         }
     })
 
@@ -470,17 +1087,100 @@ def get_history():
     if not user_id:
         return jsonify({"error": "User not logged in"}), 401
 
-    jobs = Job.query.filter_by(user_id=user_id).order_by(Job.created_at.desc()).all()
-    
-    return jsonify([{
-        "job_id": job.id,
-        "video_title": job.video_title,
-        "video_url": job.video_url,
-        "status": job.status,
-        "created_at": job.created_at.isoformat(),
-        "summary": job.result.get('summary') if job.status == 'success' and job.result else None,
-        "full_transcript": job.result.get('full_transcript') if job.status == 'success' and job.result else None
-    } for job in jobs])
+    try:
+        limit = int(request.args.get('limit', history.DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    try:
+        page = history.list_history(user_id, limit=limit, cursor=request.args.get('cursor'))
+    except history.InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
+    return conditional_json(make_etag(json.dumps(page, sort_keys=True)), lambda: page)
+
+def get_history_field(job_id, field):
+    """Returns one field of a history item's result for the logged-in owner."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "User not logged in"}), 401
+
+    found, value = history.get_result_field(job_id, user_id, field)
+    if not found:
+        return jsonify({"error": "Job not found"}), 404
+    if value is None:
+        return jsonify({"error": "This job has no result"}), 404
+    # Results of finished jobs are never rewritten.
+    return conditional_json(make_etag(job_id, field, value), lambda: {"job_id": job_id, field: value},
+                            IMMUTABLE_CACHE_CONTROL)
+
+@app.route('/api/history/<job_id>/summary')
+def get_history_summary(job_id):
+    return get_history_field(job_id, 'summary')
+
+@app.route('/api/history/<job_id>/transcript')
+def get_history_transcript(job_id):
+    return get_history_field(job_id, 'full_transcript')
+
+# --- Metrics ---
+job_state_collector = metrics.JobStateCollector(app, job_executor, single_flight, progress_sink)
+
+@app.route('/metrics')
+@limiter.exempt # Scraped every few seconds
+def get_metrics():
+    """Prometheus metrics. Requires `Authorization: Bearer <METRICS_TOKEN>` if METRICS_TOKEN is set."""
+    token = os.environ.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return jsonify({"error": "Forbidden"}), 403
+    body, content_type = metrics.render([job_state_collector])
+    return Response(body, content_type=content_type)
+
+# --- Admin Cache API ---
+@app.route('/api/admin/cache/stats')
+def get_cache_stats():
+    if not is_admin_session():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(result_cache.stats())
+
+@app.route('/api/admin/cache', methods=['DELETE'])
+def invalidate_cache():
+    """
+    Drops cached results for ?video_id=..., or the whole cache if no video is given.
+    With ?transcripts=1 the cached transcripts go too, so the next job downloads them again.
+    """
+    if not is_admin_session():
+        return jsonify({"error": "Forbidden"}), 403
+    video_id = request.args.get('video_id')
+    removed = result_cache.invalidate(video_id)
+    response = {"removed": removed}
+    if request.args.get('transcripts') == '1':
+        response["transcripts_removed"] = TRANSCRIPT_CACHE.invalidate(video_id)
+    return jsonify(response)
+
+@app.cli.command('externalize-results')
+def externalize_results_command():
+    """Moves summaries and transcripts stored inline in old Job and result cache rows into the artifact store."""
+    moved = 0
+    for model in (Job, ResultCacheEntry):
+        has_inline_text = db.or_(*(model.result[field].as_string().isnot(None) for field in TEXT_FIELDS))
+        while True:
+            rows = model.query.options(undefer(model.result)).filter(has_inline_text).limit(100).all()
+            if not rows:
+                break
+            for row in rows:
+                row.result = ARTIFACT_STORE.externalize_result(row.result)
+            db.session.commit()
+            moved += len(rows)
+    click.echo(f"Moved the results of {moved} row(s) to {ARTIFACT_STORE.root}.")
+
+@app.cli.command('sweep-outputs')
+def sweep_outputs_command():
+    """Runs one output janitor sweep now and prints what it reclaimed."""
+    report = janitor.sweep()
+    if report is None:
+        click.echo("Another process is sweeping the output directory; try again shortly.", err=True)
+        return
+    for key, value in report.items():
+        click.echo(f"{key}: {value}")
 
 # --- Feedback API ---
 @app.route('/api/feedback', methods=['POST'])
@@ -0,0 +1,136 @@
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Characters of each text artifact kept next to its hash, for listings that don't need the full text.
+PREVIEW_CHARS = 300
+# Job.result keys holding an artifact reference are the inline key plus this suffix,
+# e.g. "summary" -> "summary_artifact".
+ARTIFACT_KEY_SUFFIX = '_artifact'
+# Text fields of an analysis result that are moved out of the database.
+TEXT_FIELDS = ('summary', 'full_transcript')
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ArtifactStore:
+    """
+    Content-addressed, gzip-compressed blob store on the local filesystem.
+
+    Each blob is stored once under <root>/<aa>/<bb>/<sha256>.gz, where aa and bb
+    are the first two byte pairs of its SHA-256, so identical transcripts shared
+    by several jobs take up space only once. Blobs are written to a temporary
+    file and renamed into place, so readers never see a partial blob.
+    """
+
+    def __init__(self, root: str | os.PathLike):
+        self.root = Path(root)
+
+    def path_for(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4] / f"{sha256}.gz"
+
+    def exists(self, sha256: str) -> bool:
+        return self.path_for(sha256).is_file()
+
+    def _write(self, sha256: str, chunks) -> bool:
+        """Stores the blob for sha256 from an iterable of byte chunks. Returns False if it was already there."""
+        path = self.path_for(sha256)
+        if path.is_file():
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as gz:
+                for chunk in chunks:
+                    gz.write(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return True
+
+    def put_bytes(self, data: bytes) -> dict:
+        """Stores data and returns its reference: {"sha256", "size"}."""
+        sha256 = hashlib.sha256(data).hexdigest()
+        self._write(sha256, [data])
+        return {"sha256": sha256, "size": len(data)}
+
+    def put_text(self, text: str) -> dict:
+        """Stores UTF-8 text and returns its reference: {"sha256", "size", "preview"}."""
+        ref = self.put_bytes(text.encode('utf-8'))
+        ref["preview"] = text[:PREVIEW_CHARS]
+        return ref
+
+    def put_file(self, path: str | os.PathLike) -> dict:
+        """Stores a file's contents without reading it into memory at once. Returns {"sha256", "size"}."""
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        if not self.exists(sha256):
+            with open(path, 'rb') as f:
+                self._write(sha256, iter(lambda: f.read(CHUNK_SIZE), b''))
+        return {"sha256": sha256, "size": size}
+
+    def open(self, sha256: str, mode: str = 'rb'):
+        """Opens a stored blob for streaming, decompressing on the fly. Use mode='rt' for text."""
+        if mode == 'rt':
+            return gzip.open(self.path_for(sha256), mode, encoding='utf-8')
+        return gzip.open(self.path_for(sha256), mode)
+
+    def iter_bytes(self, sha256: str, chunk_size: int = CHUNK_SIZE):
+        """Yields a stored blob in decompressed chunks."""
+        with self.open(sha256) as f:
+            yield from iter(lambda: f.read(chunk_size), b'')
+
+    def read_text(self, sha256: str) -> str:
+        with self.open(sha256, 'rt') as f:
+            return f.read()
+
+    def externalize_result(self, result: dict, files: dict | None = None) -> dict:
+        """
+        Returns a copy of an analysis result with its TEXT_FIELDS moved into the store,
+        leaving "<field>_artifact" references in their place. files maps further
+        artifact names to paths on disk (e.g. {"vtt": ...}) to store alongside.
+        """
+        compact = dict(result)
+        for field in TEXT_FIELDS:
+            text = compact.pop(field, None)
+            if text is not None:
+                compact[field + ARTIFACT_KEY_SUFFIX] = self.put_text(text)
+        for name, path in (files or {}).items():
+            if path and os.path.isfile(path):
+                compact[name + ARTIFACT_KEY_SUFFIX] = self.put_file(path)
+        return compact
+
+    def resolve_text(self, result: dict | None, field: str) -> str | None:
+        """
+        Returns a text field of an analysis result, reading it from the store if the
+        result holds a reference. Results written before the store existed keep the
+        text inline and are returned as they are.
+        """
+        if not result:
+            return None
+        if result.get(field) is not None:
+            return result[field]
+        ref = result.get(field + ARTIFACT_KEY_SUFFIX)
+        if not ref:
+            return None
+        try:
+            return self.read_text(ref["sha256"])
+        except FileNotFoundError:
+            logger.error(f"Artifact {ref['sha256']} for '{field}' is missing from {self.root}")
+            return None
+
+
+# The store used by the app and the pipeline. It lives next to the database so that
+# it is covered by the same volume.
+ARTIFACT_STORE = ArtifactStore(os.environ.get('ARTIFACT_STORE_DIR', Path(__file__).parent / 'data' / 'artifacts'))
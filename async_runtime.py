@@ -0,0 +1,113 @@
+"""
+One long-lived asyncio event loop per process, running on a daemon thread.
+
+Analyses used to call asyncio.run() on their job thread, so every job created
+and tore down an event loop, and with it every async client, gRPC channel and
+connection opened on that loop. Jobs now submit their coroutine to this loop
+and wait for the result, so they share those clients, and semaphores from
+loop_semaphore() limit concurrency across all jobs of the process.
+
+The jobs' blocking stages also share the loop's default executor: downloads that
+take minutes as well as short file and database hops. size_for_jobs() makes it
+big enough for all of them, so short hops never queue behind other jobs' downloads.
+"""
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Blocking calls a running job may have in flight at once: a download (two while
+# racing subtitles against audio) plus a short file or database hop.
+THREADS_PER_JOB = 3
+
+
+class AsyncRuntime:
+    """An event loop on a background thread, started on first use (and again after a fork)."""
+
+    def __init__(self, name: str = 'async-runtime'):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self.max_threads = None  # Default of ThreadPoolExecutor until size_for_jobs() is called
+
+    def size_for_jobs(self, job_concurrency: int):
+        """Sizes the default executor for job_concurrency jobs running at once."""
+        with self._lock:
+            self.max_threads = job_concurrency * THREADS_PER_JOB + 4
+            if self._loop is not None and self._pid == os.getpid():
+                self._loop.call_soon_threadsafe(self._loop.set_default_executor, self._make_executor())
+
+    def _make_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix=f"{self.name}-io")
+
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Returns the running loop, starting it if needed."""
+        with self._lock:
+            # A forked child inherits the loop object but not the thread running it.
+            if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._start()
+            return self._loop
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(self._make_executor())
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(started.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+        self._thread.start()
+        started.wait()
+        self._loop, self._pid = loop, os.getpid()
+        logger.info(f"Started the {self.name} event loop.")
+
+    def submit(self, coro):
+        """Schedules a coroutine on the loop from any other thread. Returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop())
+
+    def run(self, coro, timeout: float | None = None):
+        """Runs a coroutine on the loop and blocks the calling thread until it returns, like asyncio.run."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # E.g. a timeout: don't leave the coroutine running on its own.
+            future.cancel()
+            raise
+
+    def stop(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None and thread.is_alive():
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(5)
+
+
+RUNTIME = AsyncRuntime()
+
+_semaphores_lock = threading.Lock()
+_semaphores = weakref.WeakKeyDictionary()  # loop -> {name: asyncio.Semaphore}
+
+
+def loop_semaphore(name: str, limit: int) -> asyncio.Semaphore:
+    """
+    Returns the semaphore called name for the running loop, creating it with limit
+    slots. On RUNTIME's loop it is shared by every job of the process; code run with
+    asyncio.run (scripts, tests) gets one of its own, as semaphores are bound to a loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _semaphores_lock:
+        semaphores = _semaphores.setdefault(loop, {})
+        if name not in semaphores:
+            semaphores[name] = asyncio.Semaphore(limit)
+        return semaphores[name]
@@ -0,0 +1,157 @@
+"""
+Measures how SQLite copes with many analysis threads committing progress at once.
+
+Each process stands in for a gunicorn worker: its writer threads repeatedly
+commit progress updates to their own Job row (like the progress sink does) while
+its reader threads poll job rows (like the status and history endpoints). The
+benchmark runs once with SQLAlchemy's default SQLite settings and once with the
+settings from db_config.py, each on a fresh database file, and reports
+commits/sec, commit latency percentiles and "database is locked" errors.
+
+Usage:
+    python benchmarks/sqlite_contention.py --processes 4 --threads 4 --commits 200
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+
+def job_table():
+    from models import Job
+    return Job.__table__
+
+
+def make_engine(mode, db_path, pool_size):
+    uri = f"sqlite:///{db_path}"
+    if mode == 'tuned':
+        import db_config
+        engine = create_engine(uri, **db_config.engine_options(uri, pool_size))
+        db_config.attach_sqlite_pragmas(engine)
+        return engine
+    return create_engine(uri)
+
+
+def setup_database(mode, db_path, job_ids):
+    engine = make_engine(mode, db_path, 1)
+    table = job_table()
+    table.metadata.create_all(engine, tables=[table])
+    with engine.begin() as conn:
+        conn.execute(insert(table), [{"id": job_id, "status": "running", "created_at": datetime.utcnow()}
+                                     for job_id in job_ids])
+    engine.dispose()
+
+
+def run_process(mode, db_path, job_ids, readers, commits, results):
+    table = job_table()
+    engine = make_engine(mode, db_path, len(job_ids) + readers)
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    stop_reading = threading.Event()
+
+    def write(job_id):
+        nonlocal errors
+        for i in range(commits):
+            started = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    conn.execute(update(table).where(table.c.id == job_id).values(
+                        progress_percentage=i % 100, progress_message=f"step {i}", updated_at=datetime.utcnow()))
+            except OperationalError:
+                with lock:
+                    errors += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    def read():
+        nonlocal errors
+        while not stop_reading.is_set():
+            try:
+                with engine.connect() as conn:
+                    conn.execute(select(table.c.id, table.c.status, table.c.progress_percentage)).all()
+            except OperationalError:
+                with lock:
+                    errors += 1
+
+    writers = [threading.Thread(target=write, args=(job_id,)) for job_id in job_ids]
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    for thread in reader_threads + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop_reading.set()
+    for thread in reader_threads:
+        thread.join()
+    engine.dispose()
+    results.put((latencies, errors))
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_mode(mode, args):
+    ctx = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        job_ids = [[str(uuid.uuid4()) for _ in range(args.threads)] for _ in range(args.processes)]
+        setup_database(mode, db_path, [job_id for ids in job_ids for job_id in ids])
+
+        results = ctx.Queue()
+        processes = [ctx.Process(target=run_process, args=(mode, db_path, ids, args.readers, args.commits, results))
+                     for ids in job_ids]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - started
+        for process in processes:
+            process.join()
+
+    latencies = [latency for process_latencies, _ in outcomes for latency in process_latencies]
+    errors = sum(process_errors for _, process_errors in outcomes)
+    return {
+        "mode": mode,
+        "commits": len(latencies),
+        "errors": errors,
+        "commits_per_sec": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=float('nan')) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4, help="Processes, like gunicorn workers.")
+    parser.add_argument('--threads', type=int, default=4, help="Writer threads (analysis jobs) per process.")
+    parser.add_argument('--readers', type=int, default=2, help="Polling reader threads per process.")
+    parser.add_argument('--commits', type=int, default=200, help="Progress commits per writer thread.")
+    parser.add_argument('--modes', nargs='+', default=['default', 'tuned'], choices=['default', 'tuned'])
+    args = parser.parse_args()
+
+    print(f"{args.processes} processes x {args.threads} writers + {args.readers} readers, "
+          f"{args.commits} commits per writer")
+    print(f"{'mode':<8} {'commits':>8} {'errors':>7} {'commits/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode in args.modes:
+        r = run_mode(mode, args)
+        print(f"{r['mode']:<8} {r['commits']:>8} {r['errors']:>7} {r['commits_per_sec']:>10.1f} "
+              f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['max_ms']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
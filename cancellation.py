@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside the pipeline once its job has been cancelled."""
+
+
+_thread_tokens = threading.local()
+
+
+def current_token():
+    """Returns the token attached to the calling thread, if any."""
+    return getattr(_thread_tokens, 'token', None)
+
+
+class CancellationToken:
+    """
+    Cancellation state of one running analysis.
+
+    The pipeline checks the token between stages. Cancelling it also kills the
+    subprocesses (aria2c, ffmpeg) started from the thread it is attached to and
+    cancels the asyncio task it is attached to, so a job stuck in a long download
+    or a Gemini call stops right away instead of at the next stage.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._processes = []
+        self._task = None
+        self._loop = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise JobCancelled()
+
+    def attach(self):
+        """
+        Attaches the token to the calling coroutine's task or, outside of a
+        coroutine, to the calling thread, whose subprocesses are tracked from now
+        on. An event loop thread is shared by many jobs, so a coroutine runs its
+        blocking stages on worker threads, each bound with bound_to_thread().
+        """
+        try:
+            task, loop = asyncio.current_task(), asyncio.get_running_loop()
+        except RuntimeError:
+            task = loop = None
+            _thread_tokens.token = self
+        with self._lock:
+            self._task, self._loop = task, loop
+
+    @contextmanager
+    def bound_to_thread(self):
+        """
+        Attaches the token to the calling thread only, for the duration of a blocking
+        stage that its coroutine runs on a worker thread. Subprocesses started there
+        are killed on cancellation; the coroutine's task stays attached.
+        """
+        previous = current_token()
+        _thread_tokens.token = self
+        try:
+            yield self
+        finally:
+            _thread_tokens.token = previous
+
+    def detach(self):
+        if current_token() is self:
+            _thread_tokens.token = None
+        with self._lock:
+            self._task = self._loop = None
+            self._processes.clear()
+
+    def add_process(self, process):
+        with self._lock:
+            self._processes.append(process)
+        if self.cancelled:
+            _kill(process)
+
+    def cancel(self):
+        """Cancels the analysis. Safe to call from any thread and more than once."""
+        self._event.set()
+        with self._lock:
+            processes = list(self._processes)
+            task, loop = self._task, self._loop
+        for process in processes:
+            _kill(process)
+        if task is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
+
+
+def _kill(process):
+    if process.poll() is None:
+        try:
+            process.kill()
+            logger.info(f"Killed subprocess {process.pid} of a cancelled job.")
+        except OSError:
+            pass
+
+
+_tracking_lock = threading.Lock()
+_tracking_installed = False
+
+
+def install_subprocess_tracking():
+    """
+    Makes subprocesses started by yt-dlp killable on cancellation.
+
+    yt-dlp runs aria2c and ffmpeg through yt_dlp.utils.Popen in the calling thread
+    and blocks on them. Its constructor is wrapped so that every process started
+    while a token is attached to the thread is registered with that token. When
+    the process is killed, yt-dlp sees a failed download and raises, which unwinds
+    the pipeline.
+    """
+    global _tracking_installed
+    with _tracking_lock:
+        if _tracking_installed:
+            return
+        from yt_dlp.utils import Popen
+        original_init = Popen.__init__
+
+        def __init__(self, *args, **kwargs):
+            original_init(self, *args, **kwargs)
+            token = current_token()
+            if token is not None:
+                token.add_process(self)
+
+        Popen.__init__ = __init__
+        _tracking_installed = True
+
+
+class CancellationRegistry:
+    """
+    Tokens of the analyses running in this process, keyed by job_id.
+
+    Cancellations requested through another process (another gunicorn worker or
+    the web tier when this is an analysis worker) are found by a watcher thread
+    that calls find_cancelled(job_ids) every poll_interval seconds while
+    anything is registered. The thread is started lazily on the first registration.
+    """
+
+    def __init__(self, find_cancelled=None, poll_interval: float = 5.0):
+        self.find_cancelled = find_cancelled
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._watcher = None
+
+    def register(self, job_id: str) -> CancellationToken:
+        with self._lock:
+            token = self._tokens.setdefault(job_id, CancellationToken())
+            if self.find_cancelled and (self._watcher is None or not self._watcher.is_alive()):
+                self._watcher = threading.Thread(target=self._watch_loop, name="cancellation-watcher", daemon=True)
+                self._watcher.start()
+            return token
+
+    def unregister(self, job_id: str):
+        with self._lock:
+            self._tokens.pop(job_id, None)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels job_id if it is running in this process. Returns whether it was."""
+        with self._lock:
+            token = self._tokens.get(job_id)
+        if token is None:
+            return False
+        logger.info(f"Cancelling job {job_id}.")
+        token.cancel()
+        return True
+
+    def running(self) -> list[str]:
+        with self._lock:
+            return list(self._tokens)
+
+    def _watch_loop(self):
+        while True:
+            time.sleep(self.poll_interval)
+            job_ids = self.running()
+            if not job_ids:
+                with self._lock:
+                    if not self._tokens:
+                        self._watcher = None
+                        return
+                continue
+            try:
+                for job_id in self.find_cancelled(job_ids):
+                    self.cancel(job_id)
+            except Exception:
+                logger.exception("Failed to check for cancelled jobs")
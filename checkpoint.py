@@ -0,0 +1,75 @@
+"""
+Durable record of the pipeline stages a job has completed.
+
+run_analysis_for_url saves a checkpoint after each stage, both to checkpoint.json
+in the job's output directory and, through its checkpoint_callback, to
+Job.checkpoint. When an interrupted job runs again it skips every stage whose
+outputs are still on disk, so a restarted worker redoes seconds of work instead
+of the whole download and transcription.
+"""
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE_NAME = 'checkpoint.json'
+
+
+class Checkpoint:
+    """
+    The stages completed by one job, as {stage: {...outputs}}.
+
+    Outputs whose key ends in '_path' are files the stage produced. A stage only
+    counts as done if all of them still exist, so a checkpoint whose files were
+    cleaned up (or that was recorded on another node) just runs the stage again.
+    """
+
+    def __init__(self, directory: Path | None = None, stages: dict | None = None, on_save=None):
+        self.directory = Path(directory) if directory else None
+        self.stages = dict(stages or {})
+        self.on_save = on_save
+
+    @classmethod
+    def load(cls, directory: Path, fallback: dict | None = None, on_save=None) -> 'Checkpoint':
+        """Reads directory/checkpoint.json, falling back to a copy from the database."""
+        stages = fallback
+        path = Path(directory) / CHECKPOINT_FILE_NAME
+        try:
+            with open(path, encoding='utf-8') as f:
+                stages = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+        return cls(directory, stages, on_save)
+
+    def get(self, stage: str) -> dict | None:
+        """Returns the outputs of a completed stage, or None if it has to run (again)."""
+        outputs = self.stages.get(stage)
+        if outputs is None:
+            return None
+        for key, value in outputs.items():
+            if key.endswith('_path') and value and not os.path.isfile(value):
+                logger.info(f"Checkpoint of stage '{stage}' is stale: {value} is gone.")
+                return None
+        return outputs
+
+    def completed(self) -> list[str]:
+        return [stage for stage in self.stages if self.get(stage) is not None]
+
+    def save(self, stage: str, **outputs):
+        """Records a completed stage. The file is replaced atomically."""
+        self.stages[stage] = dict(outputs, completed_at=datetime.utcnow().isoformat())
+        if self.directory:
+            path = self.directory / CHECKPOINT_FILE_NAME
+            tmp_path = path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.stages, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        if self.on_save:
+            self.on_save(dict(self.stages))
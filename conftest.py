@@ -0,0 +1,25 @@
+import pytest
+from flask import Flask
+from models import db
+
+
+@pytest.fixture
+def app():
+    """A bare Flask app on an in-memory database with every table created."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def app_ctx(app):
+    """Runs the test inside an app context of the app fixture."""
+    with app.app_context():
+        yield app
+        db.session.remove()
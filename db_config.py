@@ -0,0 +1,61 @@
+import os
+import sqlite3
+from sqlalchemy import event
+
+# How long a connection waits for another one's write lock before failing with
+# "database is locked".
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 15000))
+
+# Applied to every new connection of the app's engine. WAL lets readers (polling, history,
+# event streams) proceed while a job commits, and synchronous=NORMAL only syncs
+# at checkpoints, which is safe in WAL mode and makes each commit much cheaper.
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', SQLITE_BUSY_TIMEOUT_MS),
+)
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def attach_sqlite_pragmas(engine):
+    """Applies SQLITE_PRAGMAS to every new connection of engine, and of no other engine."""
+    if not event.contains(engine, 'connect', apply_sqlite_pragmas):
+        event.listen(engine, 'connect', apply_sqlite_pragmas)
+
+
+def engine_options(uri: str, pool_size: int) -> dict:
+    """
+    Returns the SQLAlchemy engine options for uri with room for pool_size
+    concurrent sessions, so request threads and analysis threads don't queue
+    for a connection behind each other.
+    """
+    if ':memory:' in uri or uri in ('sqlite://', 'sqlite:///'):
+        # In-memory databases live and die with their single connection.
+        return {}
+    return {
+        'pool_size': pool_size,
+        'max_overflow': pool_size,
+        # Connections are handed from one thread to the next by the pool.
+        'connect_args': {'check_same_thread': False, 'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000},
+    }
+
+
+def configure_database(app, db, path, pool_size: int):
+    """
+    Points app at the SQLite file at path, sizes the connection pool for pool_size
+    concurrent sessions, initializes db for app and tunes its engine's connections.
+    """
+    uri = 'sqlite:///' + str(path)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri, pool_size)
+    db.init_app(app)
+    with app.app_context():
+        attach_sqlite_pragmas(db.engine)
@@ -3,11 +3,24 @@
 # Exit immediately if a command exits with a non-zero status.
 set -e
 
+if [ "$1" = "worker" ]; then
+    shift
+    echo "==> Starting analysis worker..."
+    # Migrations are applied by the web container; workers only need the schema to exist.
+    exec python worker.py "$@"
+fi
+
 echo "==> Running database migrations..."
 # This command creates the database tables if they don't exist
 # and applies any subsequent migrations.
 flask db upgrade
 
+# Gunicorn workers write their metrics here so /metrics can sum them; start from a clean slate.
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 echo "==> Starting Gunicorn server..."
 # Now, execute the main command (start the web server)
-exec gunicorn --workers 4 --worker-class gthread --timeout 360 --bind 0.0.0.0:5000 "app:app"
\ No newline at end of file
+# Each open job progress stream holds a thread, so give every worker a pool of them.
+exec gunicorn --config gunicorn.conf.py --workers 4 --worker-class gthread --threads "${GUNICORN_THREADS:-16}" --timeout 360 --bind 0.0.0.0:5000 "app:app"
\ No newline at end of file
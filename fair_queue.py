@@ -0,0 +1,100 @@
+from collections import OrderedDict, deque
+
+
+class FairShareQueue:
+    """
+    A queue that shares turns fairly between principals, within strict priority classes.
+
+    Items in a lower priority class always run before those in a higher one. Within
+    a class, principals with waiting items take turns in round-robin order (deficit
+    round-robin): each turn adds `quantum` to the principal's credit, and it may
+    dequeue items while the credit covers their cost. A principal who queued many
+    or expensive items can therefore only delay another principal's item by about
+    one quantum per turn. Items of a single principal come out in FIFO order.
+
+    Not thread-safe; JobExecutor guards it with its own lock.
+    """
+
+    def __init__(self, quantum: float = 10.0):
+        if quantum <= 0:
+            raise ValueError("quantum must be positive.")
+        self.quantum = quantum
+        self._classes = {}  # priority -> OrderedDict(principal -> deque of keys), in turn order
+        self._entries = {}  # key -> (priority, principal, cost, item)
+        self._credits = {}  # (priority, principal) -> unspent credit
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def push(self, key, item, principal=None, priority: int = 0, cost: float = 1.0):
+        if key in self._entries:
+            raise ValueError(f"{key} is already queued.")
+        self._entries[key] = (priority, principal, max(cost, 0.0), item)
+        self._classes.setdefault(priority, OrderedDict()).setdefault(principal, deque()).append(key)
+
+    def pop(self):
+        """Removes and returns (key, item) of the next item to run. Raises IndexError if empty."""
+        key = self._next(self._classes, self._credits)
+        return key, self._entries.pop(key)[3]
+
+    def remove(self, key):
+        """Removes a waiting item. Returns it, or None if key is not queued."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        priority, principal, _, item = entry
+        ring = self._classes[priority]
+        ring[principal].remove(key)
+        if not ring[principal]:
+            del ring[principal]
+            self._credits.pop((priority, principal), None)
+            if not ring:
+                del self._classes[priority]
+        return item
+
+    def entry(self, key) -> tuple:
+        """Returns (priority, principal, cost) of a waiting item."""
+        priority, principal, cost, _ = self._entries[key]
+        return priority, principal, cost
+
+    def order(self) -> list:
+        """Returns the waiting keys in the order they will be popped if nothing else is pushed."""
+        classes = {priority: OrderedDict((principal, deque(keys)) for principal, keys in ring.items())
+                   for priority, ring in self._classes.items()}
+        credits = dict(self._credits)
+        return [self._next(classes, credits) for _ in range(len(self._entries))]
+
+    def clear(self):
+        self._classes.clear()
+        self._entries.clear()
+        self._credits.clear()
+
+    def _next(self, classes: dict, credits: dict):
+        """Takes the next key out of classes, updating credits. Works on copies for order()."""
+        for priority in sorted(classes):
+            ring = classes[priority]
+            while True:
+                principal, keys = next(iter(ring.items()))
+                cost = self._entries[keys[0]][2]
+                credit = credits.get((priority, principal), 0.0)
+                if credit < cost:
+                    # A new turn: top up the credit, or pass if it still isn't enough.
+                    credit += self.quantum
+                    credits[(priority, principal)] = credit
+                    if credit < cost:
+                        ring.move_to_end(principal)
+                        continue
+                key = keys.popleft()
+                credits[(priority, principal)] = credit - cost
+                if not keys:
+                    del ring[principal]
+                    del credits[(priority, principal)]
+                    if not ring:
+                        del classes[priority]
+                elif credits[(priority, principal)] < self._entries[keys[0]][2]:
+                    ring.move_to_end(principal)
+                return key
+        raise IndexError("pop from an empty queue")
@@ -1,21 +1,36 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import axios from 'axios';
 import { Accordion, Button } from 'react-bootstrap';
 import ReactMarkdown from 'react-markdown';
 
 const API_BASE_URL = process.env.REACT_APP_API_BASE_URL || 'http://localhost:5001';
 
+const PAGE_SIZE = 20;
+
 const HistoryPage = () => {
   const [history, setHistory] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [error, setError] = useState(null);
+  // Full summaries fetched so far, by job_id. The listing only carries a preview.
+  const [summaries, setSummaries] = useState({});
+
+  const fetchPage = useCallback(async (cursor) => {
+    const params = { limit: PAGE_SIZE };
+    if (cursor) {
+      params.cursor = cursor;
+    }
+    const response = await axios.get(`${API_BASE_URL}/api/history`, { params, withCredentials: true });
+    setHistory(prev => (cursor ? [...prev, ...response.data.items] : response.data.items));
+    setNextCursor(response.data.next_cursor);
+  }, []);
 
   useEffect(() => {
     const fetchHistory = async () => {
       setIsLoading(true);
       try {
-        const response = await axios.get(`${API_BASE_URL}/api/history`, { withCredentials: true });
-        setHistory(response.data);
+        await fetchPage(null);
         setError(null);
       } catch (err) {
         setError(err.response?.data?.error || "Failed to fetch history. You might need to log in.");
@@ -26,7 +41,49 @@ const HistoryPage = () => {
     };
 
     fetchHistory();
-  }, []);
+  }, [fetchPage]);
+
+  const loadMore = async () => {
+    setIsLoadingMore(true);
+    try {
+      await fetchPage(nextCursor);
+    } catch (err) {
+      setError(err.response?.data?.error || "Failed to fetch more history.");
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
+  const fetchField = async (jobId, path, field) => {
+    const response = await axios.get(`${API_BASE_URL}/api/history/${jobId}/${path}`, { withCredentials: true });
+    return response.data[field];
+  };
+
+  const loadSummary = async (jobId) => {
+    if (summaries[jobId] !== undefined) {
+      return summaries[jobId];
+    }
+    const summary = await fetchField(jobId, 'summary', 'summary');
+    setSummaries(prev => ({ ...prev, [jobId]: summary }));
+    return summary;
+  };
+
+  const handleSelect = (eventKey) => {
+    const item = eventKey !== null && history[Number(eventKey)];
+    if (item && item.status === 'success') {
+      loadSummary(item.job_id).catch(() => {});
+    }
+  };
+
+  const downloadSummary = async (item) => {
+    const summary = await loadSummary(item.job_id);
+    downloadTextFile(summary, `${item.video_title || 'Untitled'}_summary.txt`);
+  };
+
+  // Transcripts can be large, so let the browser download the file directly instead of going through JSON.
+  const downloadTranscript = (item) => {
+    window.location.href = `${API_BASE_URL}/api/jobs/${item.job_id}/transcript?download=1`;
+  };
 
   const downloadTextFile = (content, filename) => {
     const blob = new Blob([content], { type: 'text/plain;charset=utf-8' });
@@ -60,7 +117,8 @@ const HistoryPage = () => {
           <p>No history found. Analyze a video to get started!</p>
         </div>
       ) : (
-        <Accordion>
+        <>
+        <Accordion onSelect={handleSelect}>
           {history.map((item, index) => (
             <Accordion.Item eventKey={String(index)} key={item.job_id}>
               <Accordion.Header>
@@ -71,10 +129,10 @@ const HistoryPage = () => {
                   <div className="d-flex align-items-center">
                     {item.status === 'success' && (
                       <div onClick={(e) => e.stopPropagation()} className="me-3">
-                        <Button variant="outline-primary" size="sm" onClick={() => downloadTextFile(item.summary, `${item.video_title || 'Untitled'}_summary.txt`)} title="Download Summary">
+                        <Button variant="outline-primary" size="sm" onClick={() => downloadSummary(item)} title="Download Summary">
                           Summary
                         </Button>
-                        <Button variant="outline-secondary" size="sm" className="ms-2" onClick={() => downloadTextFile(item.full_transcript, `${item.video_title || 'Untitled'}_transcript.txt`)} title="Download Transcript">
+                        <Button variant="outline-secondary" size="sm" className="ms-2" onClick={() => downloadTranscript(item)} title="Download Transcript">
                           Transcript
                         </Button>
                       </div>
@@ -90,7 +148,7 @@ const HistoryPage = () => {
                   <div>
                     <h5>Summary</h5>
                     <div className="markdown-content summary-card">
-                      <ReactMarkdown>{item.summary || 'No summary available.'}</ReactMarkdown>
+                      <ReactMarkdown>{summaries[item.job_id] ?? item.summary_preview ?? 'No summary available.'}</ReactMarkdown>
                     </div>
                   </div>
                 ) : (
@@ -100,6 +158,14 @@ const HistoryPage = () => {
             </Accordion.Item>
           ))}
         </Accordion>
+        {nextCursor && (
+          <div className="text-center mt-3">
+            <Button variant="outline-secondary" onClick={loadMore} disabled={isLoadingMore}>
+              {isLoadingMore ? 'Loading...' : 'Load more'}
+            </Button>
+          </div>
+        )}
+        </>
       )}
     </div>
   );
@@ -1,7 +1,8 @@
 import React, { useState, useEffect, useRef } from 'react';
-import { FiZap } from 'react-icons/fi';
+import { FiZap, FiXCircle } from 'react-icons/fi';
 import ResultsDisplay from '../components/ResultsDisplay';
 import axios from 'axios';
+import watchJob from '../watchJob';
 
 const API_BASE_URL = process.env.REACT_APP_API_BASE_URL || 'http://localhost:5001';
 
@@ -17,7 +18,8 @@ const SoloUrlPage = () => {
   const [statusMessage, setStatusMessage] = useState('Idle');
   const [progress, setProgress] = useState(0);
 
-  const intervalRef = useRef(null);
+  const stopWatchingRef = useRef(null);
+  const jobIdRef = useRef(null);
 
   // Request notification permission on component mount
   useEffect(() => {
@@ -42,11 +44,11 @@ const SoloUrlPage = () => {
     fetchTemplates();
   }, []);
 
-  // Cleanup polling on component unmount
+  // Stop following the job on component unmount
   useEffect(() => {
     return () => {
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current);
+      if (stopWatchingRef.current) {
+        stopWatchingRef.current();
       }
     };
   }, []);
@@ -62,8 +64,8 @@ const SoloUrlPage = () => {
     e.preventDefault();
     if (!url || isLoading) return;
 
-    if (intervalRef.current) {
-      clearInterval(intervalRef.current);
+    if (stopWatchingRef.current) {
+      stopWatchingRef.current();
     }
 
     setIsLoading(true);
@@ -83,40 +85,45 @@ const SoloUrlPage = () => {
       
       if (data.job_id) {
         const jobId = data.job_id;
+        jobIdRef.current = jobId;
         setStatusMessage('Job submitted. Waiting for progress...');
 
-        intervalRef.current = setInterval(() => {
-          axios.get(`${API_BASE_URL}/api/get-job-result/${jobId}`)
-            .then(res => {
-              const { status, data: resultData, message, progress_percentage, progress_message } = res.data;
-              
-              if (status === 'success') {
-                setResult(resultData);
-                setStatusMessage('Analysis complete!');
-                setProgress(100);
-                setIsLoading(false);
-                clearInterval(intervalRef.current);
-                showNotification('Analysis Complete!', { body: `Successfully analyzed: ${resultData.title}` });
-              } else if (status === 'error') {
-                setError(message || 'An unknown error occurred.');
-                setStatusMessage('Job failed.');
-                setProgress(100); // Mark as complete even on error
-                setIsLoading(false);
-                clearInterval(intervalRef.current);
-                showNotification('Analysis Failed', { body: message || 'An unknown error occurred.' });
-              } else {
-                // Update progress and status message while running
-                setProgress(progress_percentage || progress);
-                setStatusMessage(progress_message || `Job status: ${status}`);
-              }
-            })
-            .catch(err => {
-              console.error("Polling error:", err);
-              setError('Failed to get job status.');
+        stopWatchingRef.current = watchJob(jobId, {
+          onUpdate: ({ status, data: resultData, message, progress_percentage, progress_message, queue_position, estimated_start_seconds, video_title }) => {
+            if (status === 'success') {
+              setResult(resultData);
+              setStatusMessage('Analysis complete!');
+              setProgress(100);
               setIsLoading(false);
-              clearInterval(intervalRef.current);
-            });
-        }, 3000); // Poll every 3 seconds for better responsiveness
+              showNotification('Analysis Complete!', { body: `Successfully analyzed: ${resultData.title}` });
+            } else if (status === 'error') {
+              setError(message || 'An unknown error occurred.');
+              setStatusMessage('Job failed.');
+              setProgress(100); // Mark as complete even on error
+              setIsLoading(false);
+              showNotification('Analysis Failed', { body: message || 'An unknown error occurred.' });
+            } else if (status === 'cancelled') {
+              setStatusMessage('Job cancelled.');
+              setProgress(0);
+              setIsLoading(false);
+            } else if (queue_position) {
+              const eta = estimated_start_seconds != null
+                ? `, starts in about ${Math.max(1, Math.round(estimated_start_seconds / 60))} min`
+                : '';
+              setStatusMessage(`Waiting in queue (position ${queue_position}${eta})...`);
+            } else {
+              // Update progress and status message while running
+              setProgress(prev => progress_percentage || prev);
+              const statusText = progress_message || `Job status: ${status}`;
+              setStatusMessage(video_title ? `${video_title}: ${statusText}` : statusText);
+            }
+          },
+          onError: (err) => {
+            console.error("Job status error:", err);
+            setError('Failed to get job status.');
+            setIsLoading(false);
+          }
+        });
 
       } else {
         throw new Error('Server did not return a job ID.');
@@ -131,6 +138,20 @@ const SoloUrlPage = () => {
     }
   };
 
+  // Stops the running job; the final 'cancelled' status arrives through watchJob.
+  const handleCancel = async () => {
+    if (!jobIdRef.current) return;
+    setStatusMessage('Cancelling...');
+    try {
+      await axios.delete(`${API_BASE_URL}/api/jobs/${jobIdRef.current}`, { withCredentials: true });
+    } catch (err) {
+      // 409 means the job finished first; its result is on the way.
+      if (err.response?.status !== 409) {
+        setError(err.response?.data?.error || 'Failed to cancel the job.');
+      }
+    }
+  };
+
   const displayStatus = {
       main: isLoading ? 'Analyzing' : (error ? 'Error' : (result ? 'Completed' : 'Idle')),
       sub: statusMessage,
@@ -193,6 +214,11 @@ const SoloUrlPage = () => {
           <button type="submit" className="btn btn-primary w-100" disabled={isLoading}>
             <FiZap /> {isLoading ? statusMessage : 'Start Analysis'}
           </button>
+          {isLoading && jobIdRef.current && (
+            <button type="button" className="btn btn-secondary w-100 mt-2" onClick={handleCancel}>
+              <FiXCircle /> Cancel
+            </button>
+          )}
         </form>
       </div>
 
@@ -2,6 +2,7 @@ import React, { useState, useEffect, useRef } from 'react';
 import { FiSearch } from 'react-icons/fi';
 import ResultsDisplay from '../components/ResultsDisplay';
 import axios from 'axios';
+import watchJob from '../watchJob';
 
 const API_BASE_URL = process.env.REACT_APP_API_BASE_URL || 'http://localhost:5001';
 
@@ -18,7 +19,7 @@ const TopicSearchPage = () => {
   const [result, setResult] = useState(null);
   const [statusMessage, setStatusMessage] = useState('Idle');
 
-  const pollingRef = useRef(null);
+  const stopWatchingRef = useRef(null);
 
   // Fetch templates on component mount
   useEffect(() => {
@@ -37,52 +38,48 @@ const TopicSearchPage = () => {
     fetchTemplates();
   }, []);
 
-  // Cleanup interval on component unmount
+  // Stop following the job on component unmount
   useEffect(() => {
     return () => {
-      if (pollingRef.current) {
-        clearInterval(pollingRef.current);
+      if (stopWatchingRef.current) {
+        stopWatchingRef.current();
       }
     };
   }, []);
 
   const pollJobResult = (jobId) => {
-    if (pollingRef.current) {
-      clearInterval(pollingRef.current);
+    if (stopWatchingRef.current) {
+      stopWatchingRef.current();
     }
 
-    pollingRef.current = setInterval(async () => {
-      try {
-        const res = await axios.get(`${API_BASE_URL}/api/get-job-result/${jobId}`, { withCredentials: true });
-        const data = res.data;
-
+    stopWatchingRef.current = watchJob(jobId, {
+      onUpdate: (data) => {
         setStatusMessage(`Job status: ${data.status}`);
 
         if (data.status === 'success') {
-          clearInterval(pollingRef.current);
           setIsLoading(false);
           setResult(data.data);
           setError(null);
         } else if (data.status === 'error') {
-          clearInterval(pollingRef.current);
           setIsLoading(false);
           setError(data.message || 'An unknown error occurred during analysis.');
           setResult(null);
+        } else if (data.status === 'cancelled') {
+          setIsLoading(false);
+          setResult(null);
         } else if (data.status === 'not_found') {
-          clearInterval(pollingRef.current);
           setIsLoading(false);
           setError(`Job ID ${jobId} not found. The job may have expired or never existed.`);
           setResult(null);
         }
-
-      } catch (err) {
-        clearInterval(pollingRef.current);
+      },
+      onError: (err) => {
         setIsLoading(false);
         const errorMessage = err.response?.data?.message || err.message || 'Failed to poll for job results. Check network connection.';
         setError(errorMessage);
         setResult(null);
       }
-    }, 3000); // Poll every 3 seconds
+    });
   };
 
   const handleSubmit = async (e) => {
@@ -93,8 +90,8 @@ const TopicSearchPage = () => {
     setResult(null);
     setError(null);
     setStatusMessage('Starting analysis...');
-    if (pollingRef.current) {
-      clearInterval(pollingRef.current);
+    if (stopWatchingRef.current) {
+      stopWatchingRef.current();
     }
 
     try {
@@ -0,0 +1,65 @@
+import axios from 'axios';
+
+const API_BASE_URL = process.env.REACT_APP_API_BASE_URL || 'http://localhost:5001';
+const FALLBACK_POLL_INTERVAL_MS = 3000;
+
+// Follows a job until it finishes. Uses the server-push event stream when the
+// browser supports it and falls back to polling get-job-result otherwise.
+// `onUpdate` receives the same payload shape as /api/get-job-result.
+// Returns a function that stops watching.
+const watchJob = (jobId, { onUpdate, onError }) => {
+  let stopped = false;
+  let eventSource = null;
+  let intervalId = null;
+
+  const stop = () => {
+    stopped = true;
+    if (eventSource) eventSource.close();
+    if (intervalId) clearInterval(intervalId);
+  };
+
+  const handlePayload = (payload) => {
+    if (stopped) return;
+    if (['success', 'error', 'cancelled', 'not_found'].includes(payload.status)) {
+      stop();
+    }
+    onUpdate(payload);
+  };
+
+  const startPolling = () => {
+    intervalId = setInterval(() => {
+      axios.get(`${API_BASE_URL}/api/get-job-result/${jobId}`, { withCredentials: true })
+        .then(res => handlePayload(res.data))
+        .catch(err => {
+          stop();
+          onError(err);
+        });
+    }, FALLBACK_POLL_INTERVAL_MS);
+  };
+
+  if (typeof window !== 'undefined' && 'EventSource' in window) {
+    let receivedAny = false;
+    eventSource = new EventSource(`${API_BASE_URL}/api/jobs/${jobId}/events`, { withCredentials: true });
+    const listener = (event) => {
+      receivedAny = true;
+      handlePayload(JSON.parse(event.data));
+    };
+    eventSource.addEventListener('progress', listener);
+    eventSource.addEventListener('result', listener);
+    eventSource.onerror = () => {
+      // EventSource reconnects by itself once it has been working; if the stream
+      // never opened (e.g. blocked by a proxy), switch to polling instead.
+      if (!receivedAny && !stopped) {
+        eventSource.close();
+        eventSource = null;
+        startPolling();
+      }
+    };
+  } else {
+    startPolling();
+  }
+
+  return stop;
+};
+
+export default watchJob;
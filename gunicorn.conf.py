@@ -0,0 +1,7 @@
+# Server hooks for gunicorn; entrypoint.sh passes the other settings on the command line.
+
+
+def post_worker_init(worker):
+    """Starts the inline job lease keeper as soon as a web worker has loaded the app."""
+    from app import start_lease_keeper
+    start_lease_keeper()
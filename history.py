@@ -0,0 +1,106 @@
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy import and_, or_, func
+from models import db, Job
+from artifact_store import ARTIFACT_STORE, PREVIEW_CHARS, ARTIFACT_KEY_SUFFIX
+
+# Page size of the history listing when the client doesn't ask for one, and the most it may ask for.
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Number of summary characters included with each history item.
+SUMMARY_PREVIEW_CHARS = PREVIEW_CHARS
+
+# Only these parts of Job.result can be fetched one job at a time.
+RESULT_FIELDS = ('summary', 'full_transcript')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, job_id: str) -> str:
+    """Encodes the position of a history item as an opaque, URL-safe string."""
+    raw = f"{created_at.isoformat()}|{job_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Reverses encode_cursor. Raises InvalidCursor for anything it didn't produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, job_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), job_id
+    except (ValueError, UnicodeError, binascii.Error) as e:
+        raise InvalidCursor(f"Invalid history cursor: {cursor!r}") from e
+
+
+def list_history(user_id: int, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None) -> dict:
+    """
+    Returns one page of a user's jobs, newest first.
+
+    Only metadata columns and the first SUMMARY_PREVIEW_CHARS characters of the
+    summary are selected; the rest of Job.result never leaves the database.
+    Pages are keyed on (created_at, id), so they stay stable while new jobs are
+    added and cost the same however deep the client pages.
+
+    Returns:
+        {"items": [...], "next_cursor": str | None}
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    # Results stored since the artifact store keep a preview next to the hash; older ones have the text inline.
+    summary_preview = func.substr(func.coalesce(
+        Job.result[('summary' + ARTIFACT_KEY_SUFFIX, 'preview')].as_string(),
+        Job.result['summary'].as_string()
+    ), 1, SUMMARY_PREVIEW_CHARS)
+    query = (db.session.query(Job.id, Job.video_title, Job.video_url, Job.status, Job.created_at,
+                              summary_preview.label('summary_preview'))
+             .filter(Job.user_id == user_id))
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Job.created_at < cursor_created_at,
+            and_(Job.created_at == cursor_created_at, Job.id < cursor_id)
+        ))
+    # Fetch one extra row to find out whether there is a next page.
+    rows = query.order_by(Job.created_at.desc(), Job.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return {
+        "items": [{
+            "job_id": row.id,
+            "video_title": row.video_title,
+            "video_url": row.video_url,
+            "status": row.status,
+            "created_at": row.created_at.isoformat(),
+            "summary_preview": row.summary_preview if row.status == 'success' else None
+        } for row in rows],
+        "next_cursor": next_cursor
+    }
+
+
+def get_result_field(job_id: str, user_id: int, field: str) -> tuple[bool, str | None]:
+    """
+    Loads a single field of a user's job result without loading the others.
+
+    Returns:
+        (found, value): found is False if the job doesn't exist or belongs to someone else.
+    """
+    if field not in RESULT_FIELDS:
+        raise ValueError(f"Unknown result field: {field}")
+    row = (db.session.query(Job.status,
+                            Job.result[field].as_string().label('inline'),
+                            Job.result[(field + ARTIFACT_KEY_SUFFIX, 'sha256')].as_string().label('sha256'))
+           .filter(Job.id == job_id, Job.user_id == user_id)
+           .first())
+    if row is None:
+        return False, None
+    if row.status != 'success':
+        return True, None
+    if row.inline is not None or row.sha256 is None:
+        return True, row.inline
+    return True, ARTIFACT_STORE.resolve_text({field + ARTIFACT_KEY_SUFFIX: {"sha256": row.sha256}}, field)
@@ -0,0 +1,85 @@
+import gzip
+import hashlib
+import os
+from flask import request, jsonify, Response
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available.
+    brotli = None
+
+# JSON responses smaller than this are sent uncompressed; compressing them costs more than it saves.
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+COMPRESSIBLE_MIMETYPES = ('application/json',)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# For responses that can never change, e.g. the result of a finished job.
+IMMUTABLE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+# For responses that may change: clients may keep them but must revalidate with the ETag.
+REVALIDATE_CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts) -> str:
+    """Builds a strong ETag value from the parts that determine a response's content."""
+    return hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+
+
+def cached_etag(etag: str) -> str | None:
+    """
+    Returns the ETag the client's If-None-Match has for etag, in whichever of the
+    encodings we send it has cached, or None if it has none of them.
+    """
+    for suffix in ('', '-gzip', '-br'):
+        if request.if_none_match.contains(etag + suffix):
+            return etag + suffix
+    return None
+
+
+def conditional_json(etag: str, build_payload, cache_control: str = REVALIDATE_CACHE_CONTROL) -> Response:
+    """
+    Returns a 304 if the client already has the response identified by etag,
+    otherwise the JSON of build_payload(). The payload is only built on a miss.
+    """
+    cached = cached_etag(etag)
+    if cached:
+        # A 304 carries the validator of the client's copy, encoding suffix included,
+        # so caches keep matching it against the ETag of the 200 they stored.
+        response = Response(status=304)
+        response.set_etag(cached)
+    else:
+        response = jsonify(build_payload())
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def compress_response(response: Response) -> Response:
+    """
+    after_request hook that gzip- or brotli-compresses JSON responses larger than
+    COMPRESSION_MIN_BYTES for clients that accept it. Streamed responses (such as
+    the job event stream) are passed through untouched.
+    """
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_BYTES:
+        return response
+
+    encoding = request.accept_encodings.best_match(['br', 'gzip'] if brotli else ['gzip'])
+    if encoding == 'br':
+        response.set_data(brotli.compress(data, quality=BROTLI_QUALITY))
+    elif encoding == 'gzip':
+        response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL))
+    else:
+        return response
+    response.headers['Content-Encoding'] = encoding
+
+    # A strong ETag identifies the exact bytes, so each encoding gets its own.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+    return response
@@ -0,0 +1,170 @@
+"""
+Keeps the pipeline's per-job output directories within a disk budget.
+
+main.py writes subtitles, audio, transcripts and summaries under
+output/jobs/<job_id>. Once a job has finished, its texts are also in the
+artifact store, so these directories are only a fast path for downloads (see
+send_job_text in app.py) and can be deleted at any time. Each sweep:
+
+1. deletes the audio left behind by jobs that are no longer running, e.g. the
+   WAV and partial downloads of a job that crashed mid-transcription;
+2. deletes directories nobody has read for longer than max_age_seconds;
+3. deletes the least recently accessed directories until the rest fit in
+   budget_bytes.
+
+Directories of running jobs, and any directory changed within grace_seconds,
+are never touched. Sweeps in different processes on the same node are
+serialized with a lock file, so every gunicorn worker can run a janitor.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; sweeps there are simply not serialized.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+AUDIO_DIR_NAME = 'audio_files'
+LOCK_FILE_NAME = '.janitor.lock'
+# Touched on downloads, so reads count as accesses even on noatime mounts.
+ACCESS_MARKER_NAME = '.last_access'
+
+
+def _tree_stats(path: Path) -> tuple[int, float, float]:
+    """
+    Returns (size in bytes, last access, last modification) of the files under
+    path. Directory times are ignored, as deleting audio_files changes them.
+    """
+    size, accessed, modified = 0, 0.0, 0.0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                stat = os.stat(os.path.join(dirpath, filename))
+            except FileNotFoundError:
+                continue
+            size += stat.st_size
+            accessed = max(accessed, stat.st_atime, stat.st_mtime)
+            modified = max(modified, stat.st_mtime)
+    if not modified:
+        accessed = modified = path.stat().st_mtime
+    return size, accessed, modified
+
+
+def _remove(path: Path) -> int:
+    """Deletes a directory tree and returns the bytes it held."""
+    size = _tree_stats(path)[0] if path.exists() else 0
+    shutil.rmtree(path, ignore_errors=True)
+    return size
+
+
+class Janitor:
+    """Sweeps root (output/jobs) on a background thread every interval_seconds."""
+
+    def __init__(self, root, budget_bytes: int, max_age_seconds: float | None = None,
+                 grace_seconds: float = 3600, active_job_ids=None, interval_seconds: float = 900,
+                 on_reclaimed=None):
+        """
+        active_job_ids() returns the ids of jobs that may still be writing to root.
+        on_reclaimed(reason, bytes), if given, is called for everything a sweep deletes.
+        """
+        self.root = Path(root)
+        self.budget_bytes = budget_bytes
+        self.max_age_seconds = max_age_seconds
+        self.grace_seconds = grace_seconds
+        self.active_job_ids = active_job_ids or (lambda: set())
+        self.interval_seconds = interval_seconds
+        self.on_reclaimed = on_reclaimed
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def mark_accessed(self, job_id: str):
+        """Records a read of a job's outputs, e.g. a download, for the LRU order."""
+        try:
+            (self.root / job_id / ACCESS_MARKER_NAME).touch()
+        except OSError:
+            pass
+
+    def start(self):
+        """Starts the background sweeps unless they are already running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="output-janitor", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Output janitor sweep failed")
+            time.sleep(self.interval_seconds)
+
+    def sweep(self) -> dict | None:
+        """
+        Runs one sweep. Returns what it reclaimed, or None if another process on
+        this node is sweeping right now.
+        """
+        if not self.root.is_dir():
+            return None
+        with open(self.root / LOCK_FILE_NAME, 'w') as lock_file:
+            if fcntl:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return None
+            return self._sweep()
+
+    def _sweep(self) -> dict:
+        started = time.monotonic()
+        now = time.time()
+        active = set(self.active_job_ids())
+        report = {"orphaned_audio_bytes": 0, "expired_bytes": 0, "evicted_bytes": 0, "removed_jobs": 0}
+
+        def reclaim(kind, path):
+            size = _remove(path)
+            report[f"{kind}_bytes"] += size
+            if self.on_reclaimed and size:
+                self.on_reclaimed(kind, size)
+            return size
+
+        total = 0
+        candidates = []  # (last access, size, path) of directories that may be deleted
+        for path in self.root.iterdir():
+            if not path.is_dir() or path.name.startswith('.'):
+                continue
+            size, accessed, modified = _tree_stats(path)
+            if path.name in active or now - modified < self.grace_seconds:
+                total += size
+                continue
+            audio_dir = path / AUDIO_DIR_NAME
+            if audio_dir.is_dir():
+                size -= reclaim('orphaned_audio', audio_dir)
+            if self.max_age_seconds is not None and now - accessed > self.max_age_seconds:
+                reclaim('expired', path)
+                report["removed_jobs"] += 1
+                continue
+            total += size
+            candidates.append((accessed, size, path))
+
+        for _, size, path in sorted(candidates, key=lambda candidate: candidate[0]):
+            if total <= self.budget_bytes:
+                break
+            reclaim('evicted', path)
+            report["removed_jobs"] += 1
+            total -= size
+
+        report["reclaimed_bytes"] = report["orphaned_audio_bytes"] + report["expired_bytes"] + report["evicted_bytes"]
+        report["remaining_bytes"] = total
+        if report["reclaimed_bytes"]:
+            logger.info(
+                f"Output janitor reclaimed {report['reclaimed_bytes'] / 1024 / 1024:.1f} MB "
+                f"({report['removed_jobs']} job directories) in {time.monotonic() - started:.2f}s; "
+                f"{total / 1024 / 1024:.1f} MB remain."
+            )
+        return report
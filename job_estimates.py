@@ -0,0 +1,108 @@
+"""
+Estimates of how much work an analysis job is, used to schedule it fairly.
+
+Jobs for videos with subtitles only clean the subtitle and call Gemini once, so
+they go in the fast priority class at a flat cost. Everything else has to
+download and transcribe the audio, which scales with the video's length, so its
+cost is the audio duration in minutes. What is known about a video comes from
+the pipeline's metadata of earlier jobs, kept in memory and, for jobs run by
+other processes or before a restart, read from their checkpoints in the Job
+table; unseen videos are assumed to need DEFAULT_AUDIO_MINUTES of transcription.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from sqlalchemy.orm import load_only
+from models import Job
+
+PRIORITY_CAPTIONS = 0
+PRIORITY_AUDIO = 1
+
+# Cost of a subtitle-only job, in audio-minute equivalents.
+CAPTION_JOB_COST = 1.0
+DEFAULT_AUDIO_MINUTES = float(os.environ.get('DEFAULT_AUDIO_MINUTES', 20))
+# How long a video with no recorded facts is not looked up again.
+FACTS_MISS_TTL_SECONDS = float(os.environ.get('FACTS_MISS_TTL_SECONDS', 300))
+
+# Starting guesses of wall-clock seconds per unit of cost; the executor refines them.
+INITIAL_SECONDS_PER_UNIT = {PRIORITY_CAPTIONS: 30.0, PRIORITY_AUDIO: 10.0}
+
+
+class JobEstimate(NamedTuple):
+    priority: int
+    cost: float
+
+
+def persisted_facts(video_id: str) -> tuple | None:
+    """
+    (duration_seconds, has_subtitles) from the metadata checkpoint of the latest job
+    for video_id. Only reads that video's jobs, through ix_job_video_id_created_at.
+    """
+    job = (Job.query.options(load_only(Job.id, Job.checkpoint))
+           .filter(Job.video_id == video_id,
+                   Job.checkpoint[('metadata', 'has_subtitles')].as_boolean().isnot(None))
+           .order_by(Job.created_at.desc())
+           .first())
+    if job is None:
+        return None
+    metadata = job.checkpoint['metadata']
+    return metadata.get('duration'), metadata['has_subtitles']
+
+
+class VideoFacts:
+    """
+    A bounded, thread-safe map of video_id -> (duration_seconds, has_subtitles).
+    Misses are looked up with load, if given: found facts are remembered, and
+    videos load knows nothing about are not looked up again for miss_ttl seconds.
+    """
+
+    def __init__(self, max_entries: int = 4096, load=None, miss_ttl: float = FACTS_MISS_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.load = load
+        self.miss_ttl = miss_ttl
+        self._entries = OrderedDict()
+        self._misses = OrderedDict()  # video_id -> time.monotonic() until which it is a known miss
+        self._lock = threading.Lock()
+
+    def record(self, video_id: str, duration_seconds: float | None, has_subtitles: bool):
+        with self._lock:
+            self._misses.pop(video_id, None)
+            self._entries[video_id] = (duration_seconds, has_subtitles)
+            self._entries.move_to_end(video_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, video_id: str) -> tuple | None:
+        with self._lock:
+            known = self._entries.get(video_id)
+            if known is not None or not self.load or self._misses.get(video_id, 0) > time.monotonic():
+                return known
+        known = self.load(video_id)
+        if known is not None:
+            self.record(video_id, *known)
+            return known
+        with self._lock:
+            self._misses[video_id] = time.monotonic() + self.miss_ttl
+            self._misses.move_to_end(video_id)
+            while len(self._misses) > self.max_entries:
+                self._misses.popitem(last=False)
+        return None
+
+
+# Loading needs an app context, which every caller of estimate_job has.
+VIDEO_FACTS = VideoFacts(load=persisted_facts)
+
+
+def estimate_job(video_id: str | None, facts: VideoFacts = VIDEO_FACTS) -> JobEstimate:
+    """Returns the priority class and cost of analyzing video_id."""
+    known = facts.get(video_id) if video_id else None
+    if known is None:
+        return JobEstimate(PRIORITY_AUDIO, DEFAULT_AUDIO_MINUTES)
+    duration_seconds, has_subtitles = known
+    if has_subtitles:
+        return JobEstimate(PRIORITY_CAPTIONS, CAPTION_JOB_COST)
+    if not duration_seconds:
+        return JobEstimate(PRIORITY_AUDIO, DEFAULT_AUDIO_MINUTES)
+    return JobEstimate(PRIORITY_AUDIO, max(duration_seconds / 60, CAPTION_JOB_COST))
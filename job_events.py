@@ -0,0 +1,89 @@
+import threading
+import time
+
+
+class _JobChannel:
+    """The latest event published for a single job, plus the waiters watching it."""
+
+    def __init__(self, lock):
+        self.version = 0
+        self.event = None
+        self.final = False
+        self.updated_at = time.monotonic()
+        self.condition = threading.Condition(lock)
+
+
+class JobEventBroker:
+    """
+    In-memory fan-out of job progress events.
+
+    Publishers (the analysis threads) overwrite a job's latest event and bump its
+    version; any number of subscribers wait on a version cursor and are woken with
+    the newest event. Only the latest event is kept, so a slow subscriber skips
+    intermediate progress instead of building up a backlog.
+
+    Events are only visible inside the process that published them.
+    """
+
+    def __init__(self, retention_seconds: float = 600):
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def _prune(self):
+        """Drops finished channels older than the retention period. Caller holds the lock."""
+        cutoff = time.monotonic() - self.retention_seconds
+        stale = [job_id for job_id, channel in self._channels.items()
+                 if channel.final and channel.updated_at < cutoff]
+        for job_id in stale:
+            del self._channels[job_id]
+
+    def publish(self, job_id: str, event: dict, final: bool = False) -> int:
+        """
+        Replaces the latest event for job_id and wakes its subscribers.
+        Events published after a final event are ignored.
+
+        Returns:
+            The new version number of the job's channel.
+        """
+        with self._lock:
+            self._prune()
+            channel = self._channels.get(job_id)
+            if channel is None:
+                channel = self._channels[job_id] = _JobChannel(self._lock)
+            if channel.final:
+                return channel.version
+            channel.version += 1
+            channel.event = event
+            channel.final = final
+            channel.updated_at = time.monotonic()
+            channel.condition.notify_all()
+            return channel.version
+
+    def latest(self, job_id: str):
+        """Returns (version, event, final) for job_id, or None if nothing was published here."""
+        with self._lock:
+            channel = self._channels.get(job_id)
+            if channel is None:
+                return None
+            return channel.version, channel.event, channel.final
+
+    def wait_for_update(self, job_id: str, after_version: int, timeout: float):
+        """
+        Blocks until job_id has a version newer than after_version or timeout expires.
+
+        Returns:
+            (version, event, final) for the newest event, or None on timeout or if
+            the job has no channel in this process.
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            channel = self._channels.get(job_id)
+            if channel is None:
+                return None
+            while channel.version <= after_version:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                channel.condition.wait(remaining)
+            return channel.version, channel.event, channel.final
@@ -0,0 +1,173 @@
+import heapq
+import logging
+import threading
+import time
+from fair_queue import FairShareQueue
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the executor's queue is full."""
+
+
+# Weight of the latest finished job in the running estimate of seconds per cost unit.
+RATE_SMOOTHING = 0.2
+DEFAULT_SECONDS_PER_UNIT = 60.0
+
+
+class JobExecutor:
+    """
+    A per-process pool of worker threads fed by a bounded fair-share queue.
+
+    Jobs are keyed by job_id so callers can ask for a job's position in the
+    queue while it waits. Each job may name the principal it is charged to, a
+    priority class and an estimated cost; waiting jobs are ordered by
+    FairShareQueue, which is plain FIFO when none of these are given. Worker
+    threads are started lazily on the first submission, so importing this module
+    (e.g. in a forking gunicorn master) never spawns threads.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue_size: int = 10, name: str = "job-executor",
+                 quantum: float = 10.0, seconds_per_unit: dict | None = None):
+        """
+        quantum is the cost each principal may run per turn; seconds_per_unit maps a
+        priority class to the initial guess of wall-clock seconds per unit of cost,
+        which is refined as jobs finish and used for estimated_starts().
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        if max_queue_size < 0:
+            raise ValueError("max_queue_size cannot be negative.")
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.name = name
+
+        self._pending = FairShareQueue(quantum)  # job_id -> (fn, args, kwargs, priority, cost)
+        self._running = {}  # job_id -> (started_at, priority, cost)
+        self._seconds_per_unit = dict(seconds_per_unit or {})
+        self._threads = []
+        self._cond = threading.Condition()
+        self._shutdown = False
+
+    def _ensure_workers(self):
+        """Starts the worker threads if they are not running yet. Caller holds the lock."""
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.max_workers:
+            thread = threading.Thread(
+                target=self._worker_loop,
+                name=f"{self.name}-{len(self._threads)}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job_id: str, fn, *args, principal=None, priority: int = 0, cost: float = 1.0, **kwargs) -> int:
+        """
+        Queues fn(*args, **kwargs) under job_id, charged to principal. Lower
+        priority classes run first; cost is the job's estimated size in the units
+        of the executor's quantum.
+
+        Returns:
+            The 1-based position of the job in the queue.
+
+        Raises:
+            QueueFullError: If the queue already holds max_queue_size jobs.
+        """
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Executor has been shut down.")
+            if job_id in self._pending or job_id in self._running:
+                raise ValueError(f"Job {job_id} is already queued or running.")
+            if len(self._pending) >= self.max_queue_size:
+                raise QueueFullError(f"Job queue is full ({self.max_queue_size} jobs waiting).")
+            self._pending.push(job_id, (fn, args, kwargs, priority, cost), principal=principal, priority=priority, cost=cost)
+            self._ensure_workers()
+            self._cond.notify()
+            return self._pending.order().index(job_id) + 1
+
+    def is_full(self) -> bool:
+        """Returns True if a new submission would be rejected."""
+        with self._cond:
+            return len(self._pending) >= self.max_queue_size
+
+    def queue_position(self, job_id: str) -> int | None:
+        """Returns the 1-based queue position of a waiting job, or None if it is not waiting here."""
+        with self._cond:
+            if job_id not in self._pending:
+                return None
+            return self._pending.order().index(job_id) + 1
+
+    def estimated_starts(self) -> dict:
+        """
+        Returns the expected seconds from now until each waiting job starts, assuming
+        no more jobs arrive and running jobs take their estimated time.
+        """
+        with self._cond:
+            now = time.monotonic()
+            slots = [max(0.0, started + self._expected_seconds(priority, cost) - now)
+                     for started, priority, cost in self._running.values()]
+            slots += [0.0] * (self.max_workers - len(slots))
+            heapq.heapify(slots)
+            starts = {}
+            for job_id in self._pending.order():
+                priority, _, cost = self._pending.entry(job_id)
+                starts[job_id] = heapq.heappop(slots)
+                heapq.heappush(slots, starts[job_id] + self._expected_seconds(priority, cost))
+            return starts
+
+    def estimated_start(self, job_id: str) -> float | None:
+        """Returns the expected seconds until a waiting job starts, or None if it is not waiting here."""
+        return self.estimated_starts().get(job_id)
+
+    def _expected_seconds(self, priority: int, cost: float) -> float:
+        return cost * self._seconds_per_unit.get(priority, DEFAULT_SECONDS_PER_UNIT)
+
+    def cancel(self, job_id: str) -> bool:
+        """Drops a job that is still waiting. Returns False if it is running or not queued here."""
+        with self._cond:
+            return self._pending.remove(job_id) is not None
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the executor's load."""
+        with self._cond:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "queued": len(self._pending),
+                "running": len(self._running),
+            }
+
+    def shutdown(self, wait: bool = True, timeout: float | None = None):
+        """Stops accepting jobs, drops waiting ones and lets running jobs finish."""
+        with self._cond:
+            self._shutdown = True
+            self._pending.clear()
+            self._cond.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                thread.join(timeout)
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._shutdown:
+                    self._cond.wait()
+                if self._shutdown:
+                    return
+                job_id, (fn, args, kwargs, priority, cost) = self._pending.pop()
+                started = time.monotonic()
+                self._running[job_id] = (started, priority, cost)
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                logger.exception(f"Unhandled exception in executor job {job_id}")
+            finally:
+                with self._cond:
+                    del self._running[job_id]
+                    if cost > 0:
+                        rate = (time.monotonic() - started) / cost
+                        previous = self._seconds_per_unit.get(priority)
+                        self._seconds_per_unit[priority] = rate if previous is None else (
+                            previous + RATE_SMOOTHING * (rate - previous))
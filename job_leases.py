@@ -0,0 +1,133 @@
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from sqlalchemy import delete, update, or_
+from models import db, AnalysisFlight, Job
+import quota
+
+logger = logging.getLogger(__name__)
+
+# A job whose lease has not been renewed for this long is considered abandoned.
+DEFAULT_LEASE_SECONDS = 60
+# Jobs are put back in the queue at most this many times before being marked as failed.
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def make_worker_id() -> str:
+    """Returns an identifier for this process that is unique across nodes."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_job(worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS, batch_size: int = 5) -> str | None:
+    """
+    Atomically claims the oldest unclaimed 'starting' job.
+
+    The claim is a conditional UPDATE, so when several workers race for the same
+    row exactly one of them sees rowcount == 1 and the others move on.
+
+    Returns:
+        The claimed job_id, or None if there was nothing to claim.
+    """
+    now = datetime.utcnow()
+    claimable = (
+        (Job.status == 'starting') &
+        or_(Job.claimed_by.is_(None), Job.lease_expires_at < now)
+    )
+    candidate_ids = [row.id for row in db.session.query(Job.id)
+                     .filter(claimable)
+                     .order_by(Job.created_at)
+                     .limit(batch_size)]
+
+    for job_id in candidate_ids:
+        outcome = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, claimable)
+            .values(
+                claimed_by=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                heartbeat_at=now,
+                attempts=Job.attempts + 1
+            )
+        )
+        db.session.commit()
+        if outcome.rowcount == 1:
+            logger.info(f"Worker {worker_id} claimed job {job_id}")
+            return job_id
+    return None
+
+
+def renew_lease(job_id: str, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+    """Extends the lease on a job. Returns False if the lease now belongs to someone else."""
+    now = datetime.utcnow()
+    outcome = db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.claimed_by == worker_id)
+        .values(heartbeat_at=now, lease_expires_at=now + timedelta(seconds=lease_seconds))
+    )
+    db.session.commit()
+    return outcome.rowcount == 1
+
+
+def renew_leases(worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> int:
+    """
+    Extends the leases on every unfinished job held by worker_id, e.g. all jobs
+    queued in or run by one web worker. Returns the number of leases renewed.
+    """
+    now = datetime.utcnow()
+    outcome = db.session.execute(
+        update(Job)
+        .where(Job.claimed_by == worker_id, Job.status.in_(('starting', 'running')))
+        .values(heartbeat_at=now, lease_expires_at=now + timedelta(seconds=lease_seconds))
+    )
+    db.session.commit()
+    return outcome.rowcount
+
+
+def release_lease(job_id: str, worker_id: str):
+    """Drops the lease on a job once it has reached a final state."""
+    db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.claimed_by == worker_id)
+        .values(claimed_by=None, lease_expires_at=None)
+    )
+    db.session.commit()
+
+
+def requeue_expired_jobs(max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+    """
+    Puts jobs whose worker stopped heartbeating back in the 'starting' state.
+    Jobs that already used up max_attempts are marked as failed instead, together
+    with the jobs coalesced onto them, and their analysis flight ends.
+
+    Returns:
+        The number of jobs that were re-queued.
+    """
+    now = datetime.utcnow()
+    expired = (
+        Job.status.in_(('starting', 'running')) &
+        (Job.lease_expires_at < now)
+    )
+    abandoned_jobs = Job.query.filter(expired, Job.attempts >= max_attempts).all()
+    abandoned_ids = [job.id for job in abandoned_jobs]
+    if abandoned_ids:
+        abandoned_jobs += Job.query.filter(Job.coalesced_with.in_(abandoned_ids), Job.id.notin_(abandoned_ids),
+                                           Job.status.in_(('starting', 'running'))).all()
+        db.session.execute(delete(AnalysisFlight).where(AnalysisFlight.leader_job_id.in_(abandoned_ids)))
+    for job in abandoned_jobs:
+        job.status = 'error'
+        job.error_message = "The job was interrupted too many times and has been abandoned."
+        job.claimed_by = None
+        job.lease_expires_at = None
+        quota.refund_job(job)
+    db.session.flush()
+    failed = len(abandoned_jobs)
+    requeued = db.session.execute(
+        update(Job)
+        .where(expired, Job.status == 'running')
+        .values(status='starting', claimed_by=None, lease_expires_at=None)
+    ).rowcount
+    db.session.commit()
+    if failed or requeued:
+        logger.warning(f"Lease sweep: re-queued {requeued} job(s), abandoned {failed} job(s).")
+    return requeued
@@ -1,13 +1,11 @@
 import json
 import os
-import sys
+import shutil
 import time
 import asyncio
 import logging
 from pathlib import Path
-from dotenv import load_dotenv
 import yt_dlp
-import re
 
 logger = logging.getLogger(__name__)
 
@@ -16,26 +14,23 @@ logger = logging.getLogger(__name__)
 # Set to False to enable actual AI processing (requires GEMINI_API_API_KEY in .env).
 SIMULATE_AI_PROCESSING = False
 
-# --- Base Output Directory ---
-BASE_OUTPUT_DIR = Path(__file__).parent / "output"
-# Ensure the base output directory exists
-BASE_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-# --- Add subdirectories to Python path ---
-current_dir = os.path.dirname(__file__)
-sys.path.append(os.path.join(current_dir, 'step1_get_10url'))
-sys.path.append(os.path.join(current_dir, 'modules'))
-sys.path.append(os.path.join(current_dir, 'step3_AI_summary'))
-
-
 # --- Import functions from our modules ---
-from yt_get_cc import get_subtitle
-from download_YTvideo2wav import download_audio
-from yt_transcription_re import clean_vtt_file
-from transcribe_wav import transcribe_audio_single # Re-add the correct async transcriber
+# The output directory, model name and URL parsing are shared with the web tier through pipeline.py,
+# which doesn't import any of the heavy dependencies below.
+from pipeline import BASE_OUTPUT_DIR, ANALYSIS_MODEL_NAME, YOUTUBE_VIDEO_ID_PATTERN, extract_video_id
+from modules.yt_get_cc import get_subtitle
+from modules.download_YTvideo2wav import download_audio
+from modules.yt_transcription_re import clean_vtt_file
+from modules.transcribe_wav import transcribe_audio_single # Re-add the correct async transcriber
+from modules.metadata_cache import MetadataCache
+from artifact_store import ARTIFACT_STORE
+from transcript_cache import TRANSCRIPT_CACHE, SOURCE_SUBTITLES, SOURCE_AUDIO
+from metrics import stage_timer, METADATA_CACHE_LOOKUPS, TRANSCRIPT_CACHE_LOOKUPS
+from cancellation import CancellationToken, JobCancelled, install_subprocess_tracking
+from checkpoint import Checkpoint
 
 # Import new AI processing modules
-from analyze_transcript_with_gemini import analyze_transcript_with_gemini
+from step3_AI_summary.analyze_transcript_with_gemini import analyze_transcript_with_gemini_async
 
 
 async def translate_query(query: str) -> str:
@@ -56,19 +51,66 @@ async def translate_query(query: str) -> str:
         logger.warning(f"Translation failed: {e}. Using original query.")
         return query
 
-import yt_dlp
-import re
+# yt-dlp info dicts are reused by every stage of a job (and by other jobs for the
+# same video) until they expire. Format URLs stay valid far longer than this.
+METADATA_CACHE = MetadataCache(ttl_seconds=int(os.environ.get('METADATA_CACHE_TTL_SECONDS', 600)))
+
+# Opt-in: when the metadata lists no captions in the job's language, download the audio
+# while the subtitles are still being probed instead of after. Costs a wasted download
+# (and, rarely, part of a transcription) whenever the subtitles win after all.
+SPECULATIVE_AUDIO_DOWNLOAD = os.environ.get('SPECULATIVE_AUDIO_DOWNLOAD') == '1'
+
+def fetch_video_metadata(url: str, stats: dict | None = None) -> dict | None:
+    """
+    Returns the full yt-dlp info dict for a URL, served from METADATA_CACHE when possible.
+    Each actual extractor call is counted in stats["extractor_calls"] if stats is given.
+    """
+    loaded = False
+
+    def load():
+        nonlocal loaded
+        loaded = True
+        # One retry, as YouTube occasionally fails the first request.
+        for attempt in range(2):
+            if stats is not None:
+                stats["extractor_calls"] = stats.get("extractor_calls", 0) + 1
+            try:
+                with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
+                    return ydl.extract_info(url, download=False)
+            except Exception as e:
+                logger.warning(f"Attempt {attempt + 1} to fetch metadata for {url} failed: {e}")
+                if attempt == 0:
+                    time.sleep(5)
+        return None
 
-def get_video_info_from_url(url: str) -> dict | None:
-    """Fetches video title and ID from a YouTube URL using yt-dlp."""
+    video_id = extract_video_id(url)
+    if not video_id:
+        return load()
+    info = METADATA_CACHE.get_or_load(video_id, load)
+    METADATA_CACHE_LOOKUPS.labels('miss' if loaded else 'hit').inc()
+    return info
+
+def video_facts(info: dict) -> dict:
+    """What the scheduler needs to know about a video: its length and whether it has any subtitles."""
+    captions = {**(info.get('subtitles') or {}), **(info.get('automatic_captions') or {})}
+    return {"duration": info.get('duration'), "has_subtitles": any(lang != 'live_chat' for lang in captions)}
+
+def get_video_info_from_url(url: str, info: dict | None = None) -> dict | None:
+    """
+    Fetches video title and ID from a YouTube URL using yt-dlp.
+    If an info dict was already fetched (see fetch_video_metadata), it is used instead.
+    """
     try:
-        ydl_opts = {'quiet': True, 'no_warnings': True}
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = ydl.extract_info(url, download=False)
-            video_id = info_dict.get('id', None)
-            title = info_dict.get('title', None)
-            if not video_id or not title:
-                raise ValueError("Could not extract video ID or title.")
+        if info is None:
+            ydl_opts = {'quiet': True, 'no_warnings': True}
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=False)
+        if not info:
+            raise ValueError("No metadata returned for the video.")
+        video_id = info.get('id', None)
+        title = info.get('title', None)
+        if not video_id or not title:
+            raise ValueError("Could not extract video ID or title.")
         
         # Create a safe folder name from the title
         safe_folder_name = "".join(c for c in title if c.isalnum() or c in (' ', '_')).rstrip()
@@ -78,31 +120,213 @@ def get_video_info_from_url(url: str) -> dict | None:
         logger.error(f"Error fetching video info from URL {url} using yt-dlp: {e}")
         return None
 
-async def run_analysis_for_url(url: str, title: str | None = None, language: str = 'en', job_id: str | None = None, template_content: str | None = None, user_additional_prompt: str | None = None, progress_callback=None):
+async def run_blocking(cancel_token, fn, *args, **kwargs):
+    """
+    Runs a blocking stage (yt-dlp, file I/O) on a worker thread, so the event loop can
+    serve other jobs meanwhile. Subprocesses it starts are still killed when
+    cancel_token is cancelled.
+    """
+    def call():
+        if cancel_token is None:
+            return fn(*args, **kwargs)
+        with cancel_token.bound_to_thread():
+            return fn(*args, **kwargs)
+    return await asyncio.to_thread(call)
+
+def cache_transcript(video_id: str, language: str, source: str, transcript_path: str, vtt_path: str | None = None):
+    """Offers a new transcript to TRANSCRIPT_CACHE. Failures only cost later jobs the reuse."""
+    try:
+        TRANSCRIPT_CACHE.store(video_id, language, source, transcript_path, vtt_path)
+    except Exception as e:
+        logger.warning(f"Could not cache the transcript of {video_id}: {e}")
+
+def has_preferred_captions(info: dict, lang_prefs: list[str]) -> bool:
+    """Whether the metadata lists subtitles or automatic captions in one of the preferred languages."""
+    captions = {**(info.get('subtitles') or {}), **(info.get('automatic_captions') or {})}
+    return any(lang in captions for lang in lang_prefs)
+
+def has_text(path: str | None) -> bool:
+    """Whether a transcript file exists and is more than whitespace."""
+    try:
+        return bool(path) and bool(Path(path).read_text(encoding='utf-8').strip())
+    except OSError:
+        return False
+
+async def race_transcript_sources(url: str, metadata: dict, language: str, lang_prefs: list[str],
+                                  subs_dir: Path, audio_dir: Path, transcripts_dir: Path,
+                                  timings: dict, send_progress, on_audio_downloaded=None) -> tuple:
+    """
+    Runs the subtitle stage side by side with the audio download and transcription,
+    and takes the transcript of whichever finishes first with any text in it.
+    The other one is cancelled: its subprocesses are killed and its files removed.
+    on_audio_downloaded(audio_path), a coroutine function, is awaited once the audio
+    is in, e.g. to checkpoint it.
+    Returns (source, transcript_path, subtitle_path, audio_path); source is None
+    if neither produced a transcript.
+    """
+    subtitle_token, audio_token = CancellationToken(), CancellationToken()
+
+    def probe_subtitles():
+        subtitle_token.attach()
+        subtitle_path = transcript_path = None
+        try:
+            with stage_timer('subtitles', timings):
+                subtitle_path = get_subtitle(url, output_dir=str(subs_dir), lang_prefs=lang_prefs, info=metadata)
+                if subtitle_path:
+                    transcript_path = clean_vtt_file(subtitle_path, output_dir=str(transcripts_dir))
+            return subtitle_path, transcript_path if has_text(transcript_path) else None
+        finally:
+            subtitle_token.detach()
+            if subtitle_token.cancelled:
+                for path in (subtitle_path, transcript_path):
+                    if path and os.path.exists(path):
+                        os.remove(path)
+
+    def download():
+        audio_token.attach()
+        try:
+            with stage_timer('audio_download', timings):
+                return download_audio(url, output_dir=str(audio_dir), concurrent_fragments=16, info=metadata)
+        finally:
+            audio_token.detach()
+            if audio_token.cancelled:
+                # Lost the race: drop the partial download (or the finished WAV).
+                shutil.rmtree(audio_dir, ignore_errors=True)
+
+    async def transcribe_audio():
+        audio_path = await asyncio.to_thread(download)
+        if not audio_path or audio_token.cancelled:
+            return None, None
+        try:
+            if on_audio_downloaded:
+                await on_audio_downloaded(audio_path)
+            send_progress(60, "Audio downloaded, now transcribing (this is the longest step)...")
+            with stage_timer('transcription', timings):
+                transcript_path = await transcribe_audio_single(
+                    audio_path=audio_path,
+                    output_dir=str(transcripts_dir),
+                    language=language
+                )
+            return audio_path, transcript_path
+        finally:
+            if audio_token.cancelled:
+                # Lost the race while transcribing: download() already returned, so the WAV is ours to drop.
+                shutil.rmtree(audio_dir, ignore_errors=True)
+
+    subtitle_task = asyncio.ensure_future(asyncio.to_thread(probe_subtitles))
+    audio_task = asyncio.ensure_future(transcribe_audio())
+    subtitle_path = None
+    pending = {subtitle_task, audio_task}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Subtitles win a tie, as they are the better transcript.
+            for task in (subtitle_task, audio_task):
+                if task not in done:
+                    continue
+                try:
+                    first, transcript_path = task.result()
+                except JobCancelled:
+                    raise
+                except Exception as e:
+                    logger.warning(f"{'Subtitle processing' if task is subtitle_task else 'Audio processing'} failed: {e}")
+                    continue
+                if task is subtitle_task:
+                    subtitle_path = first
+                    if transcript_path:
+                        return SOURCE_SUBTITLES, transcript_path, subtitle_path, None
+                    send_progress(30, "No suitable official subtitle found. Waiting for the audio download.")
+                elif transcript_path:
+                    return SOURCE_AUDIO, transcript_path, subtitle_path, first
+        return None, None, subtitle_path, None
+    finally:
+        if not subtitle_task.done():
+            logger.info("Stopping the subtitle probe.")
+            subtitle_token.cancel()
+            subtitle_task.cancel()
+        if not audio_task.done():
+            logger.info("Stopping the speculative audio download.")
+            audio_token.cancel()
+            audio_task.cancel()
+
+def cancelled_result(job_id: str | None, metrics: dict, audio_dir: Path | None) -> dict:
+    """Builds the result of a cancelled run and drops the partial downloads it left behind."""
+    logger.info(f"Analysis for job {job_id} was cancelled.")
+    if audio_dir:
+        shutil.rmtree(audio_dir, ignore_errors=True)
+    return {
+        "status": "cancelled",
+        "message": "The job was cancelled.",
+        "metrics": metrics
+    }
+
+async def run_analysis_for_url(url: str, title: str | None = None, language: str = 'en', job_id: str | None = None, template_content: str | None = None, user_additional_prompt: str | None = None, progress_callback=None, video_info_callback=None, cancel_token=None, checkpoint=None, checkpoint_callback=None):
     """
     Runs the analysis pipeline for a single YouTube URL.
     Accepts an optional title; if not provided, it will be fetched from YouTube.
+    video_info_callback, if given, is called with the result of get_video_info_from_url
+    plus video_facts() as soon as the video's metadata has been resolved.
+    cancel_token, a cancellation.CancellationToken, stops the run between stages and
+    kills its download and transcoding subprocesses once cancelled.
+    Jobs save a checkpoint after each stage to output/jobs/<job_id>/checkpoint.json
+    and pass it to checkpoint_callback; a job that runs again, e.g. after its worker
+    died, resumes after the last completed stage. checkpoint is the copy saved in
+    the database, used when the file is missing.
+    progress_callback runs on the event loop and must not block; video_info_callback
+    and checkpoint_callback may, and are called from worker threads.
     Returns a dictionary with status and result.
     """
     logger.info(f"--- run_analysis_for_url: START for job {job_id} ({url}) ---")
     start_time = time.time()
     
     audio_path = None  # Define audio_path here to be accessible in finally block
+    audio_dir = None
+    # Returned with the result and stored on the Job; "stages" holds seconds per pipeline stage.
+    metrics = {"extractor_calls": 0, "stages": {}}
+    timings = metrics["stages"]
+    if job_id:
+        checkpoint = Checkpoint.load(BASE_OUTPUT_DIR / 'jobs' / job_id, fallback=checkpoint, on_save=checkpoint_callback)
+    else:
+        checkpoint = Checkpoint()
+    resumed = checkpoint.completed()
+
+    async def save_checkpoint(stage, **outputs):
+        # Fsyncs a file and runs checkpoint_callback, which writes to the database.
+        await asyncio.to_thread(checkpoint.save, stage, **outputs)
+    if resumed:
+        metrics["resumed_stages"] = resumed
+        logger.info(f"Job {job_id} resumes after completed stages: {', '.join(resumed)}")
     
     def send_progress(percentage, message):
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
         if progress_callback:
             progress_callback(percentage, message)
         logger.info(f"[Progress for Job {job_id}] {message}")
 
+    if cancel_token:
+        install_subprocess_tracking()
+        cancel_token.attach()
+
     try:
         # --- 1. Fetch Video Info & Prepare Directories ---
         send_progress(10, "Fetching video info...")
-        video_info = get_video_info_from_url(url)
+        # Fetched once and shared by every stage below. A resumed job knows the video
+        # from its checkpoint, and the stages that still need metadata fetch their own.
+        metadata = None
+        video_info = checkpoint.get('metadata')
         if not video_info:
-            raise ValueError("Invalid YouTube URL or failed to fetch video info.")
+            with stage_timer('metadata', timings):
+                metadata = await run_blocking(cancel_token, fetch_video_metadata, url, stats=metrics)
+                video_info = get_video_info_from_url(url, info=metadata) if metadata else None
+            if not video_info:
+                raise ValueError("Invalid YouTube URL or failed to fetch video info.")
+            video_info = dict(video_info, **video_facts(metadata))
         
         video_id = video_info["video_id"]
         video_title = title or video_info["title"]
+        if video_info_callback:
+            await asyncio.to_thread(video_info_callback, video_info)
         
         if job_id:
             question_dir = BASE_OUTPUT_DIR / 'jobs' / job_id
@@ -119,40 +343,103 @@ async def run_analysis_for_url(url: str, title: str | None = None, language: str
         os.makedirs(audio_dir, exist_ok=True)
         os.makedirs(transcripts_dir, exist_ok=True)
         os.makedirs(summary_dir, exist_ok=True)
+        if 'metadata' not in resumed:
+            await save_checkpoint('metadata', **video_info)
 
         transcript_path = None
+        subtitle_path = None
 
-        # --- 2. Try to get official subtitles ---
-        send_progress(20, "Checking for official subtitles...")
+        # --- 2. Reuse the transcript of an earlier job for this video, in any template ---
+        if not checkpoint.get('subtitles') and not checkpoint.get('transcription'):
+            cached = await asyncio.to_thread(TRANSCRIPT_CACHE.lookup, video_id, language)
+            TRANSCRIPT_CACHE_LOOKUPS.labels('hit' if cached else 'miss').inc()
+            if cached:
+                # Recorded like a completed stage, so the stages below skip straight to the analysis.
+                source, entry = cached
+                send_progress(20, "Reusing the transcript of an earlier analysis of this video...")
+                cached_transcript, cached_subtitle = await asyncio.to_thread(TRANSCRIPT_CACHE.restore, entry, transcripts_dir, subs_dir)
+                await save_checkpoint('subtitles' if source == SOURCE_SUBTITLES else 'transcription',
+                                subtitle_path=cached_subtitle, transcript_path=cached_transcript)
+                metrics["transcript_cache"] = source
+
+        # --- 3. Try to get official subtitles ---
         lang_prefs = ['zh-Hant', 'zh-TW', 'zh'] if language == 'zh' else ['en', 'en-US']
-        try:
-            subtitle_path = get_subtitle(url, output_dir=str(subs_dir), lang_prefs=lang_prefs)
-            if subtitle_path:
-                send_progress(30, "Official subtitle found, cleaning...")
-                cleaned_path = clean_vtt_file(subtitle_path, output_dir=str(transcripts_dir))
-                transcript_path = cleaned_path
+        saved_subtitles = checkpoint.get('subtitles')
+        speculate = (SPECULATIVE_AUDIO_DOWNLOAD and metadata is not None and not saved_subtitles
+                     and not checkpoint.get('transcription') and not checkpoint.get('audio_download')
+                     and not has_preferred_captions(metadata, lang_prefs))
+        if speculate:
+            send_progress(20, "No captions in this language are listed; checking subtitles and downloading audio in parallel...")
+            source, transcript_path, subtitle_path, audio_path = await race_transcript_sources(
+                url, metadata, language, lang_prefs, subs_dir, audio_dir, transcripts_dir, timings, send_progress,
+                on_audio_downloaded=lambda path: save_checkpoint('audio_download', audio_path=path)
+            )
+            metrics["speculative_winner"] = source
+            if source == SOURCE_SUBTITLES:
+                await save_checkpoint('subtitles', subtitle_path=subtitle_path, transcript_path=transcript_path)
                 send_progress(40, "Official subtitle ready.")
-            else:
-                send_progress(30, "No suitable official subtitle found. Proceeding to audio download.")
-        except Exception as e:
-            logger.warning(f"Subtitle processing failed: {e}. Proceeding to audio download.")
+            elif source == SOURCE_AUDIO:
+                await save_checkpoint('transcription', transcript_path=transcript_path)
+                send_progress(80, "Transcription complete.")
+            if not source:
+                raise Exception("Could not generate a transcript from subtitles or audio.")
+            await asyncio.to_thread(cache_transcript, video_id, language, source, transcript_path,
+                                    subtitle_path if source == SOURCE_SUBTITLES else None)
+        elif saved_subtitles:
+            subtitle_path = saved_subtitles["subtitle_path"]
+            transcript_path = saved_subtitles["transcript_path"]
+        elif not checkpoint.get('transcription'):
+            send_progress(20, "Checking for official subtitles...")
+            try:
+                with stage_timer('subtitles', timings):
+                    subtitle_path = await run_blocking(cancel_token, get_subtitle, url, output_dir=str(subs_dir),
+                                                       lang_prefs=lang_prefs, info=metadata)
+                    if subtitle_path:
+                        send_progress(30, "Official subtitle found, cleaning...")
+                        cleaned_path = await asyncio.to_thread(clean_vtt_file, subtitle_path, output_dir=str(transcripts_dir))
+                        transcript_path = cleaned_path
+                        send_progress(40, "Official subtitle ready.")
+                    else:
+                        send_progress(30, "No suitable official subtitle found. Proceeding to audio download.")
+                await save_checkpoint('subtitles', subtitle_path=subtitle_path, transcript_path=transcript_path)
+                if transcript_path:
+                    await asyncio.to_thread(cache_transcript, video_id, language, SOURCE_SUBTITLES, transcript_path, subtitle_path)
+            except JobCancelled:
+                raise
+            except Exception as e:
+                logger.warning(f"Subtitle processing failed: {e}. Proceeding to audio download.")
 
-        # --- 3. If no transcript from subtitles, process audio ---
-        if not transcript_path:
-            send_progress(40, "Downloading audio (this may take a moment)...")
-            audio_path = download_audio(url, output_dir=str(audio_dir), concurrent_fragments=16)
+        # --- 4. If no transcript from subtitles, process audio ---
+        saved_transcription = checkpoint.get('transcription') if not transcript_path else None
+        if saved_transcription:
+            transcript_path = saved_transcription["transcript_path"]
+        elif not transcript_path:
+            saved_audio = checkpoint.get('audio_download')
+            if saved_audio:
+                audio_path = saved_audio["audio_path"]
+            else:
+                send_progress(40, "Downloading audio (this may take a moment)...")
+                with stage_timer('audio_download', timings):
+                    audio_path = await run_blocking(cancel_token, download_audio, url, output_dir=str(audio_dir),
+                                                    concurrent_fragments=16, info=metadata)
+                if audio_path:
+                    await save_checkpoint('audio_download', audio_path=audio_path)
             if audio_path:
                 send_progress(60, "Audio downloaded, now transcribing (this is the longest step)...")
-                transcript_path = await transcribe_audio_single(
-                    audio_path=audio_path,
-                    output_dir=str(transcripts_dir),
-                    language=language
-                )
+                with stage_timer('transcription', timings):
+                    transcript_path = await transcribe_audio_single(
+                        audio_path=audio_path,
+                        output_dir=str(transcripts_dir),
+                        language=language
+                    )
+                if transcript_path:
+                    await save_checkpoint('transcription', transcript_path=transcript_path)
+                    await asyncio.to_thread(cache_transcript, video_id, language, SOURCE_AUDIO, transcript_path)
                 send_progress(80, "Transcription complete.")
             else:
                 raise Exception("Audio download failed to return a valid path.")
 
-        # --- 4. Analyze the final transcript ---
+        # --- 5. Analyze the final transcript ---
         if not transcript_path:
             raise Exception("Could not generate a transcript from subtitles or audio.")
 
@@ -160,8 +447,14 @@ async def run_analysis_for_url(url: str, title: str | None = None, language: str
         summary_content = ""
         final_analysis_path = ""
 
-        if not SIMULATE_AI_PROCESSING:
-            analysis_result = analyze_transcript_with_gemini(transcript_path, template_content, user_additional_prompt)
+        saved_analysis = checkpoint.get('analysis')
+        if saved_analysis:
+            final_analysis_path = saved_analysis["analysis_path"]
+            summary_content = await asyncio.to_thread(Path(final_analysis_path).read_text, encoding='utf-8')
+            full_transcript_content = await asyncio.to_thread(Path(transcript_path).read_text, encoding='utf-8')
+        elif not SIMULATE_AI_PROCESSING:
+            with stage_timer('analysis', timings):
+                analysis_result = await analyze_transcript_with_gemini_async(transcript_path, template_content, user_additional_prompt, model_name=ANALYSIS_MODEL_NAME)
             final_analysis_path = analysis_result.get("analysis_path")
             summary_content = analysis_result.get("summary_content")
             full_transcript_content = analysis_result.get("transcript_content")
@@ -172,6 +465,7 @@ async def run_analysis_for_url(url: str, title: str | None = None, language: str
                 raise ValueError("AI analysis did not return summary content.")
             if not full_transcript_content:
                 raise ValueError("AI analysis did not return full transcript content.")
+            await save_checkpoint('analysis', analysis_path=final_analysis_path)
         else:
             # Simulate analysis
             transcript_filename = Path(transcript_path).stem
@@ -185,24 +479,36 @@ async def run_analysis_for_url(url: str, title: str | None = None, language: str
         end_time = time.time()
         logger.info(f"--- Total Execution Time: {end_time - start_time:.2f} seconds ---")
         
+        # The texts go to the artifact store; the result only keeps their hashes and previews.
+        result = await asyncio.to_thread(ARTIFACT_STORE.externalize_result, {
+            "title": video_title,
+            "url": url,
+            "summary": summary_content,
+            "final_content_path": str(final_analysis_path),
+            "transcript_path": str(transcript_path),
+            "full_transcript": full_transcript_content
+        }, files={"vtt": subtitle_path})
         return {
             "status": "success",
-            "result": {
-                "title": video_title,
-                "url": url,
-                "summary": summary_content,
-                "final_content_path": str(final_analysis_path),
-                "full_transcript": full_transcript_content
-            }
+            "result": result,
+            "metrics": metrics
         }
 
+    except (JobCancelled, asyncio.CancelledError):
+        return cancelled_result(job_id, metrics, audio_dir)
     except Exception as e:
+        if cancel_token and cancel_token.cancelled:
+            # A killed download or ffmpeg surfaces as an ordinary yt-dlp error.
+            return cancelled_result(job_id, metrics, audio_dir)
         logger.exception(f"An error occurred in run_analysis_for_url for job {job_id}: {e}")
         return {
             "status": "error",
-            "message": str(e)
+            "message": str(e),
+            "metrics": metrics
         }
     finally:
+        if cancel_token:
+            cancel_token.detach()
         if audio_path and os.path.exists(audio_path):
             try:
                 logger.info(f"Cleaning up audio file: {audio_path}")
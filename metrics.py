@@ -0,0 +1,112 @@
+"""
+Prometheus metrics for the analysis pipeline, served by app.py at /metrics.
+
+Under gunicorn every worker process has its own counters, so when
+PROMETHEUS_MULTIPROC_DIR is set (see entrypoint.sh) they are written there and
+summed at scrape time. Job queue gauges are read from the Job table, so they
+cover every process, including separate analysis workers.
+"""
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from prometheus_client import Counter, Histogram, CollectorRegistry, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+# Pipeline stages, in the order run_analysis_for_url runs them.
+STAGES = ('metadata', 'subtitles', 'audio_download', 'transcription', 'analysis')
+
+STAGE_SECONDS = Histogram(
+    'analysis_stage_seconds', "Time spent in each stage of the analysis pipeline.", ['stage'],
+    buckets=(0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1200)
+)
+JOB_SECONDS = Histogram(
+    'analysis_job_seconds', "End-to-end processing time of analysis jobs.", ['status'],
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1200, 2400)
+)
+RESULT_CACHE_LOOKUPS = Counter('result_cache_lookups_total', "Result cache lookups.", ['outcome'])
+METADATA_CACHE_LOOKUPS = Counter('metadata_cache_lookups_total', "yt-dlp metadata cache lookups.", ['outcome'])
+TRANSCRIPT_CACHE_LOOKUPS = Counter('transcript_cache_lookups_total', "Transcript cache lookups.", ['outcome'])
+JANITOR_RECLAIMED_BYTES = Counter('output_janitor_reclaimed_bytes_total',
+                                  "Bytes of job output deleted by the janitor.", ['reason'])
+
+# Window of finished jobs over which the result cache hit ratio gauge is computed.
+CACHE_RATIO_WINDOW = timedelta(hours=1)
+
+
+@contextmanager
+def stage_timer(stage: str, timings: dict):
+    """Times a pipeline stage, recording it in timings[stage] and in STAGE_SECONDS."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timings[stage] = round(timings.get(stage, 0) + elapsed, 3)
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+
+
+class JobStateCollector:
+    """
+    Gauges computed at scrape time: job counts by state from the database, and
+    the load of the current process's executor and progress sink.
+    """
+
+    def __init__(self, app, job_executor, single_flight, progress_sink):
+        self.app = app
+        self.job_executor = job_executor
+        self.single_flight = single_flight
+        self.progress_sink = progress_sink
+
+    def collect(self):
+        from models import db, Job
+
+        with self.app.app_context():
+            counts = dict(db.session.query(Job.status, db.func.count())
+                          .filter(Job.status.in_(('starting', 'running')))
+                          .group_by(Job.status).all())
+            since = datetime.utcnow() - CACHE_RATIO_WINDOW
+            finished, cache_hits = db.session.query(
+                db.func.count(), db.func.coalesce(db.func.sum(db.case((Job.cache_hit, 1), else_=0)), 0)
+            ).filter(Job.status == 'success', Job.created_at >= since).one()
+            flights = self.single_flight.in_flight()
+
+        yield GaugeMetricFamily('job_queue_depth', "Jobs waiting for a free analysis slot, across all processes.",
+                                value=counts.get('starting', 0))
+        yield GaugeMetricFamily('jobs_in_flight', "Jobs being analyzed, across all processes.",
+                                value=counts.get('running', 0))
+        ratio = GaugeMetricFamily('result_cache_hit_ratio',
+                                  "Share of successful jobs in the last hour served from the result cache.")
+        ratio.add_metric([], cache_hits / finished if finished else 0)
+        yield ratio
+
+        executor = self.job_executor.stats()
+        local = GaugeMetricFamily('job_executor_slots', "Analysis slots of the scraped process.", labels=['state'])
+        for state in ('queued', 'running'):
+            local.add_metric([state], executor[state])
+        local.add_metric(['max_workers'], executor['max_workers'])
+        yield local
+        yield GaugeMetricFamily('single_flight_in_flight', "Distinct analyses that identical jobs can coalesce onto, across all processes.",
+                                value=flights)
+        sink = self.progress_sink.stats()
+        progress = GaugeMetricFamily('progress_sink', "Progress updates batched by the scraped process.", labels=['counter'])
+        for name in ('updates_received', 'rows_written', 'rows_skipped', 'follower_rows_written', 'transactions', 'pending'):
+            progress.add_metric([name], sink[name])
+        yield progress
+
+
+def render(extra_collectors=()) -> tuple[bytes, str]:
+    """Returns the Prometheus text exposition and its content type."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        for collector in extra_collectors:
+            registry.register(collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    body = generate_latest(REGISTRY)
+    extra = CollectorRegistry()
+    for collector in extra_collectors:
+        extra.register(collector)
+    return body + generate_latest(extra), CONTENT_TYPE_LATEST
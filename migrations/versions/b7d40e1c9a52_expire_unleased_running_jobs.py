@@ -0,0 +1,31 @@
+"""Expire unleased running jobs
+
+Revision ID: b7d40e1c9a52
+Revises: e5b2a9c4d713
+Create Date: 2026-10-17 11:02:41.207315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d40e1c9a52'
+down_revision = 'e5b2a9c4d713'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Jobs that were running before leases existed have none, so no lease sweep
+    # would ever pick them up. Their web worker is gone after the deploy, so give
+    # them an expired lease and let the next sweep re-queue them.
+    op.execute("""
+        UPDATE job
+        SET lease_expires_at = '1970-01-01 00:00:00'
+        WHERE status = 'running' AND lease_expires_at IS NULL
+    """)
+
+
+def downgrade():
+    pass
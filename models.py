@@ -15,6 +15,11 @@ class User(db.Model):
     jobs = db.relationship('Job', backref='user', lazy=True)
     templates = db.relationship('Template', backref='user', lazy=True)
 
+# Columns that can hold large values are deferred: they are only read from the
+# database when accessed or explicitly undeferred, so listing and polling queries
+# don't pull them into memory. result and error_message form the 'outcome' group,
+# which is what job status responses render.
+
 class Job(db.Model):
     id = db.Column(db.String(36), primary_key=True) # Corresponds to job_id
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True) # Nullable for anonymous users
@@ -23,18 +28,65 @@ class Job(db.Model):
     progress_percentage = db.Column(db.Integer, default=0)
     progress_message = db.Column(db.String(255), nullable=True)
     processing_time_seconds = db.Column(db.Float, nullable=True)
-    result = db.Column(db.JSON, nullable=True)
-    error_message = db.Column(db.Text, nullable=True)
+    stage_metrics = db.deferred(db.Column(db.JSON, nullable=True)) # Per-stage counters and timings reported by the pipeline
+    result = db.deferred(db.Column(db.JSON, nullable=True), group='outcome')
+    error_message = db.deferred(db.Column(db.Text, nullable=True), group='outcome')
     video_title = db.Column(db.String(255), nullable=True)
     video_url = db.Column(db.String(255), nullable=True)
+    video_id = db.Column(db.String(32), nullable=True) # pipeline.extract_video_id(video_url)
+    options = db.deferred(db.Column(db.JSON, nullable=True)) # Analysis arguments (language, template, prompt) needed to (re)run the job
+    checkpoint = db.deferred(db.Column(db.JSON, nullable=True)) # Stages completed so far, so an interrupted job can resume; see checkpoint.py
+    # Lease held by the worker process running the job; see job_leases.py
+    claimed_by = db.Column(db.String(100), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    cache_key = db.Column(db.String(64), nullable=True) # See result_cache.make_cache_key
+    cache_hit = db.Column(db.Boolean, nullable=False, default=False) # Result was served from ResultCacheEntry
+    coalesced_with = db.Column(db.String(36), nullable=True) # Leader job whose analysis this job waits for; see single_flight.py
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_job_status_created_at', 'status', 'created_at'),
+        db.Index('ix_job_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_job_ip_address_created_at', 'ip_address', 'created_at'),
+        db.Index('ix_job_video_id_created_at', 'video_id', 'created_at'),
+        db.Index('ix_job_coalesced_with', 'coalesced_with'),
+    )
+
+class UsageCounter(db.Model):
+    """Analyses charged per principal ('user:<id>' or 'ip:<address>') per UTC day; see quota.py."""
+    __tablename__ = 'usage_counter'
+    principal = db.Column(db.String(64), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class ResultCacheEntry(db.Model):
+    __tablename__ = 'result_cache'
+    cache_key = db.Column(db.String(64), primary_key=True)
+    video_id = db.Column(db.String(32), nullable=False, index=True)
+    language = db.Column(db.String(10), nullable=False)
+    template_hash = db.Column(db.String(64), nullable=False)
+    prompt_hash = db.Column(db.String(64), nullable=False)
+    model_name = db.Column(db.String(64), nullable=False)
+    result = db.Column(db.JSON, nullable=False)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_hit_at = db.Column(db.DateTime, nullable=True)
+
+class AnalysisFlight(db.Model):
+    """The job doing the analysis for a result cache key while it is in flight; see single_flight.py."""
+    __tablename__ = 'analysis_flight'
+    cache_key = db.Column(db.String(64), primary_key=True)
+    leader_job_id = db.Column(db.String(36), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class Template(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     name = db.Column(db.String(120), nullable=False)
-    content = db.Column(db.Text, nullable=False)
+    content = db.deferred(db.Column(db.Text, nullable=False))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
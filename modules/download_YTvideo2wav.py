@@ -1,4 +1,5 @@
 import yt_dlp
+import copy
 import os
 from pathlib import Path
 import re
@@ -13,7 +14,7 @@ def sanitize_filename(name: str) -> str:
     """Replaces unsafe characters in a filename with underscores."""
     return re.sub(r'[^\w\d.-]+', '_', name)
 
-def download_audio(url: str, output_dir: str, ffmpeg_path: str = None, concurrent_fragments: int = 8) -> str | None:
+def download_audio(url: str, output_dir: str, ffmpeg_path: str = None, concurrent_fragments: int = 8, info: dict | None = None) -> str | None:
     """
     Downloads audio from a YouTube URL, converts it to WAV, and saves it.
     Includes retry logic for HTTP 429 errors.
@@ -23,6 +24,8 @@ def download_audio(url: str, output_dir: str, ffmpeg_path: str = None, concurren
         output_dir: The directory to save the WAV file.
         ffmpeg_path: Optional path to the FFmpeg executable.
         concurrent_fragments: The number of concurrent fragments to download to speed up the process.
+        info: Optional info dict from an earlier extract_info call. When given, the
+              extractor is not run again and only the media is downloaded.
 
     Returns:
         The full path to the saved WAV file, or None if an error occurred.
@@ -51,7 +54,10 @@ def download_audio(url: str, output_dir: str, ffmpeg_path: str = None, concurren
     for attempt in range(max_retries):
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info_dict = ydl.extract_info(url, download=True)
+                if info and info.get('formats') is not None:
+                    info_dict = ydl.process_ie_result(copy.deepcopy(info), download=True)
+                else:
+                    info_dict = ydl.extract_info(url, download=True)
                 original_filepath = ydl.prepare_filename(info_dict)
                 wav_filepath = original_filepath.rsplit('.', 1)[0] + '.wav'
 
@@ -0,0 +1,49 @@
+import asyncio
+import os
+import threading
+import weakref
+
+import google.generativeai as genai
+from dotenv import load_dotenv
+
+from async_runtime import loop_semaphore
+
+# Gemini requests in flight at once on one event loop, i.e. per process for jobs
+# on async_runtime.RUNTIME.
+GEMINI_CONCURRENCY = int(os.environ.get('GEMINI_CONCURRENCY', 4))
+
+_lock = threading.Lock()
+_configured_key = None
+# Each model opens its async gRPC channel on first use, and the channel only works on
+# that loop, so models are shared per loop: by every job on the shared runtime loop.
+_models = weakref.WeakKeyDictionary()  # loop -> {model_name: GenerativeModel}
+
+
+def configure():
+    """Configures the SDK with GEMINI_API_KEY once; configuring again would drop its clients."""
+    global _configured_key
+    with _lock:
+        if _configured_key is not None:
+            return
+        load_dotenv()
+        api_key = os.environ.get("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables.")
+        genai.configure(api_key=api_key)
+        _configured_key = api_key
+
+
+def get_model(model_name: str) -> genai.GenerativeModel:
+    """Returns the shared model for the running event loop."""
+    configure()
+    loop = asyncio.get_running_loop()
+    with _lock:
+        models = _models.setdefault(loop, {})
+        if model_name not in models:
+            models[model_name] = genai.GenerativeModel(model_name)
+        return models[model_name]
+
+
+def gemini_slot() -> asyncio.Semaphore:
+    """Use as `async with gemini_slot():` around a request to respect GEMINI_CONCURRENCY."""
+    return loop_semaphore('gemini', GEMINI_CONCURRENCY)
@@ -0,0 +1,68 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class MetadataCache:
+    """
+    A thread-safe TTL cache of yt-dlp info dicts keyed by video ID.
+
+    Entries are deep-copied on the way in and out because yt-dlp mutates the info
+    dicts it processes. Concurrent loads of the same video wait for the first one
+    instead of issuing their own extractor call.
+    """
+
+    def __init__(self, ttl_seconds: float = 600, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # video_id -> (expires_at, info)
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def get(self, video_id: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is None:
+                return None
+            expires_at, info = entry
+            if expires_at < time.monotonic():
+                del self._entries[video_id]
+                return None
+            self._entries.move_to_end(video_id)
+        return copy.deepcopy(info)
+
+    def put(self, video_id: str, info: dict):
+        info = copy.deepcopy(info)
+        with self._lock:
+            self._entries[video_id] = (time.monotonic() + self.ttl_seconds, info)
+            self._entries.move_to_end(video_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, video_id: str, loader) -> dict | None:
+        """
+        Returns the cached info for video_id, calling loader() to fetch it on a miss.
+        A loader result of None is not cached.
+        """
+        info = self.get(video_id)
+        if info is not None:
+            return info
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(video_id, threading.Lock())
+        with load_lock:
+            # Another thread may have loaded it while we waited.
+            info = self.get(video_id)
+            if info is None:
+                info = loader()
+                if info is not None:
+                    self.put(video_id, info)
+        with self._lock:
+            if not load_lock.locked():
+                self._load_locks.pop(video_id, None)
+        return info
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -1,9 +1,9 @@
 import os
-import google.generativeai as genai
 from pathlib import Path
 import time
 from dotenv import load_dotenv
 import asyncio
+from modules.gemini_client import get_model, gemini_slot
 
 # --- Load environment variables ---
 load_dotenv()
@@ -24,17 +24,14 @@ async def transcribe_audio_single(audio_path: str, output_dir: str, language: st
     print(f"--- Starting async Gemini transcription for: {Path(audio_path).name} ---")
     
     try:
-        # --- 1. Configure Gemini API ---
-        api_key = os.environ.get("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables.")
-        genai.configure(api_key=api_key)
+        # --- 1. Get the process-wide Gemini model (configured on first use) ---
+        model = get_model("gemini-2.5-flash-lite")
 
         # --- 2. Read Audio File ---
         read_start_time = time.time()
         print(f"Reading audio file: {Path(audio_path).name}...")
-        with open(audio_path, "rb") as f:
-            audio_data = f.read()
+        # WAVs run to hundreds of MB; read them off the event loop.
+        audio_data = await asyncio.to_thread(Path(audio_path).read_bytes)
         audio_file_data = {
             'mime_type': 'audio/wav',
             'data': audio_data
@@ -44,18 +41,17 @@ async def transcribe_audio_single(audio_path: str, output_dir: str, language: st
         # --- 3. Generate Content (Transcribe) ---
         generation_start_time = time.time()
         print(f"Requesting transcription for {Path(audio_path).name}...")
-        model = genai.GenerativeModel(model_name="gemini-2.5-flash-lite")
-        
         prompt = (
             "Please provide a complete and accurate transcript of the audio provided. "
             "The audio is in {language}. "
             "Do not add any comments, summaries, or extra text—only the spoken words."
         ).format(language=language)
 
-        response = await model.generate_content_async(
-            [prompt, audio_file_data],
-            request_options={"timeout": 900} # 15-minute timeout
-        )
+        async with gemini_slot():
+            response = await model.generate_content_async(
+                [prompt, audio_file_data],
+                request_options={"timeout": 900} # 15-minute timeout
+            )
         
         print(f"Received transcript for {Path(audio_path).name} in {time.time() - generation_start_time:.2f}s.")
 
@@ -64,8 +60,7 @@ async def transcribe_audio_single(audio_path: str, output_dir: str, language: st
         output_path.mkdir(exist_ok=True)
         transcript_file_path = output_path / (Path(audio_path).stem + "_transcript.txt")
         
-        with open(transcript_file_path, "w", encoding="utf-8") as f:
-            f.write(response.text)
+        await asyncio.to_thread(transcript_file_path.write_text, response.text, encoding="utf-8")
             
         print(f"Saved transcript for {Path(audio_path).name} to: {transcript_file_path}")
         
@@ -1,5 +1,6 @@
 from yt_dlp import YoutubeDL, utils
 from pathlib import Path
+import copy
 import sys
 import os
 import re
@@ -9,22 +10,24 @@ def _sanitize_filename(name: str) -> str:
     """Helper to replace unsafe characters in a filename with underscores."""
     return re.sub(r'[^\w\d.-]+', '_', name)
 
-def get_subtitle(url: str, output_dir: str, lang_prefs: list[str] = None) -> str | None:
+def get_subtitle(url: str, output_dir: str, lang_prefs: list[str] = None, info: dict | None = None) -> str | None:
     """
     Finds and downloads a subtitle based on language preferences.
     It first tries to find a subtitle from the preferred languages list.
     If none are found, it downloads the first available subtitle in any language.
     Includes a retry mechanism.
 
+    If the video's info dict was already fetched it can be passed as `info`,
+    which skips both yt-dlp extractor calls; only the subtitle file is downloaded.
+
     Returns:
         The path to the downloaded VTT file, or None if no subtitles are found at all.
     """
     if lang_prefs is None:
         lang_prefs = ['zh-Hant', 'zh-TW', 'zh', 'zh-Hans']
 
-    info = None
     # Try to get video info, with one retry on failure.
-    for attempt in range(2):
+    for attempt in range(0 if info else 2):
         try:
             with YoutubeDL({"skip_download": True, "quiet": True, "no_warnings": True}) as ydl:
                 info = ydl.extract_info(url, download=False)
@@ -96,7 +99,11 @@ def get_subtitle(url: str, output_dir: str, lang_prefs: list[str] = None) -> str
     for attempt in range(2):
         try:
             with YoutubeDL(ydl_opts) as ydl:
-                download_info = ydl.extract_info(url, download=True)
+                if info.get('formats') is not None:
+                    # Reuse the resolved metadata rather than running the extractor again.
+                    download_info = ydl.process_ie_result(copy.deepcopy(info), download=True)
+                else:
+                    download_info = ydl.extract_info(url, download=True)
                 
                 # Get the exact path from yt-dlp's output info
                 requested_subs = download_info.get('requested_subtitles')
@@ -0,0 +1,30 @@
+"""
+Import-light interface from the web tier to the analysis pipeline.
+
+main.py pulls in yt-dlp, the Gemini SDK (grpc, protobuf) and every pipeline step,
+which costs each web worker seconds of startup and a lot of memory. Everything the
+web tier needs before a job actually runs lives here, and main.py itself is only
+imported the first time an analysis starts.
+"""
+import re
+from pathlib import Path
+
+BASE_OUTPUT_DIR = Path(__file__).parent / "output"
+
+# The Gemini model used for the analysis step. Cached results are keyed on this
+# name, so changing it invalidates them naturally.
+ANALYSIS_MODEL_NAME = 'gemini-2.5-flash-lite'
+
+YOUTUBE_VIDEO_ID_PATTERN = re.compile(r'(?:youtube\.com/watch\?(?:.*&)?v=|youtu\.be/)([\w-]{11})')
+
+
+def extract_video_id(url: str) -> str | None:
+    """Extracts the 11-character video ID from a YouTube URL without any network access."""
+    match = YOUTUBE_VIDEO_ID_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
+
+async def run_analysis_for_url(*args, **kwargs):
+    """Runs main.run_analysis_for_url, importing the pipeline on first use."""
+    from main import run_analysis_for_url as run
+    return await run(*args, **kwargs)
@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import bindparam, or_, update
+from models import db, Job
+from single_flight import WAITING_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressSink:
+    """
+    Coalesces job progress updates and writes them to the Job table in batches.
+
+    Only the latest (percentage, message) per job is kept. A background thread
+    writes everything pending once per min_interval in a single transaction, so a
+    burst of progress messages from many jobs costs one commit instead of one per
+    message. Callers that reach a terminal state use finish() to drop pending
+    progress and write the final values together with the job's status.
+    A job's progress is also written to the jobs coalesced onto it (see
+    single_flight.py), in whichever process their watchers are.
+    """
+
+    def __init__(self, app, min_interval: float = 2.0):
+        self.app = app
+        self.min_interval = min_interval
+        self._pending = {}  # job_id -> (percentage, message)
+        self._lock = threading.Lock()
+        # Held while a batch is written so finish() can't interleave with a stale flush.
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self.updates_received = 0
+        self.rows_written = 0
+        self.rows_skipped = 0  # Progress of jobs whose row was gone or cancelled by the time it was written
+        self.follower_rows_written = 0
+        self.transactions = 0
+
+    def _ensure_flusher(self):
+        """Starts the background flusher if needed. Caller holds the lock."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._flush_loop, name="progress-sink", daemon=True)
+            self._thread.start()
+
+    def update(self, job_id: str, percentage: int, message: str, force: bool = False):
+        """Records the latest progress of a job. With force=True it is written immediately."""
+        with self._lock:
+            self._pending[job_id] = (percentage, message)
+            self.updates_received += 1
+            self._ensure_flusher()
+        if force:
+            self.flush()
+
+    def finish(self, job_id: str):
+        """
+        Drops any pending progress for a job that is about to be committed in a
+        terminal state, so a late batch can't overwrite its final progress.
+        """
+        with self._write_lock:
+            with self._lock:
+                self._pending.pop(job_id, None)
+
+    def flush(self):
+        """Writes all pending progress in one transaction."""
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            now = datetime.utcnow()
+            rows = [
+                {"job_id": job_id, "progress_percentage": percentage, "progress_message": message, "updated_at": now}
+                for job_id, (percentage, message) in batch.items()
+            ]
+            job_table = Job.__table__
+            with self.app.app_context():
+                try:
+                    # Core executemany: one statement, one commit, and rows deleted
+                    # meanwhile (e.g. through the admin) are skipped instead of failing the batch.
+                    # A cancelled job keeps its "Cancelled by user." even while it still runs
+                    # for the jobs coalesced onto it.
+                    written = db.session.execute(
+                        update(job_table).where(job_table.c.id == bindparam('job_id'),
+                                                job_table.c.status != 'cancelled'), rows
+                    ).rowcount
+                    # IN (...) can't be expanded in an executemany, hence the or_.
+                    followers_written = db.session.execute(
+                        update(job_table).where(job_table.c.coalesced_with == bindparam('job_id'),
+                                                or_(*(job_table.c.status == status for status in WAITING_STATUSES))),
+                        rows
+                    ).rowcount
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception(f"Failed to write progress for {len(rows)} job(s); retrying with the next flush")
+                    with self._lock:
+                        # Newer progress received in the meantime wins.
+                        self._pending = {**batch, **self._pending}
+                    return
+            with self._lock:
+                self.rows_written += written
+                self.rows_skipped += len(rows) - written
+                self.follower_rows_written += followers_written
+                self.transactions += 1
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.min_interval)
+            self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "updates_received": self.updates_received,
+                "rows_written": self.rows_written,
+                "rows_skipped": self.rows_skipped,
+                "follower_rows_written": self.follower_rows_written,
+                "transactions": self.transactions,
+                "writes_saved": self.updates_received - self.rows_written - self.rows_skipped - len(self._pending),
+                "pending": len(self._pending),
+            }
@@ -0,0 +1,62 @@
+from datetime import datetime, date
+from sqlalchemy import update
+from sqlalchemy.dialects.sqlite import insert
+from models import db, UsageCounter
+
+# Anonymous visitors get this many analyses per day per IP address.
+ANONYMOUS_DAILY_LIMIT = 1
+
+
+def principal_for(user_id: int | None, ip_address: str | None) -> str:
+    """Returns the key that quota is charged to: the user if logged in, otherwise the IP."""
+    return f"user:{user_id}" if user_id else f"ip:{ip_address}"
+
+
+def today() -> date:
+    return datetime.utcnow().date()
+
+
+def get_usage(principal: str, day: date | None = None) -> int:
+    """Returns how many analyses the principal has been charged for on day (default: today)."""
+    counter = db.session.get(UsageCounter, (principal, day or today()))
+    return counter.count if counter else 0
+
+
+def try_consume(principal: str, limit: int, day: date | None = None) -> bool:
+    """
+    Charges one analysis to the principal unless that would exceed limit.
+
+    The check and the increment are a single conditional UPDATE, so concurrent
+    submissions can't both slip under the limit. The caller commits, normally
+    together with the Job row being charged for.
+
+    Returns:
+        True if the analysis was charged, False if the limit has been reached.
+    """
+    day = day or today()
+    # Make sure the row exists; the app runs on SQLite, so use its upsert syntax.
+    db.session.execute(
+        insert(UsageCounter)
+        .values(principal=principal, day=day, count=0)
+        .on_conflict_do_nothing(index_elements=['principal', 'day'])
+    )
+    charged = db.session.execute(
+        update(UsageCounter)
+        .where(UsageCounter.principal == principal, UsageCounter.day == day, UsageCounter.count < limit)
+        .values(count=UsageCounter.count + 1)
+    ).rowcount
+    return charged == 1
+
+
+def refund(principal: str, day: date):
+    """Gives back one analysis charged on day, e.g. because the job failed. The caller commits."""
+    db.session.execute(
+        update(UsageCounter)
+        .where(UsageCounter.principal == principal, UsageCounter.day == day, UsageCounter.count > 0)
+        .values(count=UsageCounter.count - 1)
+    )
+
+
+def refund_job(job):
+    """Refunds the analysis charged for a Job row on the day it was created."""
+    refund(principal_for(job.user_id, job.ip_address), (job.created_at or datetime.utcnow()).date())
@@ -0,0 +1,93 @@
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from sqlalchemy import update
+from models import db, ResultCacheEntry
+from metrics import RESULT_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+def hash_text(text: str | None) -> str:
+    """Returns the SHA-256 hex digest of text, or an empty string for None."""
+    if text is None:
+        return ""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def make_cache_key(video_id: str, language: str, template_content: str | None,
+                   user_additional_prompt: str | None, model_name: str) -> str:
+    """
+    Builds the content address of an analysis result. Two jobs with the same key
+    would send Gemini the same transcript and prompt, so they can share a result.
+    """
+    parts = [video_id, language, hash_text(template_content), hash_text(user_additional_prompt), model_name]
+    return hashlib.sha256("\x1f".join(parts).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Analysis results keyed by make_cache_key, stored in the result_cache table.
+    Hit and miss counters are kept per process; hit_count on each entry is global.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, cache_key: str) -> dict | None:
+        """Returns the cached result for cache_key and records the hit, or None on a miss."""
+        entry = db.session.get(ResultCacheEntry, cache_key)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            RESULT_CACHE_LOOKUPS.labels('miss').inc()
+            return None
+
+        db.session.execute(
+            update(ResultCacheEntry)
+            .where(ResultCacheEntry.cache_key == cache_key)
+            .values(hit_count=ResultCacheEntry.hit_count + 1, last_hit_at=datetime.utcnow())
+        )
+        with self._lock:
+            self.hits += 1
+        RESULT_CACHE_LOOKUPS.labels('hit').inc()
+        return dict(entry.result)
+
+    def store(self, cache_key: str, video_id: str, language: str, template_content: str | None,
+              user_additional_prompt: str | None, model_name: str, result: dict):
+        """Adds or replaces the cached result for cache_key. The caller commits."""
+        db.session.merge(ResultCacheEntry(
+            cache_key=cache_key,
+            video_id=video_id,
+            language=language,
+            template_hash=hash_text(template_content),
+            prompt_hash=hash_text(user_additional_prompt),
+            model_name=model_name,
+            result=result,
+            hit_count=0
+        ))
+
+    def invalidate(self, video_id: str | None = None) -> int:
+        """Deletes the cached results for one video, or all of them. Returns the number removed."""
+        query = ResultCacheEntry.query
+        if video_id:
+            query = query.filter(ResultCacheEntry.video_id == video_id)
+        removed = query.delete(synchronize_session=False)
+        db.session.commit()
+        logger.info(f"Invalidated {removed} cached result(s){f' for video {video_id}' if video_id else ''}.")
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "entries": ResultCacheEntry.query.count(),
+            "total_hits_recorded": db.session.query(db.func.coalesce(db.func.sum(ResultCacheEntry.hit_count), 0)).scalar(),
+        }
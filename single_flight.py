@@ -0,0 +1,83 @@
+from datetime import datetime
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.sqlite import insert
+from models import db, AnalysisFlight, Job
+
+# A follower is waiting on its leader while it is in one of these states.
+WAITING_STATUSES = ('starting', 'running')
+
+
+class SingleFlight:
+    """
+    Registry of in-flight analyses keyed by result cache key, shared by every
+    process through the analysis_flight table.
+
+    The first job to join a key becomes its leader and does the work; jobs that
+    join while the leader is still in flight become followers (Job.coalesced_with)
+    and receive the leader's progress and result instead of starting their own
+    downloads and Gemini calls, whichever process or worker they were submitted to.
+    Like quota.py, methods work in the caller's transaction and the caller commits.
+    """
+
+    def join(self, key: str, job_id: str) -> str:
+        """
+        Attaches job_id to the flight for key, starting a new flight with job_id
+        as leader if none is in progress. Joining again as the leader is a no-op.
+
+        The claim is an INSERT, which takes SQLite's write lock until the caller
+        commits, so a leader can't finish between a follower reading the claim
+        and recording itself as a follower.
+
+        Returns:
+            The leader's job_id, which is job_id itself if it leads.
+        """
+        now = datetime.utcnow()
+        db.session.execute(
+            insert(AnalysisFlight)
+            .values(cache_key=key, leader_job_id=job_id, created_at=now)
+            .on_conflict_do_nothing(index_elements=['cache_key'])
+        )
+        leader_id = db.session.execute(
+            select(AnalysisFlight.leader_job_id).where(AnalysisFlight.cache_key == key)
+        ).scalar_one()
+        if leader_id != job_id:
+            leader_status = db.session.execute(select(Job.status).where(Job.id == leader_id)).scalar()
+            if leader_status is None or leader_status in ('success', 'error'):
+                # The leader is gone without ending its flight, e.g. deleted through the admin.
+                db.session.execute(
+                    update(AnalysisFlight)
+                    .where(AnalysisFlight.cache_key == key, AnalysisFlight.leader_job_id == leader_id)
+                    .values(leader_job_id=job_id, created_at=now)
+                )
+                leader_id = job_id
+        if leader_id != job_id:
+            db.session.execute(update(Job).where(Job.id == job_id).values(coalesced_with=leader_id))
+        return leader_id
+
+    def is_in_flight(self, key: str) -> bool:
+        return self.leader(key) is not None
+
+    def leader(self, key: str) -> str | None:
+        """Returns the job doing the work for key, or None if nothing is in flight."""
+        return db.session.execute(
+            select(AnalysisFlight.leader_job_id).where(AnalysisFlight.cache_key == key)
+        ).scalar()
+
+    def followers(self, leader_id: str) -> list[str]:
+        """Returns the jobs currently waiting on leader_id; cancelled followers no longer wait."""
+        return list(db.session.execute(
+            select(Job.id).where(Job.coalesced_with == leader_id, Job.status.in_(WAITING_STATUSES))
+        ).scalars())
+
+    def finish(self, key: str, leader_id: str) -> list[str]:
+        """
+        Ends the flight led by leader_id and returns its followers. Jobs joining
+        after this start a new flight, so no follower can be left behind.
+        """
+        ended = db.session.execute(
+            delete(AnalysisFlight).where(AnalysisFlight.cache_key == key, AnalysisFlight.leader_job_id == leader_id)
+        ).rowcount
+        return self.followers(leader_id) if ended else []
+
+    def in_flight(self) -> int:
+        return db.session.query(AnalysisFlight).count()
@@ -1,52 +1,40 @@
 import os
 import json
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
 import google.generativeai as genai
+from modules.gemini_client import get_model, gemini_slot
 
-def analyze_transcript_with_gemini(transcript_path: str, template_content: str | None = None, user_additional_prompt: str | None = None):
+# Used when the script is run on its own; the pipeline passes pipeline.ANALYSIS_MODEL_NAME.
+DEFAULT_MODEL_NAME = 'gemini-2.5-flash-lite'
+
+def _configure_model(model_name: str):
+    """Returns the Gemini model, or None if GEMINI_API_KEY is not set."""
     load_dotenv() # Load environment variables from .env
     api_key = os.getenv("GEMINI_API_KEY") # Assuming GEMINI_API_KEY is set in .env
     if not api_key:
         print("Error: GEMINI_API_KEY not found in environment variables.")
-        # Return an error state that main.py can handle
-        return {"summary_content": None, "transcript_content": None, "error": "GEMINI_API_KEY not set"}
+        return None
 
     genai.configure(api_key=api_key)
 
     # Use the model name as specified by the user
-    model = genai.GenerativeModel('gemini-2.5-flash-lite')
-
-    try:
-        with open(transcript_path, 'r', encoding='utf-8') as f:
-            transcript_content = f.read()
-    except FileNotFoundError:
-        print(f"Error: Transcript file not found at {transcript_path}")
-        return {"summary_content": None, "transcript_content": None, "error": f"Transcript file not found at {transcript_path}"}
+    return genai.GenerativeModel(model_name)
 
+def _build_prompt(transcript_content: str, template_content: str | None, user_additional_prompt: str | None) -> str:
     # Prompt for content analysis and extraction of useful information
     if template_content:
         base_prompt = template_content
         if user_additional_prompt:
             base_prompt += f"：{user_additional_prompt}"
-        analysis_prompt = f"{base_prompt}\n\n以下是需要分析的逐字稿內容：\n{transcript_content}"
-    else:
-        base_prompt = f"""請對以下文字進行內容分析和整理，提取出對我有用的資訊。請以條列式或結構化的方式呈現，並確保資訊的實用性。"""
-        if user_additional_prompt:
-            base_prompt += f"：{user_additional_prompt}"
-        analysis_prompt = f"{base_prompt}\n\n{transcript_content}"
-
-    # Generate analysis
-    try:
-        print(f"Analyzing content for {transcript_path}...")
-        analysis_response = model.generate_content(analysis_prompt)
-        analysis_text = analysis_response.text
-        print("Content analysis generated.")
-    except Exception as e:
-        print(f"Error generating content analysis: {e}")
-        # Re-raise or return an error state
-        return {"summary_content": None, "transcript_content": transcript_content, "error": str(e)}
+        return f"{base_prompt}\n\n以下是需要分析的逐字稿內容：\n{transcript_content}"
+    base_prompt = f"""請對以下文字進行內容分析和整理，提取出對我有用的資訊。請以條列式或結構化的方式呈現，並確保資訊的實用性。"""
+    if user_additional_prompt:
+        base_prompt += f"：{user_additional_prompt}"
+    return f"{base_prompt}\n\n{transcript_content}"
 
+def _save_analysis(transcript_path: str, analysis_text: str) -> str:
     # Determine output directory
     transcript_path_obj = Path(transcript_path)
     video_id = transcript_path_obj.stem # Gets 'video_id_123' from 'video_id_123.txt'
@@ -60,12 +48,74 @@ def analyze_transcript_with_gemini(transcript_path: str, template_content: str |
     with open(analysis_file_path, 'w', encoding='utf-8') as f:
         f.write(analysis_text)
     print(f"Analysis saved to {analysis_file_path}")
+    return str(analysis_file_path)
+
+def _read_transcript(transcript_path: str) -> str | None:
+    try:
+        with open(transcript_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        print(f"Error: Transcript file not found at {transcript_path}")
+        return None
+
+def analyze_transcript_with_gemini(transcript_path: str, template_content: str | None = None, user_additional_prompt: str | None = None, model_name: str = DEFAULT_MODEL_NAME):
+    model = _configure_model(model_name)
+    if model is None:
+        # Return an error state that main.py can handle
+        return {"summary_content": None, "transcript_content": None, "error": "GEMINI_API_KEY not set"}
+
+    transcript_content = _read_transcript(transcript_path)
+    if transcript_content is None:
+        return {"summary_content": None, "transcript_content": None, "error": f"Transcript file not found at {transcript_path}"}
+
+    # Generate analysis
+    try:
+        print(f"Analyzing content for {transcript_path}...")
+        analysis_response = model.generate_content(_build_prompt(transcript_content, template_content, user_additional_prompt))
+        analysis_text = analysis_response.text
+        print("Content analysis generated.")
+    except Exception as e:
+        print(f"Error generating content analysis: {e}")
+        # Re-raise or return an error state
+        return {"summary_content": None, "transcript_content": transcript_content, "error": str(e)}
 
     # Return both summary content and the original transcript content
     return {
         "summary_content": analysis_text,
         "transcript_content": transcript_content,
-        "analysis_path": str(analysis_file_path)
+        "analysis_path": _save_analysis(transcript_path, analysis_text)
+    }
+
+async def analyze_transcript_with_gemini_async(transcript_path: str, template_content: str | None = None, user_additional_prompt: str | None = None, model_name: str = DEFAULT_MODEL_NAME):
+    """
+    Same as analyze_transcript_with_gemini, but awaits Gemini with its async client and
+    does the file I/O on a worker thread, so the event loop can serve other jobs meanwhile.
+    The model is shared with the other jobs on the loop (see modules/gemini_client.py).
+    """
+    try:
+        model = get_model(model_name)
+    except ValueError:
+        print("Error: GEMINI_API_KEY not found in environment variables.")
+        return {"summary_content": None, "transcript_content": None, "error": "GEMINI_API_KEY not set"}
+
+    transcript_content = await asyncio.to_thread(_read_transcript, transcript_path)
+    if transcript_content is None:
+        return {"summary_content": None, "transcript_content": None, "error": f"Transcript file not found at {transcript_path}"}
+
+    try:
+        print(f"Analyzing content for {transcript_path}...")
+        async with gemini_slot():
+            analysis_response = await model.generate_content_async(_build_prompt(transcript_content, template_content, user_additional_prompt))
+        analysis_text = analysis_response.text
+        print("Content analysis generated.")
+    except Exception as e:
+        print(f"Error generating content analysis: {e}")
+        return {"summary_content": None, "transcript_content": transcript_content, "error": str(e)}
+
+    return {
+        "summary_content": analysis_text,
+        "transcript_content": transcript_content,
+        "analysis_path": await asyncio.to_thread(_save_analysis, transcript_path, analysis_text)
     }
 
 if __name__ == "__main__":
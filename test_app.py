@@ -0,0 +1,212 @@
+import json
+import threading
+import pytest
+from artifact_store import ArtifactStore, ARTIFACT_KEY_SUFFIX
+from cancellation import CancellationRegistry
+from job_events import JobEventBroker
+from job_executor import JobExecutor
+from progress_sink import ProgressSink
+
+
+@pytest.fixture(scope='module')
+def web_module(tmp_path_factory):
+    """app.py itself, imported with its database under a temporary directory."""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('GOOGLE_CLIENT_ID', 'test')
+        patch.setenv('GOOGLE_CLIENT_SECRET', 'test')
+        patch.setenv('DATA_DIR', str(tmp_path_factory.mktemp('data')))
+        import app
+    return app
+
+
+@pytest.fixture
+def web(web_module, monkeypatch):
+    """app.py with empty tables, fresh in-process job state and no background lease keeper."""
+    monkeypatch.setattr(web_module, 'start_lease_keeper', lambda: None)
+    monkeypatch.setattr(web_module, 'job_events', JobEventBroker())
+    monkeypatch.setattr(web_module, 'job_executor', JobExecutor(max_workers=1, max_queue_size=5))
+    monkeypatch.setattr(web_module, 'cancellations', CancellationRegistry())
+    monkeypatch.setattr(web_module, 'progress_sink', ProgressSink(web_module.app, min_interval=60))
+    with web_module.app.app_context():
+        web_module.db.create_all()
+    yield web_module
+    with web_module.app.app_context():
+        web_module.db.session.remove()
+        web_module.db.drop_all()
+
+
+def add_job(web, job_id, status='running', **kwargs):
+    with web.app.app_context():
+        web.db.session.add(web.Job(id=job_id, status=status, ip_address='127.0.0.1', **kwargs))
+        web.db.session.commit()
+
+
+def job_state(web, job_id):
+    with web.app.app_context():
+        job = web.db.session.get(web.Job, job_id)
+        return job.status, job.progress_percentage, job.progress_message
+
+
+def read_events(response):
+    """Returns the (id, event, data) of every event in an SSE response body."""
+    events = []
+    for block in response.get_data(as_text=True).split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if 'event' in fields:
+            events.append((fields.get('id'), fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_events_are_sent_once_and_then_waited_for(web):
+    add_job(web, 'job')
+    web.job_events.publish('job', {"status": "running", "progress_message": "downloading"})
+    client = web.app.test_client()
+
+    response = client.get('/api/jobs/job/events')
+    assert response.get_data(as_text=True).startswith(f"retry: {web.SSE_RETRY_MS}\n\n")
+    [(event_id, event, data)] = read_events(response)
+    assert (event, data["progress_message"]) == ('progress', "downloading")
+
+    # The reconnect only gets what changed since, here while it waits.
+    timer = threading.Timer(0.1, web.job_events.publish, ('job', {"status": "running", "progress_message": "transcribing"}))
+    timer.start()
+    response = client.get('/api/jobs/job/events', headers={'Last-Event-ID': event_id})
+    timer.join()
+    assert [data["progress_message"] for _, _, data in read_events(response)] == ["transcribing"]
+
+
+def test_unchanged_job_of_another_process_returns_without_events(web):
+    add_job(web, 'elsewhere', progress_percentage=40)
+    client = web.app.test_client()
+    [(event_id, event, data)] = read_events(client.get('/api/jobs/elsewhere/events'))
+    assert (event, data["progress_percentage"]) == ('progress', 40)
+
+    assert read_events(client.get('/api/jobs/elsewhere/events', headers={'Last-Event-ID': event_id})) == []
+
+
+def test_finished_job_gets_a_result_event(web):
+    add_job(web, 'done', status='success', result={"summary": "S"})
+    [(_, event, data)] = read_events(web.app.test_client().get('/api/jobs/done/events'))
+    assert (event, data["status"]) == ('result', 'success')
+
+
+def test_deleted_job_ends_the_watch(web):
+    add_job(web, 'deleted')
+    client = web.app.test_client()
+    [(event_id, _, _)] = read_events(client.get('/api/jobs/deleted/events'))
+    with web.app.app_context():
+        web.db.session.delete(web.db.session.get(web.Job, 'deleted'))
+        web.db.session.commit()
+
+    response = client.get('/api/jobs/deleted/events', headers={'Last-Event-ID': event_id})
+    assert read_events(response) == [(None, 'result', {"status": "not_found"})]
+    assert client.get('/api/jobs/deleted/events').status_code == 404
+
+
+def test_cancelling_a_queued_job_takes_it_out_of_the_queue(web):
+    release = threading.Event()
+    ran = []
+    web.job_executor.submit('busy', release.wait)
+    web.job_executor.submit('queued', ran.append, 'queued')
+    add_job(web, 'queued', status='starting')
+
+    response = web.app.test_client().delete('/api/jobs/queued')
+    release.set()
+    web.job_executor.shutdown(timeout=5)
+
+    assert response.status_code == 200
+    assert job_state(web, 'queued') == ('cancelled', 0, "Cancelled by user.")
+    assert ran == []
+
+
+def test_cancelling_a_running_job_stops_its_analysis(web):
+    add_job(web, 'running')
+    token = web.cancellations.register('running')
+    client = web.app.test_client()
+
+    assert client.delete('/api/jobs/running').status_code == 200
+    assert token.cancelled
+    assert job_state(web, 'running')[0] == 'cancelled'
+    assert client.delete('/api/jobs/running').status_code == 409
+
+
+def test_cancelled_leader_runs_on_for_its_followers_but_stays_cancelled(web):
+    add_job(web, 'leader', cache_key='key')
+    add_job(web, 'follower', cache_key='key')
+    with web.app.app_context():
+        web.single_flight.join('key', 'leader')
+        web.single_flight.join('key', 'follower')
+        web.db.session.commit()
+    token = web.cancellations.register('leader')
+    client = web.app.test_client()
+
+    assert client.delete('/api/jobs/leader').status_code == 200
+    assert not token.cancelled
+    # The leader's analysis still reports progress, which only the follower shows.
+    web.progress_sink.update('leader', 29, "step 19", force=True)
+    assert job_state(web, 'leader') == ('cancelled', 0, "Cancelled by user.")
+    assert job_state(web, 'follower') == ('running', 29, "step 19")
+
+    # Once nobody waits for the analysis any more it is stopped.
+    assert client.delete('/api/jobs/follower').status_code == 200
+    assert token.cancelled
+
+
+@pytest.fixture
+def outputs(web, tmp_path, monkeypatch):
+    """Points the job outputs and the artifact store of app.py at tmp_path."""
+    monkeypatch.setattr(web, 'BASE_OUTPUT_DIR', tmp_path / 'output')
+    monkeypatch.setattr(web, 'ARTIFACT_STORE', ArtifactStore(tmp_path / 'artifacts'))
+    return tmp_path
+
+
+def write_file(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return str(path)
+
+
+def test_job_text_supports_ranges_and_conditional_requests(web, outputs):
+    path = write_file(outputs / 'output' / 'jobs' / 'job' / 'transcript.txt', "0123456789" * 1000)
+    add_job(web, 'job', status='success', result={"transcript_path": path})
+    client = web.app.test_client()
+
+    response = client.get('/api/jobs/job/transcript', headers={'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == 'bytes 10-19/10000'
+    assert response.data == b"0123456789"
+
+    etag = client.get('/api/jobs/job/transcript').headers['ETag']
+    assert client.get('/api/jobs/job/transcript', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/jobs/job/transcript', headers={'Range': 'bytes=20000-'}).status_code == 416
+
+
+def test_job_text_is_only_read_from_the_output_directory(web, outputs):
+    secret = write_file(outputs / 'secret.txt', "not a transcript")
+    add_job(web, 'job', status='success', result={"transcript_path": secret, "full_transcript": "inline text"})
+
+    assert web.app.test_client().get('/api/jobs/job/transcript').data == b"inline text"
+
+
+def test_job_text_falls_back_to_the_artifact_store(web, outputs):
+    ref = web.ARTIFACT_STORE.put_text("stored summary")
+    gone = str(outputs / 'output' / 'jobs' / 'job' / 'summary.txt')
+    add_job(web, 'job', status='success',
+            result={"final_content_path": gone, "summary" + ARTIFACT_KEY_SUFFIX: ref})
+    client = web.app.test_client()
+
+    response = client.get('/api/jobs/job/summary')
+    assert (response.status_code, response.data, response.headers['ETag']) == (200, b"stored summary", f'"{ref["sha256"]}"')
+    response = client.get('/api/jobs/job/summary', headers={'Range': 'bytes=7-'})
+    assert (response.status_code, response.data) == (206, b"summary")
+
+
+def test_job_text_falls_back_to_the_inline_result(web, outputs):
+    add_job(web, 'old', status='success', result={"summary": "inline summary"})
+    add_job(web, 'empty', status='success', result={"title": "T"})
+    client = web.app.test_client()
+
+    response = client.get('/api/jobs/old/summary?download=1')
+    assert (response.status_code, response.data) == (200, b"inline summary")
+    assert response.headers['Content-Disposition'] == 'attachment; filename="old_summary.txt"'
+    assert client.get('/api/jobs/empty/summary').status_code == 404
@@ -0,0 +1,43 @@
+import gzip
+from artifact_store import ArtifactStore, PREVIEW_CHARS
+
+
+def test_identical_text_is_stored_once(tmp_path):
+    store = ArtifactStore(tmp_path)
+    first = store.put_text("same transcript")
+    second = store.put_text("same transcript")
+
+    assert first == second
+    assert first["size"] == len("same transcript")
+    assert len(list(tmp_path.rglob("*.gz"))) == 1
+    path = store.path_for(first["sha256"])
+    assert path.parent.parent.name == first["sha256"][:2]
+    assert gzip.decompress(path.read_bytes()) == b"same transcript"
+
+
+def test_put_file_matches_put_bytes_and_streams_back(tmp_path):
+    store = ArtifactStore(tmp_path / "store")
+    source = tmp_path / "subs.vtt"
+    source.write_bytes(b"WEBVTT\n" * 50000)
+
+    ref = store.put_file(source)
+    assert ref == store.put_bytes(source.read_bytes())
+    assert b"".join(store.iter_bytes(ref["sha256"], chunk_size=4096)) == source.read_bytes()
+
+
+def test_externalized_result_keeps_only_references(tmp_path):
+    store = ArtifactStore(tmp_path)
+    result = {"title": "T", "summary": "s" * 1000, "full_transcript": "full text"}
+
+    compact = store.externalize_result(result)
+    assert set(compact) == {"title", "summary_artifact", "full_transcript_artifact"}
+    assert compact["summary_artifact"]["preview"] == "s" * PREVIEW_CHARS
+    assert store.resolve_text(compact, "summary") == "s" * 1000
+    assert store.resolve_text(compact, "full_transcript") == "full text"
+
+
+def test_inline_results_still_resolve(tmp_path):
+    store = ArtifactStore(tmp_path)
+    assert store.resolve_text({"summary": "inline"}, "summary") == "inline"
+    assert store.resolve_text({"summary_artifact": {"sha256": "0" * 64}}, "summary") is None
+    assert store.resolve_text(None, "summary") is None
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+import pytest
+from async_runtime import AsyncRuntime, loop_semaphore
+
+
+@pytest.fixture
+def runtime():
+    runtime = AsyncRuntime(name='test-runtime')
+    yield runtime
+    runtime.stop()
+
+
+def test_jobs_from_many_threads_share_one_loop(runtime):
+    async def job():
+        await asyncio.sleep(0.01)
+        return asyncio.get_running_loop(), threading.current_thread().name
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(runtime.run(job()))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(results) == 5
+    assert {loop for loop, _ in results} == {runtime.loop()}
+    assert {name for _, name in results} == {'test-runtime'}
+
+
+def test_semaphore_limits_concurrency_across_jobs(runtime):
+    in_flight, peak = 0, 0
+
+    async def job():
+        nonlocal in_flight, peak
+        async with loop_semaphore('test-limit', 2):
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+
+    futures = [runtime.submit(job()) for _ in range(6)]
+    for future in futures:
+        future.result(5)
+    assert peak == 2
+
+
+def test_timeout_cancels_the_coroutine(runtime):
+    cancelled = threading.Event()
+
+    async def stuck():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(TimeoutError):
+        runtime.run(stuck(), timeout=0.05)
+    assert cancelled.wait(5)
+
+
+def test_errors_propagate_and_the_loop_restarts_after_stop(runtime):
+    async def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        runtime.run(fail())
+
+    first = runtime.loop()
+    runtime.stop()
+
+    async def ok():
+        return 42
+
+    assert runtime.run(ok()) == 42
+    assert runtime.loop() is not first
+
+
+def test_executor_is_sized_for_the_jobs_blocking_calls(runtime):
+    from async_runtime import THREADS_PER_JOB
+    runtime.size_for_jobs(10)
+    calls = 10 * THREADS_PER_JOB
+    # Only passes if every call gets a thread of its own at the same time.
+    barrier = threading.Barrier(calls)
+
+    async def job():
+        return await asyncio.to_thread(barrier.wait, 5)
+
+    futures = [runtime.submit(job()) for _ in range(calls)]
+    assert sorted(future.result(10) for future in futures) == list(range(calls))
@@ -0,0 +1,109 @@
+import asyncio
+import sys
+import threading
+import time
+import pytest
+from cancellation import CancellationToken, CancellationRegistry, JobCancelled, install_subprocess_tracking
+
+
+def test_token_raises_once_cancelled():
+    token = CancellationToken()
+    token.raise_if_cancelled()
+    token.cancel()
+    assert token.cancelled
+    with pytest.raises(JobCancelled):
+        token.raise_if_cancelled()
+
+
+def test_cancel_kills_subprocesses_started_by_the_attached_thread():
+    from yt_dlp.utils import Popen
+
+    install_subprocess_tracking()
+    token = CancellationToken()
+    token.attach()
+    try:
+        process = Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+        token.cancel()
+        assert process.wait(5) != 0
+    finally:
+        token.detach()
+
+    # Processes started after detaching are no longer tracked.
+    process = Popen([sys.executable, '-c', 'pass'])
+    assert process.wait(5) == 0
+
+
+def test_cancel_from_another_thread_cancels_the_attached_task():
+    token = CancellationToken()
+    started = threading.Event()
+
+    async def analysis():
+        token.attach()
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            return "cancelled"
+        finally:
+            token.detach()
+        return "finished"
+
+    threading.Thread(target=lambda: (started.wait(5), token.cancel()), daemon=True).start()
+    assert asyncio.run(asyncio.wait_for(analysis(), 10)) == "cancelled"
+
+
+def test_blocking_stage_on_a_worker_thread_is_killed_with_its_task():
+    from yt_dlp.utils import Popen
+
+    install_subprocess_tracking()
+    token = CancellationToken()
+    processes = []
+
+    def blocking_stage():
+        with token.bound_to_thread():
+            process = Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+            processes.append(process)
+            return process.wait(10)
+
+    async def analysis():
+        token.attach()
+        try:
+            return await asyncio.to_thread(blocking_stage)
+        finally:
+            token.detach()
+
+    async def main():
+        task = asyncio.ensure_future(analysis())
+        while not processes:
+            await asyncio.sleep(0.01)
+        token.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert processes[0].wait(5) != 0
+
+
+def test_registry_cancels_jobs_reported_by_the_watcher():
+    reported = []
+
+    def find_cancelled(job_ids):
+        reported.append(sorted(job_ids))
+        return [job_id for job_id in job_ids if job_id == "cancelled-elsewhere"]
+
+    registry = CancellationRegistry(find_cancelled, poll_interval=0.01)
+    running = registry.register("running")
+    cancelled = registry.register("cancelled-elsewhere")
+
+    deadline = time.monotonic() + 5
+    while not cancelled.cancelled and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cancelled.cancelled
+    assert not running.cancelled
+
+    assert registry.cancel("running")
+    assert running.cancelled
+    registry.unregister("running")
+    registry.unregister("cancelled-elsewhere")
+    assert not registry.cancel("running")
+    assert registry.running() == []
@@ -0,0 +1,34 @@
+from checkpoint import Checkpoint, CHECKPOINT_FILE_NAME
+
+
+def test_saved_stages_survive_a_reload(tmp_path):
+    transcript = tmp_path / 'transcript.txt'
+    transcript.write_text('hello')
+    saved = []
+    checkpoint = Checkpoint(tmp_path, on_save=saved.append)
+    checkpoint.save('metadata', title='A video', duration=60)
+    checkpoint.save('transcription', transcript_path=str(transcript))
+
+    assert (tmp_path / CHECKPOINT_FILE_NAME).exists()
+    assert list(saved[-1]) == ['metadata', 'transcription']
+
+    reloaded = Checkpoint.load(tmp_path)
+    assert reloaded.completed() == ['metadata', 'transcription']
+    assert reloaded.get('metadata')['title'] == 'A video'
+    assert reloaded.get('analysis') is None
+
+
+def test_load_falls_back_to_database_copy(tmp_path):
+    reloaded = Checkpoint.load(tmp_path, fallback={'metadata': {'title': 'From the DB'}})
+    assert reloaded.get('metadata')['title'] == 'From the DB'
+
+
+def test_stage_with_missing_outputs_runs_again(tmp_path):
+    audio = tmp_path / 'audio.wav'
+    audio.write_bytes(b'RIFF')
+    checkpoint = Checkpoint(tmp_path)
+    checkpoint.save('audio_download', audio_path=str(audio))
+    audio.unlink()
+
+    assert Checkpoint.load(tmp_path).get('audio_download') is None
+    assert Checkpoint.load(tmp_path).completed() == []
@@ -0,0 +1,30 @@
+from flask import Flask
+from sqlalchemy import create_engine, text
+from flask_sqlalchemy import SQLAlchemy
+from db_config import configure_database, engine_options, SQLITE_BUSY_TIMEOUT_MS
+
+
+def test_file_database_uses_wal_and_busy_timeout(tmp_path):
+    app = Flask(__name__)
+    db = SQLAlchemy()
+    configure_database(app, db, tmp_path / 'test.db', pool_size=7)
+
+    with app.app_context():
+        assert db.engine.pool.size() == 7
+        with db.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == SQLITE_BUSY_TIMEOUT_MS
+
+
+def test_other_engines_are_left_alone(tmp_path):
+    configure_database(Flask(__name__), SQLAlchemy(), tmp_path / 'app.db', pool_size=2)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'other.db'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == 'delete'
+    engine.dispose()
+
+
+def test_in_memory_database_keeps_default_pool():
+    assert engine_options('sqlite://', 10) == {}
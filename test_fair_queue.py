@@ -0,0 +1,41 @@
+import pytest
+from fair_queue import FairShareQueue
+
+
+def drain(queue):
+    return [queue.pop()[0] for _ in range(len(queue))]
+
+
+def test_single_principal_is_fifo():
+    queue = FairShareQueue()
+    for key in "abc":
+        queue.push(key, key.upper())
+    assert queue.order() == ["a", "b", "c"]
+    assert queue.pop() == ("a", "A")
+    assert drain(queue) == ["b", "c"]
+    with pytest.raises(IndexError):
+        queue.pop()
+
+
+def test_principals_share_by_cost():
+    queue = FairShareQueue(quantum=10)
+    for i in range(4):
+        queue.push(f"big-{i}", None, principal="big", cost=20)
+    for i in range(4):
+        queue.push(f"small-{i}", None, principal="small", cost=5)
+    # Per turn "small" runs two 5-unit jobs, while "big" needs two turns of credit per 20-unit job.
+    expected = ["small-0", "small-1", "big-0", "small-2", "small-3", "big-1", "big-2", "big-3"]
+    assert queue.order() == expected
+    assert drain(queue) == expected
+
+
+def test_lower_priority_classes_run_first_and_remove_works():
+    queue = FairShareQueue()
+    queue.push("audio", None, principal="a", priority=1, cost=30)
+    queue.push("captions-1", "item", principal="a", priority=0)
+    queue.push("captions-2", None, principal="b", priority=0)
+    assert "captions-1" in queue
+    assert queue.remove("captions-1") == "item" and "captions-1" not in queue
+    assert queue.remove("missing") is None
+    assert queue.entry("audio") == (1, "a", 30)
+    assert drain(queue) == ["captions-2", "audio"]
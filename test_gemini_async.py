@@ -0,0 +1,70 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+import main
+from artifact_store import ArtifactStore
+from transcript_cache import TranscriptCache
+
+
+def test_pipeline_never_blocks_the_event_loop(tmp_path, monkeypatch):
+    """Every stage is slow; a heartbeat on the same loop must still run on time throughout."""
+    stage_seconds, max_lag_allowed = 0.3, 0.15
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    monkeypatch.setattr(main, 'BASE_OUTPUT_DIR', tmp_path / 'output')
+    monkeypatch.setattr(main, 'ARTIFACT_STORE', ArtifactStore(tmp_path / 'artifacts'))
+    monkeypatch.setattr(main, 'TRANSCRIPT_CACHE', TranscriptCache(tmp_path / 'transcripts', ArtifactStore(tmp_path / 'artifacts')))
+
+    def slow_metadata(url, stats=None):
+        time.sleep(stage_seconds)
+        return {'id': 'test_video_id', 'title': 'Test', 'duration': 60}
+
+    def slow_subtitles(*args, **kwargs):
+        time.sleep(stage_seconds)
+        return None
+
+    def slow_download(url, output_dir, **kwargs):
+        time.sleep(stage_seconds)
+        path = f"{output_dir}/test_video_id.wav"
+        open(path, 'wb').write(b'RIFF')
+        return path
+
+    class FakeModel:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def generate_content(self, *args, **kwargs):
+            time.sleep(stage_seconds)
+            return MagicMock(text="blocking")
+
+        async def generate_content_async(self, *args, **kwargs):
+            await asyncio.sleep(stage_seconds)
+            return MagicMock(text="generated")
+
+    monkeypatch.setattr('modules.gemini_client.genai', MagicMock(GenerativeModel=FakeModel))
+    monkeypatch.setattr('modules.gemini_client._configured_key', None)
+    monkeypatch.setattr(main, 'fetch_video_metadata', slow_metadata)
+    monkeypatch.setattr(main, 'get_subtitle', slow_subtitles)
+    monkeypatch.setattr(main, 'download_audio', slow_download)
+
+    async def run_with_heartbeat():
+        lags = []
+        done = asyncio.Event()
+
+        async def heartbeat():
+            while not done.is_set():
+                before = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append(time.perf_counter() - before - 0.01)
+
+        beat = asyncio.ensure_future(heartbeat())
+        await asyncio.sleep(0.05)  # Let the heartbeat get going before the first stage.
+        result = await main.run_analysis_for_url("https://www.youtube.com/watch?v=test_video_id", job_id='job-1')
+        done.set()
+        await beat
+        return result, max(lags)
+
+    result, max_lag = asyncio.run(run_with_heartbeat())
+
+    assert result["status"] == "success", result
+    assert set(result["metrics"]["stages"]) >= {'metadata', 'subtitles', 'audio_download', 'transcription', 'analysis'}
+    assert max_lag < max_lag_allowed, f"The event loop was blocked for {max_lag:.2f}s"
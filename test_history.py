@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+import pytest
+from models import db, Job
+import history
+
+
+def add_job(job_id, user_id, created_at, status='success', summary="summary", transcript="transcript"):
+    result = {"summary": summary, "full_transcript": transcript} if status == 'success' else None
+    db.session.add(Job(id=job_id, user_id=user_id, status=status, created_at=created_at,
+                       video_url=f"https://youtu.be/{job_id}", result=result))
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    created_at = datetime(2025, 1, 1, 12, 30, 0, 123456)
+    assert history.decode_cursor(history.encode_cursor(created_at, "abc")) == (created_at, "abc")
+    with pytest.raises(history.InvalidCursor):
+        history.decode_cursor("not a cursor")
+
+
+def test_pages_cover_every_job_once_including_ties(app_ctx):
+    base = datetime(2025, 1, 1)
+    # Two jobs share a timestamp, so the id has to break the tie.
+    for i, offset in enumerate([0, 1, 1, 2, 3]):
+        add_job(f"job-{i}", 1, base + timedelta(minutes=offset))
+    add_job("other-user", 2, base)
+    db.session.commit()
+
+    seen, cursor = [], None
+    while True:
+        page = history.list_history(1, limit=2, cursor=cursor)
+        seen += [item["job_id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ["job-4", "job-3", "job-2", "job-1", "job-0"]
+
+
+def test_listing_returns_only_a_summary_preview(app_ctx):
+    add_job("done", 1, datetime(2025, 1, 2), summary="s" * 1000, transcript="t" * 5000)
+    add_job("failed", 1, datetime(2025, 1, 1), status='error')
+    db.session.commit()
+
+    items = history.list_history(1)["items"]
+    assert items[0]["summary_preview"] == "s" * history.SUMMARY_PREVIEW_CHARS
+    assert "full_transcript" not in items[0]
+    assert items[1]["summary_preview"] is None
+
+
+def test_results_in_the_artifact_store_are_previewed_and_resolved(app_ctx, tmp_path, monkeypatch):
+    monkeypatch.setattr(history.ARTIFACT_STORE, 'root', tmp_path)
+    result = history.ARTIFACT_STORE.externalize_result({"summary": "x" * 1000, "full_transcript": "stored text"})
+    db.session.add(Job(id="stored", user_id=1, status='success', created_at=datetime(2025, 1, 1), result=result))
+    db.session.commit()
+
+    assert history.list_history(1)["items"][0]["summary_preview"] == "x" * history.SUMMARY_PREVIEW_CHARS
+    assert history.get_result_field("stored", 1, "full_transcript") == (True, "stored text")
+
+
+def test_result_field_is_only_returned_to_the_owner(app_ctx):
+    add_job("done", 1, datetime(2025, 1, 1), transcript="full text")
+    db.session.commit()
+
+    assert history.get_result_field("done", 1, "full_transcript") == (True, "full text")
+    assert history.get_result_field("done", 2, "full_transcript") == (False, None)
+    assert history.get_result_field("missing", 1, "summary") == (False, None)
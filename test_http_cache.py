@@ -0,0 +1,57 @@
+import gzip
+import json
+import pytest
+from flask import Flask, Response
+from http_cache import conditional_json, compress_response, make_etag, COMPRESSION_MIN_BYTES, IMMUTABLE_CACHE_CONTROL
+import http_cache
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(http_cache, 'brotli', None)
+    app = Flask(__name__)
+    app.after_request(compress_response)
+    calls = []
+
+    @app.route('/big')
+    def big():
+        def build():
+            calls.append(1)
+            return {"text": "x" * (COMPRESSION_MIN_BYTES * 2)}
+        return conditional_json(make_etag("big", 1), build, IMMUTABLE_CACHE_CONTROL)
+
+    @app.route('/small')
+    def small():
+        return conditional_json(make_etag("small"), lambda: {"ok": True})
+
+    @app.route('/stream')
+    def stream():
+        return Response((chunk for chunk in ["{}"] * 1000), mimetype='application/json')
+
+    client = app.test_client()
+    client.calls = calls
+    return client
+
+
+def test_large_json_is_gzipped_and_revalidates_with_either_etag(client):
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data))["text"].startswith("xxx")
+    assert response.headers['ETag'].endswith('-gzip"')
+
+    # Revalidating with the encoded or the plain ETag skips building the payload.
+    for etag in (response.headers['ETag'], f'"{make_etag("big", 1)}"'):
+        revalidated = client.get('/big', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        assert revalidated.status_code == 304
+        assert revalidated.headers['ETag'] == etag
+    assert len(client.calls) == 1
+
+
+def test_small_streamed_and_unaccepted_responses_are_not_compressed(client):
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in client.get('/stream', headers={'Accept-Encoding': 'gzip'}).headers
+    plain = client.get('/big')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.json["text"].startswith("xxx")
@@ -0,0 +1,61 @@
+import os
+import time
+from janitor import Janitor
+
+
+def make_job_dir(root, job_id, size, age_seconds, audio_size=0):
+    """Creates output/jobs/<job_id> with a summary of size bytes, last touched age_seconds ago."""
+    job_dir = root / job_id
+    (job_dir / "summary").mkdir(parents=True)
+    files = [job_dir / "summary" / "summary.txt"]
+    files[0].write_bytes(b"s" * size)
+    if audio_size:
+        (job_dir / "audio_files").mkdir()
+        files.append(job_dir / "audio_files" / f"{job_id}.wav")
+        files[-1].write_bytes(b"a" * audio_size)
+    stamp = time.time() - age_seconds
+    for path in files:
+        os.utime(path, (stamp, stamp))
+    return job_dir
+
+
+def test_sweep_removes_orphaned_audio_and_evicts_least_recently_accessed(tmp_path):
+    reclaimed = []
+    janitor = Janitor(tmp_path, budget_bytes=1300, grace_seconds=60,
+                      active_job_ids=lambda: {"running"},
+                      on_reclaimed=lambda reason, size: reclaimed.append((reason, size)))
+    make_job_dir(tmp_path, "oldest", 100, age_seconds=3000)
+    make_job_dir(tmp_path, "crashed", 100, age_seconds=2000, audio_size=500)
+    make_job_dir(tmp_path, "read-recently", 100, age_seconds=4000)
+    make_job_dir(tmp_path, "running", 100, age_seconds=5000, audio_size=500)
+    make_job_dir(tmp_path, "just-written", 100, age_seconds=1, audio_size=500)
+    janitor.mark_accessed("read-recently")
+    os.utime(tmp_path / "read-recently" / ".last_access", (time.time() - 120, time.time() - 120))
+
+    report = janitor.sweep()
+
+    # The running job and the one still within the grace period are left alone but count
+    # against the budget (1200 bytes), so only the most recently read directory fits.
+    remaining = sorted(path.name for path in tmp_path.iterdir() if path.is_dir())
+    assert remaining == ["just-written", "read-recently", "running"]
+    assert (tmp_path / "running" / "audio_files").exists()
+    assert (tmp_path / "just-written" / "audio_files").exists()
+    assert report["orphaned_audio_bytes"] == 500
+    assert report["evicted_bytes"] == 200
+    assert report["removed_jobs"] == 2
+    assert report["reclaimed_bytes"] == 700
+    assert report["remaining_bytes"] == 1300
+    assert sorted(reclaimed) == [("evicted", 100), ("evicted", 100), ("orphaned_audio", 500)]
+
+
+def test_sweep_expires_directories_unread_for_too_long(tmp_path):
+    janitor = Janitor(tmp_path, budget_bytes=10 ** 9, max_age_seconds=3600, grace_seconds=60)
+    make_job_dir(tmp_path, "stale", 100, age_seconds=7200)
+    make_job_dir(tmp_path, "fresh", 100, age_seconds=600)
+
+    report = janitor.sweep()
+
+    assert not (tmp_path / "stale").exists()
+    assert (tmp_path / "fresh").exists()
+    assert report["expired_bytes"] == 100
+    assert report["evicted_bytes"] == 0
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+from models import db, Job
+from job_estimates import (
+    VideoFacts, estimate_job, persisted_facts, CAPTION_JOB_COST, DEFAULT_AUDIO_MINUTES, PRIORITY_AUDIO,
+    PRIORITY_CAPTIONS
+)
+
+
+def add_job(job_id, video_url, created_at, metadata=None, video_id="abcdefghijk"):
+    checkpoint = {"metadata": dict(metadata, video_id=video_id)} if metadata else None
+    db.session.add(Job(id=job_id, status='success', video_url=video_url, video_id=video_id,
+                       created_at=created_at, checkpoint=checkpoint))
+    db.session.commit()
+
+
+def test_estimate_uses_facts_recorded_by_another_process(app_ctx):
+    now = datetime.utcnow()
+    add_job('older', "https://youtu.be/abcdefghijk", now - timedelta(days=1), {"duration": 600, "has_subtitles": True})
+    add_job('newer', "https://www.youtube.com/watch?v=abcdefghijk", now, {"duration": 1800, "has_subtitles": False})
+    add_job('no-checkpoint', "https://youtu.be/abcdefghijk", now + timedelta(minutes=1))
+    # Another video, which a substring match on the URL would also have found.
+    add_job('lookalike', "https://youtu.be/abcdefghijkX", now, {"duration": 60, "has_subtitles": True},
+            video_id="abcdefghij_")
+
+    # A fresh map stands in for another process, or this one after a restart.
+    facts = VideoFacts(load=persisted_facts)
+    assert estimate_job("abcdefghijk", facts) == (PRIORITY_AUDIO, 30.0)
+    assert facts.get("abcdefghijk") == (1800, False)
+    assert estimate_job("zzzzzzzzzzz", facts) == (PRIORITY_AUDIO, DEFAULT_AUDIO_MINUTES)
+
+    facts.record("abcdefghijk", 1800, True)
+    assert estimate_job("abcdefghijk", facts) == (PRIORITY_CAPTIONS, CAPTION_JOB_COST)
+
+
+def test_misses_are_not_looked_up_again_until_the_ttl_expires():
+    lookups = []
+    facts = VideoFacts(load=lambda video_id: lookups.append(video_id), miss_ttl=60)
+    assert facts.get("unseen") is None
+    assert facts.get("unseen") is None
+    assert lookups == ["unseen"]
+
+    facts.record("unseen", 120, False)
+    assert facts.get("unseen") == (120, False)
+
+    expired = VideoFacts(load=lambda video_id: lookups.append(video_id), miss_ttl=0)
+    expired.get("other")
+    expired.get("other")
+    assert lookups == ["unseen", "other", "other"]
@@ -0,0 +1,40 @@
+import threading
+from job_events import JobEventBroker
+
+
+def test_latest_event_wins_and_versions_increase():
+    broker = JobEventBroker()
+    assert broker.latest("job") is None
+
+    broker.publish("job", {"progress_percentage": 10})
+    assert broker.publish("job", {"progress_percentage": 20}) == 2
+    assert broker.latest("job") == (2, {"progress_percentage": 20}, False)
+
+    # A subscriber behind the cursor gets the newest event immediately.
+    assert broker.wait_for_update("job", 0, timeout=0.1) == (2, {"progress_percentage": 20}, False)
+
+
+def test_waiters_are_woken_and_final_event_is_sticky():
+    broker = JobEventBroker()
+    broker.publish("job", {"status": "running"})
+    received = []
+
+    def subscriber():
+        received.append(broker.wait_for_update("job", 1, timeout=5))
+
+    thread = threading.Thread(target=subscriber)
+    thread.start()
+    broker.publish("job", {"status": "success"}, final=True)
+    thread.join(5)
+
+    assert received == [(2, {"status": "success"}, True)]
+    # Late progress from a racing thread must not replace the final result.
+    broker.publish("job", {"status": "running"})
+    assert broker.latest("job") == (2, {"status": "success"}, True)
+
+
+def test_wait_times_out_without_updates():
+    broker = JobEventBroker()
+    assert broker.wait_for_update("unknown", 0, timeout=0.05) is None
+    broker.publish("job", {})
+    assert broker.wait_for_update("job", 1, timeout=0.05) is None
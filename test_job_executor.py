@@ -0,0 +1,136 @@
+import threading
+import pytest
+from job_executor import JobExecutor, QueueFullError
+
+
+def test_jobs_run_in_fifo_order():
+    executor = JobExecutor(max_workers=1, max_queue_size=5)
+    gate = threading.Event()
+    done = threading.Event()
+    order = []
+
+    executor.submit("blocker", gate.wait)
+    for job_id in ("a", "b", "c"):
+        executor.submit(job_id, order.append, job_id)
+    executor.submit("last", done.set)
+
+    gate.set()
+    assert done.wait(5)
+    assert order == ["a", "b", "c"]
+    executor.shutdown()
+
+
+def test_queue_position_and_admission_control():
+    executor = JobExecutor(max_workers=1, max_queue_size=2)
+    gate = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        gate.wait()
+
+    executor.submit("running", blocker)
+    assert started.wait(5)
+
+    assert executor.submit("first", lambda: None) == 1
+    assert executor.submit("second", lambda: None) == 2
+    assert executor.queue_position("second") == 2
+    assert executor.queue_position("running") is None
+    assert executor.is_full()
+
+    with pytest.raises(QueueFullError):
+        executor.submit("third", lambda: None)
+
+    assert executor.stats() == {"max_workers": 1, "max_queue_size": 2, "queued": 2, "running": 1}
+    gate.set()
+    executor.shutdown()
+
+
+def test_exception_in_job_does_not_kill_worker():
+    executor = JobExecutor(max_workers=1, max_queue_size=5)
+    done = threading.Event()
+
+    def boom():
+        raise RuntimeError("boom")
+
+    executor.submit("bad", boom)
+    executor.submit("good", done.set)
+    assert done.wait(5)
+    executor.shutdown()
+
+
+def test_cancel_drops_a_waiting_job_only():
+    executor = JobExecutor(max_workers=1, max_queue_size=5)
+    gate = threading.Event()
+    started = threading.Event()
+    ran = []
+
+    def blocker():
+        started.set()
+        gate.wait()
+
+    executor.submit("running", blocker)
+    assert started.wait(5)
+    executor.submit("waiting", ran.append, "waiting")
+    executor.submit("next", ran.append, "next")
+    done = threading.Event()
+    executor.submit("last", done.set)
+
+    assert executor.cancel("waiting")
+    assert not executor.cancel("running")
+    assert not executor.cancel("unknown")
+    assert executor.queue_position("next") == 1
+
+    gate.set()
+    assert done.wait(5)
+    executor.shutdown()
+    assert ran == ["next"]
+
+
+def test_waiting_jobs_are_shared_fairly_between_principals():
+    executor = JobExecutor(max_workers=1, max_queue_size=10, quantum=10)
+    gate = threading.Event()
+    started = threading.Event()
+    done = threading.Event()
+    order = []
+
+    def blocker():
+        started.set()
+        gate.wait()
+
+    executor.submit("blocker", blocker)
+    assert started.wait(5)
+    for job_id in ("heavy-1", "heavy-2", "heavy-3"):
+        executor.submit(job_id, order.append, job_id, principal="heavy", priority=1, cost=60)
+    executor.submit("light-1", order.append, "light-1", principal="light", priority=1, cost=5)
+    executor.submit("captions", order.append, "captions", principal="heavy", priority=0, cost=1)
+    assert executor.queue_position("captions") == 1
+    assert executor.queue_position("light-1") == 2
+    executor.submit("last", done.set, principal="light", priority=2)
+
+    gate.set()
+    assert done.wait(5)
+    executor.shutdown()
+    assert order == ["captions", "light-1", "heavy-1", "heavy-2", "heavy-3"]
+
+
+def test_estimated_starts_follow_the_queue_order():
+    executor = JobExecutor(max_workers=1, max_queue_size=10, seconds_per_unit={0: 10.0, 1: 2.0})
+    gate = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        gate.wait()
+
+    executor.submit("blocker", blocker, priority=0, cost=1)
+    assert started.wait(5)
+    executor.submit("audio", lambda: None, principal="a", priority=1, cost=30)
+    executor.submit("captions", lambda: None, principal="b", priority=0, cost=1)
+
+    starts = executor.estimated_starts()
+    assert 0 < starts["captions"] <= 10
+    assert starts["audio"] == pytest.approx(starts["captions"] + 10)
+    assert executor.estimated_start("blocker") is None
+    gate.set()
+    executor.shutdown()
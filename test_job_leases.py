@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+from models import db, Job
+from single_flight import SingleFlight
+from job_leases import claim_next_job, renew_lease, renew_leases, release_lease, requeue_expired_jobs
+
+
+def add_job(job_id, status='starting', **kwargs):
+    db.session.add(Job(id=job_id, status=status, **kwargs))
+    db.session.commit()
+
+
+def test_claim_is_exclusive_and_oldest_first(app_ctx):
+    add_job('new', created_at=datetime.utcnow())
+    add_job('old', created_at=datetime.utcnow() - timedelta(minutes=5))
+
+    assert claim_next_job('worker-a') == 'old'
+    assert claim_next_job('worker-b') == 'new'
+    assert claim_next_job('worker-c') is None
+
+    job = db.session.get(Job, 'old')
+    assert job.claimed_by == 'worker-a'
+    assert job.attempts == 1
+
+
+def test_renew_only_succeeds_for_lease_holder(app_ctx):
+    add_job('job')
+    claim_next_job('worker-a')
+    assert renew_lease('job', 'worker-a')
+    assert not renew_lease('job', 'worker-b')
+
+    release_lease('job', 'worker-a')
+    assert db.session.get(Job, 'job').claimed_by is None
+
+
+def test_expired_running_jobs_are_requeued_then_abandoned(app_ctx):
+    expired = datetime.utcnow() - timedelta(seconds=1)
+    add_job('retry', status='running', claimed_by='dead', lease_expires_at=expired, attempts=1)
+    add_job('give-up', status='running', claimed_by='dead', lease_expires_at=expired, attempts=3)
+    add_job('alive', status='running', claimed_by='live', lease_expires_at=datetime.utcnow() + timedelta(minutes=1), attempts=1)
+
+    assert requeue_expired_jobs(max_attempts=3) == 1
+
+    db.session.expire_all()
+    assert db.session.get(Job, 'retry').status == 'starting'
+    assert db.session.get(Job, 'give-up').status == 'error'
+    assert db.session.get(Job, 'alive').status == 'running'
+    assert claim_next_job('worker-a') == 'retry'
+
+
+def test_running_jobs_from_before_leases_are_requeued_once_expired(app_ctx):
+    # What the b7d40e1c9a52 migration leaves behind for jobs that never had a lease.
+    add_job('legacy', status='running', lease_expires_at=datetime(1970, 1, 1))
+
+    assert requeue_expired_jobs() == 1
+    assert claim_next_job('worker-a') == 'legacy'
+
+
+def test_abandoning_a_leader_fails_its_followers_and_ends_its_flight(app_ctx):
+    add_job('leader', status='running', claimed_by='dead', lease_expires_at=datetime.utcnow() - timedelta(seconds=1),
+            attempts=3, cache_key='key')
+    add_job('follower', status='running', coalesced_with='leader', cache_key='key')
+    SingleFlight().join('key', 'leader')
+    db.session.commit()
+
+    requeue_expired_jobs(max_attempts=3)
+
+    db.session.expire_all()
+    assert db.session.get(Job, 'follower').status == 'error'
+    assert not SingleFlight().is_in_flight('key')
+
+
+def test_renew_leases_extends_all_unfinished_jobs_of_a_worker(app_ctx):
+    expiring = datetime.utcnow() + timedelta(seconds=5)
+    add_job('queued', claimed_by='web-1', lease_expires_at=expiring)
+    add_job('running', status='running', claimed_by='web-1', lease_expires_at=expiring)
+    add_job('done', status='success', claimed_by='web-1', lease_expires_at=expiring)
+    add_job('other', status='running', claimed_by='web-2', lease_expires_at=expiring)
+
+    assert renew_leases('web-1', lease_seconds=60) == 2
+
+    db.session.expire_all()
+    assert db.session.get(Job, 'queued').lease_expires_at > expiring
+    assert db.session.get(Job, 'running').lease_expires_at > expiring
+    assert db.session.get(Job, 'done').lease_expires_at == expiring
+    assert db.session.get(Job, 'other').lease_expires_at == expiring
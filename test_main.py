@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from main import get_video_info_from_url
+from main import get_video_info_from_url, fetch_video_metadata, METADATA_CACHE
 import logging
 
 # Suppress logging output during tests for cleaner console output
@@ -79,3 +79,36 @@ def test_get_video_info_from_url_missing_info(mock_yt_dlp):
     }
     result = get_video_info_from_url(url)
     assert result is None
+
+def test_get_video_info_from_url_uses_given_info(mock_yt_dlp):
+    """
+    Test that get_video_info_from_url does not call yt-dlp when the info dict is passed in.
+    """
+    result = get_video_info_from_url(
+        "https://www.youtube.com/watch?v=test_video_id",
+        info={'id': 'test_video_id', 'title': 'Test Video Title'}
+    )
+
+    mock_yt_dlp.extract_info.assert_not_called()
+    assert result['video_id'] == 'test_video_id'
+    assert result['title'] == 'Test Video Title'
+
+def test_fetch_video_metadata_is_cached_per_video(mock_yt_dlp):
+    """
+    Test that different URLs for the same video share one extractor call.
+    """
+    METADATA_CACHE.clear()
+    mock_yt_dlp.extract_info.return_value = {'id': 'dQw4w9WgXcQ', 'title': 'Test Video Title'}
+
+    stats = {"extractor_calls": 0}
+    first = fetch_video_metadata("https://www.youtube.com/watch?v=dQw4w9WgXcQ", stats=stats)
+    second = fetch_video_metadata("https://youtu.be/dQw4w9WgXcQ", stats=stats)
+
+    assert first == second == {'id': 'dQw4w9WgXcQ', 'title': 'Test Video Title'}
+    assert mock_yt_dlp.extract_info.call_count == 1
+    assert stats["extractor_calls"] == 1
+
+    # Callers get their own copy, so mutating it can't corrupt the cache.
+    first['title'] = 'Changed'
+    assert fetch_video_metadata("https://youtu.be/dQw4w9WgXcQ")['title'] == 'Test Video Title'
+    METADATA_CACHE.clear()
@@ -0,0 +1,36 @@
+import pytest
+from prometheus_client import REGISTRY
+from models import db, Job
+from job_executor import JobExecutor
+from single_flight import SingleFlight
+from progress_sink import ProgressSink
+import metrics
+
+
+def test_stage_timer_records_timings_and_histogram():
+    before = REGISTRY.get_sample_value('analysis_stage_seconds_count', {'stage': 'analysis'}) or 0
+    timings = {}
+    with metrics.stage_timer('analysis', timings):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.stage_timer('analysis', timings):
+            raise ValueError("stage failed")
+
+    assert set(timings) == {'analysis'}
+    assert REGISTRY.get_sample_value('analysis_stage_seconds_count', {'stage': 'analysis'}) == before + 2
+
+
+def test_job_state_gauges_come_from_the_database(app, monkeypatch):
+    monkeypatch.delenv('PROMETHEUS_MULTIPROC_DIR', raising=False)
+    with app.app_context():
+        db.session.add_all([Job(id="queued", status='starting'), Job(id="busy", status='running'),
+                            Job(id="hit", status='success', cache_hit=True), Job(id="miss", status='success')])
+        db.session.commit()
+
+    collector = metrics.JobStateCollector(app, JobExecutor(max_workers=1, max_queue_size=1), SingleFlight(),
+                                          ProgressSink(app))
+    body, _ = metrics.render([collector])
+    lines = body.decode().splitlines()
+    assert "job_queue_depth 1.0" in lines
+    assert "jobs_in_flight 1.0" in lines
+    assert "result_cache_hit_ratio 0.5" in lines
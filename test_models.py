@@ -0,0 +1,27 @@
+from sqlalchemy import event
+from sqlalchemy.orm import undefer_group
+from models import db, Job, Template
+
+
+def test_heavy_columns_are_not_selected_by_default(app_ctx):
+    job_sql = str(Job.query.statement.compile())
+    for column in ('result', 'error_message', 'options', 'stage_metrics'):
+        assert f"job.{column}" not in job_sql
+    assert "job.status" in job_sql
+    assert "template.content" not in str(Template.query.statement.compile())
+
+
+def test_outcome_group_is_loaded_in_one_query(app_ctx):
+    db.session.add(Job(id="j", status='error', error_message="boom", result=None))
+    db.session.commit()
+    db.session.expunge_all()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        job = Job.query.options(undefer_group('outcome')).get("j")
+        assert (job.error_message, job.result) == ("boom", None)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert len(statements) == 1
@@ -0,0 +1,75 @@
+import pytest
+from models import db, Job
+from progress_sink import ProgressSink
+
+
+@pytest.fixture
+def jobs(app):
+    with app.app_context():
+        db.session.add_all([Job(id='a', status='running'), Job(id='b', status='running')])
+        db.session.commit()
+
+
+def progress_of(app, job_id):
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        return job.progress_percentage, job.progress_message
+
+
+def test_updates_are_coalesced_into_one_batch(app, jobs):
+    sink = ProgressSink(app, min_interval=60)
+    for percentage in (10, 20, 30):
+        sink.update('a', percentage, f"a at {percentage}")
+    sink.update('b', 50, "b halfway")
+    sink.flush()
+
+    assert progress_of(app, 'a') == (30, "a at 30")
+    assert progress_of(app, 'b') == (50, "b halfway")
+    assert sink.stats() == {
+        "updates_received": 4,
+        "rows_written": 2,
+        "rows_skipped": 0,
+        "follower_rows_written": 0,
+        "transactions": 1,
+        "writes_saved": 2,
+        "pending": 0,
+    }
+
+
+def test_force_writes_immediately_and_finish_drops_pending(app, jobs):
+    sink = ProgressSink(app, min_interval=60)
+    sink.update('a', 40, "forced", force=True)
+    assert progress_of(app, 'a') == (40, "forced")
+
+    sink.update('b', 70, "stale")
+    sink.finish('b')
+    sink.flush()
+    assert progress_of(app, 'b') == (0, None)
+    assert sink.stats()["pending"] == 0
+
+
+def test_a_deleted_job_does_not_cost_the_rest_of_the_batch(app, jobs):
+    sink = ProgressSink(app, min_interval=60)
+    sink.update('a', 10, "a working")
+    sink.update('b', 20, "b working")
+    with app.app_context():
+        db.session.delete(db.session.get(Job, 'b'))
+        db.session.commit()
+    sink.flush()
+
+    assert progress_of(app, 'a') == (10, "a working")
+    stats = sink.stats()
+    assert (stats["rows_written"], stats["rows_skipped"], stats["writes_saved"]) == (1, 1, 0)
+
+
+def test_progress_reaches_the_jobs_coalesced_onto_a_job(app, jobs):
+    with app.app_context():
+        db.session.add_all([Job(id='follower', status='running', coalesced_with='a'),
+                            Job(id='gave-up', status='cancelled', coalesced_with='a')])
+        db.session.commit()
+    sink = ProgressSink(app, min_interval=60)
+    sink.update('a', 60, "a transcribing", force=True)
+
+    assert progress_of(app, 'follower') == (60, "a transcribing")
+    assert progress_of(app, 'gave-up') == (0, None)
+    assert sink.stats()["follower_rows_written"] == 1
@@ -0,0 +1,38 @@
+from datetime import date
+from models import db
+import quota
+
+
+def test_principal_prefers_user_over_ip():
+    assert quota.principal_for(7, "1.2.3.4") == "user:7"
+    assert quota.principal_for(None, "1.2.3.4") == "ip:1.2.3.4"
+
+
+def test_consume_stops_at_limit_and_refund_frees_a_slot(app_ctx):
+    day = date(2025, 1, 1)
+    assert quota.get_usage("user:1", day) == 0
+
+    assert quota.try_consume("user:1", 2, day)
+    assert quota.try_consume("user:1", 2, day)
+    assert not quota.try_consume("user:1", 2, day)
+    db.session.commit()
+    assert quota.get_usage("user:1", day) == 2
+
+    # Counters are per principal and per day.
+    assert quota.try_consume("user:2", 2, day)
+    assert quota.try_consume("user:1", 2, date(2025, 1, 2))
+
+    quota.refund("user:1", day)
+    db.session.commit()
+    assert quota.get_usage("user:1", day) == 1
+    assert quota.try_consume("user:1", 2, day)
+
+
+def test_refund_never_goes_negative(app_ctx):
+    day = date(2025, 1, 1)
+    quota.refund("ip:1.2.3.4", day)
+    assert quota.try_consume("ip:1.2.3.4", 1, day)
+    quota.refund("ip:1.2.3.4", day)
+    quota.refund("ip:1.2.3.4", day)
+    db.session.commit()
+    assert quota.get_usage("ip:1.2.3.4", day) == 0
@@ -0,0 +1,34 @@
+from models import db, ResultCacheEntry
+from result_cache import ResultCache, make_cache_key
+
+
+def test_cache_key_covers_every_input():
+    base = make_cache_key("vid", "en", "template", "prompt", "model")
+    assert base == make_cache_key("vid", "en", "template", "prompt", "model")
+    assert len({
+        base,
+        make_cache_key("other", "en", "template", "prompt", "model"),
+        make_cache_key("vid", "zh", "template", "prompt", "model"),
+        make_cache_key("vid", "en", "changed", "prompt", "model"),
+        make_cache_key("vid", "en", "template", None, "model"),
+        make_cache_key("vid", "en", "template", "prompt", "newer-model"),
+    }) == 6
+
+
+def test_lookup_store_and_invalidate(app_ctx):
+    cache = ResultCache()
+    key = make_cache_key("vid", "en", None, None, "model")
+    assert cache.lookup(key) is None
+
+    cache.store(key, "vid", "en", None, None, "model", {"summary": "S"})
+    db.session.commit()
+    assert cache.lookup(key) == {"summary": "S"}
+    db.session.commit()
+
+    assert db.session.get(ResultCacheEntry, key).hit_count == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"], stats["entries"]) == (1, 1, 0.5, 1)
+
+    assert cache.invalidate("other-video") == 0
+    assert cache.invalidate("vid") == 1
+    assert cache.lookup(key) is None
@@ -0,0 +1,51 @@
+from models import db, Job
+from single_flight import SingleFlight
+
+
+def add_jobs(*job_ids, status='starting'):
+    db.session.add_all([Job(id=job_id, status=status, cache_key="key") for job_id in job_ids])
+    db.session.commit()
+
+
+def test_first_job_leads_and_later_jobs_follow(app_ctx):
+    add_jobs("a", "b", "c")
+    assert SingleFlight().join("key", "a") == "a"
+    assert SingleFlight().join("key", "a") == "a"  # Re-joining as leader is a no-op
+    db.session.commit()
+
+    # Another process has its own SingleFlight but finds the same flight.
+    assert SingleFlight().join("key", "b") == "a"
+    assert SingleFlight().join("key", "c") == "a"
+    db.session.commit()
+    assert db.session.get(Job, "b").coalesced_with == "a"
+    assert SingleFlight().followers("a") == ["b", "c"]
+
+    db.session.get(Job, "b").status = 'cancelled'  # Cancelled followers stop waiting
+    assert SingleFlight().finish("key", "a") == ["c"]
+    db.session.commit()
+    assert not SingleFlight().is_in_flight("key")
+
+
+def test_only_the_leader_can_finish_and_new_flights_start_fresh(app_ctx):
+    add_jobs("a", "b", "c")
+    flights = SingleFlight()
+    flights.join("key", "a")
+    flights.join("key", "b")
+    assert flights.finish("key", "b") == []
+    assert flights.finish("key", "a") == ["b"]
+    db.session.commit()
+
+    assert flights.join("key", "c") == "c"
+    assert flights.followers("c") == []
+    assert flights.in_flight() == 1
+
+
+def test_a_flight_whose_leader_is_gone_is_taken_over(app_ctx):
+    add_jobs("a", "b")
+    flights = SingleFlight()
+    flights.join("key", "a")
+    db.session.delete(db.session.get(Job, "a"))
+    db.session.commit()
+
+    assert flights.join("key", "b") == "b"
+    assert flights.leader("key") == "b"
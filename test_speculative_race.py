@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch, MagicMock
+from cancellation import current_token
+from main import race_transcript_sources
+
+
+def race(tmp_path, **kwargs):
+    """Runs race_transcript_sources for a test video into fresh directories under tmp_path."""
+    dirs = {name: tmp_path / name for name in ('subs', 'audio', 'transcripts')}
+    for directory in dirs.values():
+        directory.mkdir()
+    progress = []
+    result = asyncio.run(race_transcript_sources(
+        "https://www.youtube.com/watch?v=test_video_id", {'id': 'test_video_id'}, 'en', ['en'],
+        dirs['subs'], dirs['audio'], dirs['transcripts'], {}, lambda pct, msg: progress.append(pct), **kwargs
+    ))
+    return result, dirs
+
+
+def test_speculative_audio_wins_over_slow_subtitle_probe(tmp_path):
+    probe_tokens = []
+
+    def slow_probe(url, output_dir, **kwargs):
+        probe_tokens.append(current_token())
+        path = f"{output_dir}/video.en.vtt"
+        open(path, 'w').write("WEBVTT")
+        time.sleep(0.3)
+        return path
+
+    def download(url, output_dir, **kwargs):
+        path = f"{output_dir}/audio.wav"
+        open(path, 'wb').close()
+        return path
+
+    async def transcribe(audio_path, output_dir, language):
+        path = f"{output_dir}/audio.txt"
+        open(path, 'w').write("transcribed")
+        return path
+
+    with patch('main.get_subtitle', side_effect=slow_probe), patch('main.download_audio', side_effect=download), \
+            patch('main.transcribe_audio_single', side_effect=transcribe):
+        (source, transcript_path, _, audio_path), dirs = race(tmp_path)
+
+        # The losing probe notices its cancellation when it returns and removes its subtitle.
+        for _ in range(100):
+            if not list(tmp_path.glob('subs/*')):
+                break
+            time.sleep(0.01)
+
+    assert source == 'audio'
+    assert audio_path == str(dirs['audio'] / 'audio.wav')
+    assert open(transcript_path).read() == "transcribed"
+    assert probe_tokens[0].cancelled
+    assert not list(tmp_path.glob('subs/*'))
+
+
+def test_speculative_download_is_cancelled_when_subtitles_win(tmp_path):
+
+    def subtitle(url, output_dir, **kwargs):
+        path = f"{output_dir}/video.en.vtt"
+        open(path, 'w').write("WEBVTT")
+        return path
+
+    def clean(vtt_path, output_dir):
+        path = f"{output_dir}/video.txt"
+        open(path, 'w').write("hello")
+        return path
+
+    def endless_download(url, output_dir, **kwargs):
+        open(f"{output_dir}/audio.part", 'wb').close()
+        while not current_token().cancelled:
+            time.sleep(0.01)
+        raise Exception("aria2c was killed")
+
+    transcribe = MagicMock()
+    with patch('main.get_subtitle', side_effect=subtitle), patch('main.clean_vtt_file', side_effect=clean), \
+            patch('main.download_audio', side_effect=endless_download), patch('main.transcribe_audio_single', transcribe):
+        (source, transcript_path, subtitle_path, audio_path), dirs = race(tmp_path)
+        # The losing download cleans up after itself on its own thread (if it got to start at all).
+        for _ in range(100):
+            if not list(tmp_path.glob('audio/*')):
+                break
+            time.sleep(0.01)
+
+    assert source == 'subtitles'
+    assert subtitle_path == str(dirs['subs'] / 'video.en.vtt')
+    assert audio_path is None
+    assert not list(tmp_path.glob('audio/*'))
+    transcribe.assert_not_called()
+
+
+def test_speculative_audio_is_removed_when_subtitles_win_during_transcription(tmp_path):
+    downloaded = threading.Event()
+    checkpointed = []
+
+    def subtitle(url, output_dir, **kwargs):
+        downloaded.wait(5)
+        path = f"{output_dir}/video.en.vtt"
+        open(path, 'w').write("WEBVTT")
+        return path
+
+    def clean(vtt_path, output_dir):
+        path = f"{output_dir}/video.txt"
+        open(path, 'w').write("hello")
+        return path
+
+    def download(url, output_dir, **kwargs):
+        path = f"{output_dir}/audio.wav"
+        open(path, 'wb').close()
+        downloaded.set()
+        return path
+
+    async def endless_transcription(audio_path, output_dir, language):
+        await asyncio.sleep(60)
+
+    async def on_audio_downloaded(path):
+        checkpointed.append(path)
+
+    with patch('main.get_subtitle', side_effect=subtitle), patch('main.clean_vtt_file', side_effect=clean), \
+            patch('main.download_audio', side_effect=download), patch('main.transcribe_audio_single', endless_transcription):
+        (source, _, _, audio_path), dirs = race(tmp_path, on_audio_downloaded=on_audio_downloaded)
+
+    assert source == 'subtitles'
+    assert audio_path is None
+    assert checkpointed == [str(dirs['audio'] / 'audio.wav')]
+    assert not (dirs['audio'] / 'audio.wav').exists()
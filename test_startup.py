@@ -0,0 +1,55 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+# Cold-start budget of one web worker importing app.py. Generous enough for a slow CI
+# machine; pulling the pipeline back in at import time roughly doubles both numbers.
+IMPORT_BUDGET_SECONDS = float(os.environ.get('STARTUP_IMPORT_BUDGET_SECONDS', 2.0))
+RSS_BUDGET_MB = float(os.environ.get('STARTUP_RSS_BUDGET_MB', 120))
+
+# Only needed once an analysis runs.
+PIPELINE_MODULES = ('main', 'yt_dlp', 'google.generativeai', 'grpc', 'modules.yt_get_cc')
+
+PROJECT_ROOT = Path(__file__).parent
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# Prints the peak RSS in MB after importing app. On Linux ru_maxrss carries over the
+# peak of the process that forked us (here pytest), so read this process's own VmHWM.
+SCRIPT = """
+import resource, sys
+import app
+try:
+    with open('/proc/self/status') as f:
+        print(next(int(line.split()[1]) for line in f if line.startswith('VmHWM:')) / 1024)
+except OSError:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024)
+"""
+
+
+def import_app():
+    """Imports app.py in a fresh interpreter. Returns (stdout, stderr) of `python -X importtime`."""
+    env = dict(os.environ, GOOGLE_CLIENT_ID='test', GOOGLE_CLIENT_SECRET='test')
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', SCRIPT],
+                               cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True)
+    return completed.stdout, completed.stderr
+
+
+def test_app_import_is_fast_and_skips_the_pipeline():
+    stdout, stderr = import_app()
+    imports = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            imports[match.group(4)] = int(match.group(2))
+
+    loaded = [name for name in PIPELINE_MODULES if name in imports]
+    assert not loaded, f"app.py imports pipeline modules at startup: {loaded}"
+
+    import_seconds = imports['app'] / 1_000_000
+    assert import_seconds < IMPORT_BUDGET_SECONDS, f"importing app took {import_seconds:.2f}s"
+
+    rss_mb = float(stdout.strip().splitlines()[-1])
+    assert rss_mb < RSS_BUDGET_MB, f"importing app used {rss_mb:.0f} MB"
@@ -0,0 +1,61 @@
+import pytest
+from artifact_store import ArtifactStore
+from transcript_cache import TranscriptCache, SOURCE_SUBTITLES, SOURCE_AUDIO
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TranscriptCache(tmp_path / "index", ArtifactStore(tmp_path / "artifacts"))
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_transcript_is_restored_into_another_job(cache, tmp_path):
+    transcript = write(tmp_path / "job-1" / "transcripts" / "talk.txt", "cleaned subtitles")
+    vtt = write(tmp_path / "job-1" / "subs" / "talk.en.vtt", "WEBVTT")
+    cache.store("abcdefghijk", "en", SOURCE_SUBTITLES, transcript, vtt)
+
+    source, entry = cache.lookup("abcdefghijk", "en")
+    assert source == SOURCE_SUBTITLES
+
+    transcripts_dir, subs_dir = tmp_path / "job-2" / "transcripts", tmp_path / "job-2" / "subs"
+    transcripts_dir.mkdir(parents=True)
+    subs_dir.mkdir(parents=True)
+    transcript_path, vtt_path = cache.restore(entry, transcripts_dir, subs_dir)
+    assert transcript_path == str(transcripts_dir / "talk.txt")
+    assert open(transcript_path, encoding='utf-8').read() == "cleaned subtitles"
+    assert open(vtt_path, encoding='utf-8').read() == "WEBVTT"
+
+
+def test_lookup_is_per_language_and_prefers_subtitles(cache, tmp_path):
+    cache.store("abcdefghijk", "zh", SOURCE_AUDIO, write(tmp_path / "a.txt", "transcribed"))
+    assert cache.lookup("abcdefghijk", "en") is None
+    assert cache.lookup("abcdefghijk", "zh")[0] == SOURCE_AUDIO
+
+    cache.store("abcdefghijk", "zh", SOURCE_SUBTITLES, write(tmp_path / "s.txt", "subtitled"))
+    source, entry = cache.lookup("abcdefghijk", "zh")
+    assert source == SOURCE_SUBTITLES
+    assert entry["vtt"] is None
+
+
+def test_entries_without_their_artifact_are_misses(cache, tmp_path):
+    cache.store("abcdefghijk", "en", SOURCE_AUDIO, write(tmp_path / "a.txt", "transcribed"))
+    _, entry = cache.lookup("abcdefghijk", "en")
+    cache.artifacts.path_for(entry["transcript"]["sha256"]).unlink()
+    assert cache.lookup("abcdefghijk", "en") is None
+
+
+def test_invalidate_and_unsafe_keys(cache, tmp_path):
+    cache.store("abcdefghijk", "en", SOURCE_AUDIO, write(tmp_path / "a.txt", "one"))
+    cache.store("bcdefghijkl", "en", SOURCE_AUDIO, write(tmp_path / "b.txt", "two"))
+    assert cache.invalidate("abcdefghijk") == 1
+    assert cache.lookup("abcdefghijk", "en") is None
+    assert cache.lookup("bcdefghijkl", "en") is not None
+
+    assert cache.lookup("../etc", "en") is None
+    with pytest.raises(ValueError):
+        cache.store("../etc", "en", SOURCE_AUDIO, str(tmp_path / "b.txt"))
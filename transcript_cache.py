@@ -0,0 +1,120 @@
+"""
+Transcripts of earlier jobs, reused by every later job for the same video.
+
+Getting a transcript (subtitle download and cleanup, or audio download and
+transcription) is the expensive part of a job, and it only depends on the video
+and the language, not on the template or prompt. run_analysis_for_url looks
+here before downloading anything, so re-analyzing a video with another template
+goes straight to the Gemini analysis.
+
+The texts live in the artifact store; this cache is a small index of JSON files
+<root>/<video_id>/<language>/<source>.json pointing at them, shared by every
+process on the node.
+"""
+import json
+import logging
+import os
+import re
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from artifact_store import ARTIFACT_STORE, ArtifactStore
+
+logger = logging.getLogger(__name__)
+
+# Where a transcript came from, in the order the pipeline prefers them.
+SOURCE_SUBTITLES = 'subtitles'
+SOURCE_AUDIO = 'audio'
+SOURCES = (SOURCE_SUBTITLES, SOURCE_AUDIO)
+
+# Video IDs and language codes only ever contain these, which keeps keys from escaping root.
+SAFE_KEY_PATTERN = re.compile(r'^[\w-]+$')
+
+
+class TranscriptCache:
+    """Transcript references keyed by (video_id, language, source)."""
+
+    def __init__(self, root: str | os.PathLike, artifacts: ArtifactStore):
+        self.root = Path(root)
+        self.artifacts = artifacts
+
+    def _path(self, video_id: str, language: str, source: str) -> Path | None:
+        if not all(SAFE_KEY_PATTERN.match(part or '') for part in (video_id, language, source)):
+            return None
+        return self.root / video_id / language / f"{source}.json"
+
+    def lookup(self, video_id: str, language: str) -> tuple[str, dict] | None:
+        """Returns (source, entry) of the best cached transcript, or None on a miss."""
+        for source in SOURCES:
+            path = self._path(video_id, language, source)
+            if path is None:
+                return None
+            try:
+                with open(path, encoding='utf-8') as f:
+                    entry = json.load(f)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable transcript cache entry {path}: {e}")
+                continue
+            if self.artifacts.exists(entry["transcript"]["sha256"]):
+                return source, entry
+            logger.warning(f"Transcript of {video_id} ({language}, {source}) is missing from the artifact store.")
+        return None
+
+    def store(self, video_id: str, language: str, source: str, transcript_path: str, vtt_path: str | None = None):
+        """Caches a finished transcript, and the subtitle file it was cleaned from, if any."""
+        path = self._path(video_id, language, source)
+        if path is None or source not in SOURCES:
+            raise ValueError(f"Invalid transcript cache key: {video_id!r}, {language!r}, {source!r}")
+        entry = {
+            "transcript": dict(self.artifacts.put_file(transcript_path), name=Path(transcript_path).name),
+            "vtt": dict(self.artifacts.put_file(vtt_path), name=Path(vtt_path).name) if vtt_path else None,
+            "stored_at": datetime.utcnow().isoformat()
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def restore(self, entry: dict, transcripts_dir: str | os.PathLike,
+                subs_dir: str | os.PathLike) -> tuple[str, str | None]:
+        """Writes a cached transcript (and subtitle file) into a job's directories. Returns their paths."""
+        paths = []
+        for name, directory in (("transcript", transcripts_dir), ("vtt", subs_dir)):
+            ref = entry.get(name)
+            if not ref:
+                paths.append(None)
+                continue
+            path = Path(directory) / ref["name"]
+            with open(path, 'wb') as f:
+                for chunk in self.artifacts.iter_bytes(ref["sha256"]):
+                    f.write(chunk)
+            paths.append(str(path))
+        return paths[0], paths[1]
+
+    def invalidate(self, video_id: str | None = None) -> int:
+        """Drops the cached transcripts of one video, or all of them. Returns the number removed."""
+        if video_id is not None and not SAFE_KEY_PATTERN.match(video_id):
+            return 0
+        base = self.root / video_id if video_id else self.root
+        removed = 0
+        for path in base.rglob('*.json'):
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+# The artifacts are shared with the results, so the index lives next to them.
+TRANSCRIPT_CACHE = TranscriptCache(
+    os.environ.get('TRANSCRIPT_CACHE_DIR', Path(__file__).parent / 'data' / 'transcripts'), ARTIFACT_STORE
+)
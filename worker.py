@@ -0,0 +1,106 @@
+"""
+Standalone analysis worker.
+
+Claims 'starting' jobs from the Job table and runs them outside the web tier,
+so analysis capacity can be scaled independently of gunicorn. Run any number of
+these against the same database (set JOB_DISPATCH_MODE=worker on the web tier):
+
+    python worker.py --concurrency 2
+"""
+import argparse
+import logging
+import threading
+import time
+
+from app import app, run_stored_job
+from async_runtime import RUNTIME
+from job_executor import JobExecutor
+from job_leases import (
+    DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS,
+    make_worker_id, claim_next_job, renew_lease, release_lease, requeue_expired_jobs
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisWorker:
+    """Polls the Job table for work and keeps leases alive on the jobs it runs."""
+
+    def __init__(self, concurrency: int = 1, poll_interval: float = 2.0,
+                 lease_seconds: int = DEFAULT_LEASE_SECONDS, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.worker_id = make_worker_id()
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # Claims are only made when a thread is free, so the queue never needs to hold anything.
+        self.executor = JobExecutor(max_workers=concurrency, max_queue_size=concurrency, name="analysis-worker")
+        RUNTIME.size_for_jobs(concurrency)
+        self._active_jobs = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _run_claimed_job(self, job_id):
+        try:
+            run_stored_job(job_id)
+        finally:
+            with app.app_context():
+                release_lease(job_id, self.worker_id)
+            with self._lock:
+                self._active_jobs.discard(job_id)
+
+    def _heartbeat_loop(self):
+        # Renew well before expiry so a slow commit doesn't cost us the lease.
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            with self._lock:
+                job_ids = list(self._active_jobs)
+            with app.app_context():
+                for job_id in job_ids:
+                    try:
+                        if not renew_lease(job_id, self.worker_id, self.lease_seconds):
+                            logger.warning(f"Lost the lease on job {job_id}; another worker may pick it up.")
+                    except Exception:
+                        logger.exception(f"Failed to renew lease for job {job_id}")
+
+    def _has_free_slot(self) -> bool:
+        with self._lock:
+            return len(self._active_jobs) < self.concurrency
+
+    def run_forever(self):
+        logger.info(f"Analysis worker {self.worker_id} started with concurrency {self.concurrency}.")
+        threading.Thread(target=self._heartbeat_loop, name="lease-heartbeat", daemon=True).start()
+        try:
+            while not self._stop.is_set():
+                with app.app_context():
+                    requeue_expired_jobs(self.max_attempts)
+                    while self._has_free_slot():
+                        job_id = claim_next_job(self.worker_id, self.lease_seconds)
+                        if not job_id:
+                            break
+                        with self._lock:
+                            self._active_jobs.add(job_id)
+                        self.executor.submit(job_id, self._run_claimed_job, job_id)
+                self._stop.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            logger.info("Shutting down; in-flight jobs will be re-queued once their leases expire.")
+        finally:
+            self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the video analysis worker.")
+    parser.add_argument('--concurrency', type=int, default=1, help="Number of jobs to run at once.")
+    parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds between polls of the Job table.")
+    parser.add_argument('--lease-seconds', type=int, default=DEFAULT_LEASE_SECONDS, help="Lease duration for claimed jobs.")
+    args = parser.parse_args()
+
+    AnalysisWorker(
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval,
+        lease_seconds=args.lease_seconds
+    ).run_forever()
+
+
+if __name__ == '__main__':
+    main()